@@ -0,0 +1,355 @@
+# backend/admission.py
+import asyncio
+import hashlib
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException
+
+from instrumentation import registry
+
+ADMISSION_QUEUE_DEPTH = registry.gauge(
+    "llm_admission_queue_depth", "LLM calls waiting for an upstream slot", ("priority",))
+ADMISSION_WAIT = registry.histogram(
+    "llm_admission_wait_seconds", "Time LLM calls waited for an upstream slot", ("priority",),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0))
+ADMISSION_REJECTED = registry.counter(
+    "llm_admission_rejections_total", "LLM calls refused with 429, by reason", ("priority", "reason"))
+ADMISSION_LIMIT = registry.gauge(
+    "llm_admission_concurrency_limit", "Current adaptive limit on concurrent LLM calls")
+ADMISSION_IN_FLIGHT = registry.gauge(
+    "llm_admission_in_flight", "LLM calls currently holding an upstream slot")
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+PRIORITIES = (INTERACTIVE, BATCH)
+
+# Who is calling and how urgently; set per request by the app, per run by CLIs
+_request_class: ContextVar[Tuple[str, str]] = ContextVar("request_class", default=("default", INTERACTIVE))
+
+
+def set_request_class(tenant: Optional[str] = None, priority: Optional[str] = None):
+    """Tag LLM calls made from the current context with a tenant and a priority class"""
+    current_tenant, current_priority = _request_class.get()
+    if priority not in PRIORITIES:
+        priority = current_priority
+    return _request_class.set((tenant or current_tenant, priority))
+
+
+def request_class() -> Tuple[str, str]:
+    return _request_class.get()
+
+
+def tenant_for(tenant_id: Optional[str], api_key: Optional[str], client_host: Optional[str]) -> str:
+    """An explicit tenant id, else a digest of the API key (never the key itself), else the client address"""
+    if tenant_id:
+        return tenant_id[:64]
+    if api_key:
+        return "key-" + hashlib.sha256(api_key.encode()).hexdigest()[:12]
+    return client_host or "default"
+
+
+class AdmissionRejected(HTTPException):
+    def __init__(self, upstream: str, reason: str, position: int, retry_after: float):
+        super().__init__(
+            status_code=429,
+            detail=f"{upstream} is saturated ({reason}); queue position {position}, retry in {max(1, math.ceil(retry_after))} s",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after))), "X-Queue-Position": str(position)},
+        )
+        self.reason = reason
+        self.position = position
+
+
+class AimdLimit:
+    """
+    Concurrency limit that follows upstream latency, additive-increase /
+    multiplicative-decrease like TCP congestion control.
+
+    Each operation keeps a short moving average of its latency and a slow one
+    as the baseline. When the recent average climbs past `tolerance` times the
+    baseline the upstream is queueing, and the limit is cut by `backoff`; so it
+    is on an overload response (429, 5xx, transport error). While calls are
+    waiting for slots and latency holds steady, each completion grows the
+    limit by 1/limit, about one slot per limit's worth of completions.
+    Only calls started after the last cut can cut again, so one burst of slow
+    responses counts once.
+    """
+
+    def __init__(self, initial: float = 16, minimum: float = 1, maximum: float = 64, tolerance: float = 1.5, backoff: float = 0.7):
+        self.value = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tolerance = tolerance
+        self.backoff = backoff
+        # Per operation: recent and baseline latency moving averages in seconds, and calls seen
+        self.latencies: Dict[str, list] = {}
+        self._last_decrease = 0.0
+        ADMISSION_LIMIT.set(self.value)
+
+    @property
+    def capacity(self) -> int:
+        return max(1, int(self.value))
+
+    def on_success(self, operation: str, latency: float, started: float, saturated: bool):
+        averages = self.latencies.setdefault(operation, [latency, latency, 0])
+        averages[2] += 1
+        averages[0] += (latency - averages[0]) * 0.1
+        # A plain mean over the first calls, then a slow average over about the last 500
+        averages[1] += (latency - averages[1]) * max(0.002, 1 / averages[2])
+        recent, baseline, _ = averages
+        if recent > baseline * self.tolerance:
+            self._decrease(started)
+        elif saturated and recent <= baseline * (1 + (self.tolerance - 1) / 4):
+            # Only grow while the limit is what's holding calls back and
+            # latency hasn't started climbing yet
+            self.value = min(self.maximum, self.value + 1 / self.value)
+            ADMISSION_LIMIT.set(self.value)
+
+    def on_overload(self, started: float):
+        self._decrease(started)
+
+    def _decrease(self, started: float):
+        if started < self._last_decrease:
+            return
+        self.value = max(self.minimum, self.value * self.backoff)
+        self._last_decrease = time.monotonic()
+        ADMISSION_LIMIT.set(self.value)
+
+
+class _Waiter:
+    __slots__ = ("future", "tenant", "priority", "enqueued_at")
+
+    def __init__(self, tenant: str, priority: str):
+        self.future = asyncio.get_running_loop().create_future()
+        self.tenant = tenant
+        self.priority = priority
+        self.enqueued_at = time.monotonic()
+
+
+class Ticket:
+    """A granted upstream slot; streaming callers mark the first token so TTFT drives the limit"""
+
+    def __init__(self, operation: str, priority: str):
+        self.operation = operation
+        self.priority = priority
+        self.started = time.monotonic()
+        self.first_token_at: Optional[float] = None
+        self.overloaded = False
+
+    def first_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.monotonic()
+
+    def mark_overloaded(self):
+        self.overloaded = True
+
+
+class AdmissionController:
+    """
+    Admission control and fair scheduling for calls to one upstream.
+
+    At most `limit.capacity` calls run at once. Others wait in a queue per
+    priority class; within a class tenants are served round-robin, so one
+    tenant's bulk run queues behind itself rather than in front of everyone.
+    Interactive calls go first, but a waiting batch call is let through after
+    every `interactive_share` interactive ones so batch work never starves.
+
+    A call is refused with 429 straight away when its class queue or its
+    tenant's share of it is full, or when the expected wait already exceeds
+    the class's `max_wait`; one that does wait longer than that is refused too.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        limit: Optional[AimdLimit] = None,
+        max_queue: int = 500,
+        max_queue_per_tenant: int = 100,
+        max_wait: Optional[Dict[str, float]] = None,
+        interactive_share: int = 4,
+    ):
+        self.name = name
+        self.limit = limit or AimdLimit()
+        self.max_queue = max_queue
+        self.max_queue_per_tenant = max_queue_per_tenant
+        self.max_wait = {INTERACTIVE: 10.0, BATCH: 120.0, **(max_wait or {})}
+        self.interactive_share = interactive_share
+        self.in_flight = 0
+        # Moving average of how long a slot is held, for wait estimates
+        self.hold_time = 1.0
+        self._queues: Dict[str, "OrderedDict[str, Deque[_Waiter]]"] = {priority: OrderedDict() for priority in PRIORITIES}
+        self._depth = {priority: 0 for priority in PRIORITIES}
+        self._interactive_run = 0
+
+    @classmethod
+    def from_env(cls, name: str) -> "AdmissionController":
+        prefix = f"{name.upper()}_ADMISSION_"
+
+        def setting(key: str, default: float) -> float:
+            value = os.environ.get(prefix + key) or os.environ.get("ADMISSION_" + key)
+            return float(value) if value else default
+
+        return cls(
+            name,
+            limit=AimdLimit(
+                initial=setting("INITIAL_LIMIT", 16),
+                minimum=setting("MIN_LIMIT", 1),
+                maximum=setting("MAX_LIMIT", 64),
+                tolerance=setting("LATENCY_TOLERANCE", 1.5),
+                backoff=setting("BACKOFF", 0.7),
+            ),
+            max_queue=int(setting("MAX_QUEUE", 500)),
+            max_queue_per_tenant=int(setting("MAX_QUEUE_PER_TENANT", 100)),
+            max_wait={INTERACTIVE: setting("INTERACTIVE_MAX_WAIT", 10.0), BATCH: setting("BATCH_MAX_WAIT", 120.0)},
+            interactive_share=int(setting("INTERACTIVE_SHARE", 4)),
+        )
+
+    @asynccontextmanager
+    async def slot(self, operation: str):
+        """Hold an upstream slot for one call, waiting for one if the upstream is saturated"""
+        tenant, priority = request_class()
+        await self._acquire(tenant, priority)
+        ticket = Ticket(operation, priority)
+        try:
+            yield ticket
+        except (HTTPException, httpx.TransportError) as e:
+            status = getattr(e, "status_code", 503)
+            if status == 429 or status >= 500:
+                ticket.mark_overloaded()
+            raise
+        finally:
+            self._release(ticket)
+
+    def _queued(self) -> int:
+        return self._depth[INTERACTIVE] + self._depth[BATCH]
+
+    def position(self, tenant: str, priority: str) -> int:
+        """Where a call arriving now would stand: round-robin puts it behind one round of every other tenant"""
+        queue = self._queues[priority]
+        rounds = len(queue.get(tenant, ())) + 1
+        ahead = sum(min(len(waiters), rounds) for other, waiters in queue.items() if other != tenant)
+        if priority == BATCH:
+            ahead += self._depth[INTERACTIVE]
+        return ahead + rounds
+
+    def expected_wait(self, position: int) -> float:
+        return position * self.hold_time / self.limit.capacity
+
+    async def _acquire(self, tenant: str, priority: str):
+        if self.in_flight < self.limit.capacity and not self._queued():
+            self._grant()
+            ADMISSION_WAIT.observe(0.0, priority=priority)
+            return
+
+        position = self.position(tenant, priority)
+        if self._depth[priority] >= self.max_queue:
+            self._reject(priority, "queue_full", position)
+        if len(self._queues[priority].get(tenant, ())) >= self.max_queue_per_tenant:
+            self._reject(priority, "tenant_queue_full", position)
+        if self.expected_wait(position) > self.max_wait[priority]:
+            self._reject(priority, "expected_wait", position)
+
+        waiter = _Waiter(tenant, priority)
+        self._queues[priority].setdefault(tenant, deque()).append(waiter)
+        self._depth[priority] += 1
+        ADMISSION_QUEUE_DEPTH.set(self._depth[priority], priority=priority)
+        try:
+            await asyncio.wait({waiter.future}, timeout=self.max_wait[priority])
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                self._release(None)
+            else:
+                self._remove(waiter)
+            raise
+        if not waiter.future.done() or waiter.future.cancelled():
+            self._remove(waiter)
+            self._reject(priority, "wait_timeout", self.position(tenant, priority))
+        ADMISSION_WAIT.observe(time.monotonic() - waiter.enqueued_at, priority=priority)
+
+    def _reject(self, priority: str, reason: str, position: int):
+        ADMISSION_REJECTED.inc(priority=priority, reason=reason)
+        raise AdmissionRejected(self.name, reason, position, self.expected_wait(position))
+
+    def _grant(self):
+        self.in_flight += 1
+        ADMISSION_IN_FLIGHT.set(self.in_flight)
+
+    def _remove(self, waiter: _Waiter):
+        waiter.future.cancel()
+        queue = self._queues[waiter.priority]
+        waiters = queue.get(waiter.tenant)
+        if waiters is None or waiter not in waiters:
+            return
+        waiters.remove(waiter)
+        if not waiters:
+            del queue[waiter.tenant]
+        self._depth[waiter.priority] -= 1
+        ADMISSION_QUEUE_DEPTH.set(self._depth[waiter.priority], priority=waiter.priority)
+
+    def _release(self, ticket: Optional[Ticket]):
+        saturated = self.in_flight >= self.limit.capacity
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.set(self.in_flight)
+        if ticket is not None:
+            now = time.monotonic()
+            self.hold_time += (now - ticket.started - self.hold_time) * 0.1
+            if ticket.overloaded:
+                self.limit.on_overload(ticket.started)
+            else:
+                latency = (ticket.first_token_at or now) - ticket.started
+                self.limit.on_success(ticket.operation, latency, ticket.started, saturated or self._queued() > 0)
+        self._dispatch()
+
+    def _dispatch(self):
+        while self.in_flight < self.limit.capacity:
+            waiter = self._next()
+            if waiter is None:
+                return
+            if waiter.future.done():
+                continue
+            self._grant()
+            waiter.future.set_result(None)
+
+    def _next(self) -> Optional[_Waiter]:
+        interactive, batch = self._queues[INTERACTIVE], self._queues[BATCH]
+        if interactive and not (batch and self._interactive_run >= self.interactive_share):
+            priority = INTERACTIVE
+            self._interactive_run += 1
+        elif batch:
+            priority = BATCH
+            self._interactive_run = 0
+        else:
+            return None
+        queue = self._queues[priority]
+        tenant, waiters = next(iter(queue.items()))
+        waiter = waiters.popleft()
+        if waiters:
+            queue.move_to_end(tenant)
+        else:
+            del queue[tenant]
+        self._depth[priority] -= 1
+        ADMISSION_QUEUE_DEPTH.set(self._depth[priority], priority=priority)
+        return waiter
+
+    def stats(self) -> dict:
+        return {
+            "limit": round(self.limit.value, 2),
+            "in_flight": self.in_flight,
+            "queued": dict(self._depth),
+            "queued_by_tenant": {
+                priority: {tenant: len(waiters) for tenant, waiters in queue.items()}
+                for priority, queue in self._queues.items()
+            },
+            "latency_ms": {
+                operation: {"recent": round(recent * 1000, 1), "baseline": round(baseline * 1000, 1)}
+                for operation, (recent, baseline, _) in self.limit.latencies.items()
+            },
+            "hold_time_ms": round(self.hold_time * 1000, 1),
+            "max_wait_s": self.max_wait,
+        }
@@ -1,37 +1,143 @@
 # backend/app.py
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from fastapi import APIRouter, Depends, FastAPI, File, UploadFile, Form, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
-from typing import List, Optional
+from starlette.datastructures import MutableHeaders
+from typing import Any, Callable, List, Optional
+from contextlib import asynccontextmanager
+import asyncio
+import fcntl
+import hmac
 import os
+import time
 import uuid
-import requests
+import httpx
 import json
-from pathlib import Path
 from dotenv import load_dotenv
 
-
-# Load environment variables from .env file
+# Load environment variables from .env file before the modules below: several
+# of them (html_extract, structured_data, script_variants, prompts) read their
+# settings into constants when they're imported
 load_dotenv()
-app = FastAPI(title="Video Generator API", version="1.0.0")
-
-get_product_details_tool = {
-    "type": "function",
-    "function": {
-        "name": "get_product_details",
-        "description": "Retrieve the product details from the url, and key features as well as a few product images to be used",
-        "parameters": {
-            "properties": {
-                "url": {
-                    "type": "string",
-                    "description": "The url of the product page"
-                }
-            },
-            "required": ["url"]
-        }
-    }
-}
+
+from http_client import get_http_client, close_http_client
+from admission import BATCH, AdmissionController, set_request_class, tenant_for
+from cache import ProductDetailsCache, ScriptCache, SingleFlight
+from sse import SSEParser, format_sse
+from llm_output import IncrementalJSONParser, completion_text, loads_lenient, validate
+from images import MEDIA_TYPES, ImagePipeline
+from html_extract import extract_page, PageExtract, DEFAULT_MAX_BYTES, DEFAULT_TOKEN_BUDGET
+from prompts import get_prompts
+from tokens import estimate_tokens, fit_items, truncate_to_tokens
+from structured_data import extract_structured_product, merge_product_details
+from collections import Counter
+from jobs import JobStore, VideoJobQueue, QueueClosedError, QueueFullError, TERMINAL_STATUSES, new_job
+from storage import Storage
+from campaigns import CampaignPipeline, CampaignRequest
+from script_variants import ScriptVariantsRequest, generate_variants, plan_variants, rank_variants
+from tracking import ProductTracker
+from uploads import UploadSizeLimit, UploadStore
+from upstream import Upstream
+from video_status import StatusBroker, VideoStatusReconciler, apply_status_update, is_terminal, tavus_fields
+from instrumentation import (
+    LLM_PROMPT_TOKENS, REQUEST_DURATION, StreamTimer, configure_logging, end_trace, registry, span, start_trace
+)
+
+
+logger = configure_logging()
+
+# Snapshots of counters kept elsewhere, refreshed on each scrape
+PRODUCT_CACHE_EVENTS = registry.gauge(
+    "product_cache_events", "Product details cache hits/misses/evictions since start", ("level", "event"))
+EXTRACTION_PATHS = registry.gauge(
+    "product_extraction_paths", "Product extractions by path (cache, structured, llm) since start", ("path",))
+VIDEO_QUEUE_DEPTH = registry.gauge("video_job_queue_depth", "Video jobs waiting for a worker")
+SCRIPT_REQUESTS = registry.gauge(
+    "script_requests", "Script requests by how they were answered (cache, coalesced, llm) since start", ("source",))
+
+
+async def purge_old_records(storage: Storage):
+    """Apply the storage retention policy every STORAGE_PURGE_INTERVAL seconds"""
+    retention = float(os.environ.get("STORAGE_RETENTION_DAYS", 30)) * 24 * 3600
+    max_records = int(os.environ["STORAGE_MAX_RECORDS"]) if os.environ.get("STORAGE_MAX_RECORDS") else None
+    interval = float(os.environ.get("STORAGE_PURGE_INTERVAL", 3600))
+    while True:
+        try:
+            # Videos still generating are kept however old they are
+            deleted = await storage.purge(retention, max_records, video_statuses=TERMINAL_STATUSES)
+            logger.info("storage purge", extra={"fields": {"deleted": deleted}})
+        except Exception:
+            logger.exception("storage purge failed")
+        await asyncio.sleep(interval)
+
+
+class TraceRequests:
+    """
+    ASGI middleware timing every request, collecting its pipeline spans and
+    emitting one access log line. The request is finished when the last body
+    chunk is sent, so streamed responses are timed (and their spans logged)
+    through the end of the stream rather than up to their headers.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        trace, token = start_trace(scope["method"], scope["path"])
+        started = time.perf_counter()
+        status = 500
+        finished = False
+
+        def finish():
+            nonlocal finished
+            if finished:
+                return
+            finished = True
+            elapsed = time.perf_counter() - started
+            route = scope.get("route")
+            REQUEST_DURATION.observe(
+                elapsed,
+                method=scope["method"],
+                route=route.path if route else "unmatched",
+                status=status
+            )
+            logger.info("request", extra={"fields": {
+                "method": scope["method"],
+                "path": scope["path"],
+                "status": status,
+                "ms": round(elapsed * 1000, 1),
+                "spans": trace["spans"],
+            }})
+
+        async def traced_send(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                MutableHeaders(scope=message).append("X-Request-ID", trace["request_id"])
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                finish()
+
+        try:
+            await self.app(scope, receive, traced_send)
+        finally:
+            # Errors and client disconnects end the request without a last chunk
+            finish()
+            end_trace(token)
+
+
+async def classify_requests(request: Request, call_next):
+    """Tag the request's LLM calls with its tenant and priority class for admission control"""
+    set_request_class(
+        tenant=tenant_for(request.headers.get("x-tenant-id"), request.headers.get("x-api-key"),
+                          request.client.host if request.client else None),
+        priority=request.headers.get("x-priority"),
+    )
+    return await call_next(request)
 
 product_details_schema = {
 	"schema": {
@@ -66,116 +172,99 @@ product_details_schema = {
 		"type": "object"
 	}
 }
+# Unparseable output is kept as the description, cut to this many tokens
+UNPARSED_DESCRIPTION_TOKENS = 300
+
+
+def empty_product_details(status: str) -> dict:
+    return {
+        "product_description": "",
+        "key_features": [],
+        "target_audience": "",
+        "product_images": [],
+        "status": status
+    }
+
+
+def normalize_product_details(data: dict) -> dict:
+    """Coerce parsed output to the shapes the API returns: strings, and lists of strings"""
+    details = dict(data)
+    for name in ("key_features", "product_images"):
+        value = details.get(name) or []
+        if isinstance(value, str):
+            value = [line.strip(" -*\t") for line in value.splitlines()]
+        details[name] = [str(item) for item in value if item not in (None, "")] if isinstance(value, list) else []
+    for name in ("product_description", "target_audience", "status"):
+        value = details.get(name)
+        details[name] = "" if value is None else value if isinstance(value, str) else json.dumps(value)
+    details["status"] = details["status"] or "completed"
+    return details
+
+
+def parse_product_details_text(text: Optional[str]) -> dict:
+    """Product details from completion text, repairing malformed JSON before giving up on it"""
+    if not text:
+        return empty_product_details("error")
+    try:
+        data, repaired = loads_lenient(text)
+    except ValueError as e:
+        logger.warning("unparseable product details output", extra={"fields": {"error": str(e), "chars": len(text)}})
+        details = empty_product_details("unknown")
+        details["product_description"] = truncate_to_tokens(text.strip(), UNPARSED_DESCRIPTION_TOKENS)
+        return details
+    if not isinstance(data, dict):
+        logger.warning("product details output is not an object", extra={"fields": {"type": type(data).__name__}})
+        return empty_product_details("unknown")
+    errors = validate(data, product_details_schema["schema"])
+    if repaired or errors:
+        logger.info("product details output needed fixing", extra={"fields": {"repaired": repaired, "errors": errors[:5]}})
+    return normalize_product_details(data)
+
+
 def parse_llama_product_details_response(result):
     """
     Parse LLAMA API response with the new response structure
     """
-    try:
-        # Check if we have the expected structure
-        if 'completion_message' in result:
-            completion_message = result['completion_message']
-            
-            # Check if content exists and has the expected structure
-            if 'content' in completion_message and completion_message['content']:
-                content = completion_message['content']
-                
-                # Handle both text type and direct string content
-                if isinstance(content, dict) and 'text' in content:
-                    text_content = content['text']
-                elif isinstance(content, str):
-                    text_content = content
-                else:
-                    text_content = str(content)
-                
-                # Try to parse the text content as JSON
-                try:
-                    parsed_data = json.loads(text_content)
-                    return parsed_data
-                except json.JSONDecodeError:
-                    # If not valid JSON, create a basic response with the content
-                    return {
-                        "product_description": text_content[:500] if text_content else "",
-                        "key_features": [],
-                        "target_audience": "",
-                        "product_images": [],
-                        "status": "unknown"
-                    }
-        
-        # Fallback: If the structure doesn't match, return empty response
-        return {
-            "product_description": "",
-            "key_features": [],
-            "target_audience": "",
-            "product_images": [],
-            "status": "error"
-        }
-        
-    except Exception as e:
-        print(f"Error parsing LLAMA response: {e}")
-        return {
-            "product_description": "",
-            "key_features": [],
-            "target_audience": "",
-            "product_images": [],
-            "status": "error"
-        }
+    if not isinstance(result, dict):
+        return empty_product_details("error")
+    return parse_product_details_text(completion_text(result))
 
 
+async def fetch_page(url, max_bytes=DEFAULT_MAX_BYTES):
+    """Download at most max_bytes of a page and decode it"""
+    with span("page_fetch"):
+        async with get_http_client().stream("GET", url, timeout=10) as response:
+            response.raise_for_status()
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= max_bytes:
+                    break
+            encoding = response.charset_encoding or "utf-8"
+        return b"".join(chunks)[:max_bytes].decode(encoding, errors="replace")
 
-# Alternative simpler version with content cleaning for LLM parsing
-def simple_fetch_html(url):
-    """Simple version with HTML cleaning to reduce token usage for LLM"""
+
+async def fetch_product_page(url) -> Optional[PageExtract]:
+    """Fetch a page and collect its product-relevant regions and markup"""
     try:
-        import re
-        from bs4 import BeautifulSoup
-        
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        
-        # Parse HTML with BeautifulSoup
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Remove unnecessary elements that don't contain useful content
-        for element in soup(['script', 'style', 'nav', 'header', 'footer', 
-                           'aside', 'iframe', 'noscript', 'form', 'button']):
-            element.decompose()
-        
-        # Remove elements with common non-content classes/ids
-        remove_selectors = [
-            '[class*="ad"]', '[id*="ad"]', '[class*="banner"]', 
-            '[class*="popup"]', '[class*="modal"]', '[class*="cookie"]',
-            '[class*="social"]', '[class*="share"]', '[class*="newsletter"]',
-            '[class*="sidebar"]', '[class*="menu"]', '[class*="navigation"]'
-        ]
-        
-        for selector in remove_selectors:
-            for element in soup.select(selector):
-                element.decompose()
-        
-        # Get clean text content
-        clean_text = soup.get_text(separator=' ', strip=True)
-        
-        # Clean up extra whitespace
-        clean_text = re.sub(r'\s+', ' ', clean_text)
-        clean_text = re.sub(r'\n\s*\n', '\n', clean_text)
-        
-        return clean_text.strip()
-        
-    except ImportError:
-        print("BeautifulSoup not installed. Install with: pip install beautifulsoup4")
-        return None
+        html = await fetch_page(url)
+
+        # Parsing is CPU bound, keep it off the event loop
+        with span("html_clean"):
+            return await asyncio.to_thread(extract_page, html)
+
     except Exception as e:
-        print(f"Error: {e}")
+        logger.warning("Error fetching product page %s: %s", url, e)
         return None
 
-# CORS middleware for React frontend
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000"],  # React dev server
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+
+# Alternative simpler version with content cleaning for LLM parsing
+async def simple_fetch_html(url, token_budget=DEFAULT_TOKEN_BUDGET):
+    """Fetch a page and reduce it to product-relevant text within a token budget"""
+    page = await fetch_product_page(url)
+    return page.render(token_budget) if page else None
 
 # Data models
 class ScriptGenerationRequest(BaseModel):
@@ -184,10 +273,13 @@ class ScriptGenerationRequest(BaseModel):
     customer_info: Optional[str] = None
     style: Optional[str] = "professional"
     additional_suggestions: Optional[str] = None
+    variant: Optional[int] = None
 
 class ScriptResponse(BaseModel):
     script: str
     status: str
+    variant: Optional[int] = None
+    cached: Optional[bool] = None
 
 class VideoGenerationRequest(BaseModel):
     script: str
@@ -196,8 +288,9 @@ class VideoGenerationRequest(BaseModel):
     replica_id: Optional[str] = ""
 
 class VideoResponse(BaseModel):
-    video_id: str
-    video_name: str
+    video_id: Optional[str] = None
+    job_id: Optional[str] = None
+    video_name: Optional[str] = None
     status: str
     hosted_url: Optional[str] = None
     created_at: Optional[str] = None
@@ -205,156 +298,354 @@ class VideoResponse(BaseModel):
 
 class ProductUrlRequest(BaseModel):
     url: str
+    bypass_cache: Optional[bool] = False
+    skip_structured_data: Optional[bool] = False
+    # Download product_images and return resized variants served by /api/images.
+    # Opt-in: it waits on image downloads and resizing, up to IMAGE_PIPELINE_TIMEOUT
+    process_images: Optional[bool] = False
 
 class ProductDetailsResponse(BaseModel):
     product_description: str
     key_features: List[str]
     target_audience: Optional[str] = None
     product_images: Optional[List[str]] = None
+    images: Optional[List[dict]] = None
     status: str
-
-# In-memory storage (replace with database later)
-generated_videos = {}
+    extraction_path: Optional[str] = None
 
 # Services
 class LlamaService:
-    def __init__(self):
+    def __init__(self, storage: Storage):
         self.api_key = os.environ.get('LLAMA_API_KEY')
         if not self.api_key:
             raise ValueError("LLAMA_API_KEY environment variable is not set")
         
-        self.base_url = "https://api.llama.com/v1"
+        self.base_url = os.environ.get("LLAMA_BASE_URL", "https://api.llama.com/v1")
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}"
         }
+        self.storage = storage
+        self.upstream = Upstream.from_env("llama")
+        # Adaptive concurrency limit and per-tenant fair queue in front of every completion
+        self.admission = AdmissionController.from_env("llama")
+        self.product_cache = ProductDetailsCache.from_env()
+        # How each extraction was answered: cache, structured, structured+llm or llm
+        self.extraction_paths = Counter()
+        self.script_cache = ScriptCache.from_env()
+        self.script_flights = SingleFlight()
+        # Script requests by source (cache, coalesced, llm) and the tokens not spent
+        self.script_stats = Counter()
+        # USD per million tokens, used to report what the script cache saved
+        self.input_cost_per_mtok = float(os.environ.get("LLAMA_INPUT_COST_PER_MTOK", 0.27))
+        self.output_cost_per_mtok = float(os.environ.get("LLAMA_OUTPUT_COST_PER_MTOK", 0.85))
+        # Templates from prompt/, compiled once; a missing or broken file fails startup
+        self.prompts = get_prompts()
+        # Token budgets for the user-supplied parts of the script prompt
+        self.description_token_budget = int(os.environ.get("SCRIPT_DESCRIPTION_TOKEN_BUDGET", 600))
+        self.features_token_budget = int(os.environ.get("SCRIPT_FEATURES_TOKEN_BUDGET", 300))
+        self.feature_token_budget = int(os.environ.get("SCRIPT_FEATURE_TOKEN_BUDGET", 40))
+        self.context_token_budget = int(os.environ.get("SCRIPT_CONTEXT_TOKEN_BUDGET", 200))
     
-    def extract_product_details(self, url: str) -> dict:
-        """Extract product details from a given URL using Llama API with tool calling"""
-        html_content = simple_fetch_html(url)
-        user_prompt = f"Get the product details from the page {html_content}"
-        print(user_prompt)
+    async def extract_product_details(self, url: str, use_cache: bool = True, use_structured_data: bool = True, on_field: Optional[Callable[[tuple, Any], None]] = None) -> dict:
+        """Extract product details from a given URL, reusing cached results for unchanged pages"""
+        page = await fetch_product_page(url)
+        return await self.extract_product_details_from_page(url, page, use_cache, use_structured_data, on_field)
+
+    async def extract_product_details_from_page(self, url: str, page: Optional[PageExtract], use_cache: bool = True, use_structured_data: bool = True, on_field: Optional[Callable[[tuple, Any], None]] = None) -> dict:
+        """
+        Extract product details from an already fetched page.
+
+        Schema.org/OpenGraph product markup is used directly when it covers the
+        required fields; otherwise the Llama completion fills the gaps. With
+        `on_field`, the completion is streamed and each field (and each list
+        item) is reported as soon as it parses.
+        """
+        if page is None:
+            details = await self._complete_product_details(None, on_field)
+            await self._save_extraction(url, details, "llm")
+            return self._record_path(details, "llm")
+
+        html_content = page.render()
+        cache_key = self.product_cache.key(url, html_content)
+        if use_cache:
+            cached = await self.product_cache.get(cache_key)
+            if cached is not None:
+                return self._record_path(dict(cached), "cache")
+
+        structured, missing, supplementary = extract_structured_product(page, url) if use_structured_data else (None, [], [])
+        if structured and not missing:
+            details, path = structured, "structured"
+        elif structured:
+            llm_details = await self._complete_product_details(html_content, on_field)
+            details, path = merge_product_details(structured, llm_details, missing, supplementary), "structured+llm"
+        else:
+            details, path = await self._complete_product_details(html_content, on_field), "llm"
+
+        if details.get("status") != "error":
+            await self.product_cache.set(cache_key, details)
+        await self._save_extraction(url, details, path)
+        return self._record_path(details, path)
+
+    async def _save_extraction(self, url: str, details: dict, path: str):
+        await self.storage.extractions.put({
+            "id": uuid.uuid4().hex,
+            "url": url,
+            "extraction_path": path,
+            "status": details.get("status"),
+            "details": details,
+            "created_at": time.time(),
+        })
+
+    def _record_path(self, details: dict, path: str) -> dict:
+        self.extraction_paths[path] += 1
+        details["extraction_path"] = path
+        return details
+
+    async def _complete_product_details(self, html_content: Optional[str], on_field: Optional[Callable[[tuple, Any], None]] = None) -> dict:
+        """Run the Llama JSON-schema completion over cleaned page text"""
+        messages = self.prompts.get("product_details").render(page=html_content or "")
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+        LLM_PROMPT_TOKENS.observe(prompt_tokens, operation="extract_product_details")
+        logger.debug("product details prompt", extra={"fields": {"prompt_tokens": prompt_tokens}})
         payload = {
             "model": "Llama-4-Maverick-17B-128E-Instruct-FP8",
-            "messages": [
-                {"role": "system", "content": "You are a helpful assistant that extracts product details from a given HTML page"},
-                {"role": "user", "content": user_prompt},
-            ],
+            "messages": messages,
             "response_format": {
                 "type": "json_schema",
                 "json_schema": product_details_schema,
             }
         }
+        if on_field is not None:
+            return await self._stream_product_details(payload, on_field)
 
         try:
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=self.headers,
-                json=payload
-            )
+            async with self.admission.slot("extract_product_details") as ticket:
+                with span("llm_call", "extract_product_details"):
+                    response = await self.upstream.post(
+                        f"{self.base_url}/chat/completions",
+                        headers=self.headers,
+                        json=payload
+                    )
+                if response.status_code == 429 or response.status_code >= 500:
+                    ticket.mark_overloaded()
             
             if response.status_code != 200:
                 raise HTTPException(status_code=response.status_code, detail=f"LLAMA API error: {response.text}")
             
-            result = response.json()
-            print(result)
-            # Extract the tool call result
-            parsed_result = parse_llama_product_details_response(result)
+            with span("response_parse", "extract_product_details"):
+                result = response.json()
+                # Extract the tool call result
+                parsed_result = parse_llama_product_details_response(result)
             return parsed_result
             
-        except requests.exceptions.RequestException as e:
+        except HTTPException:
+            raise
+        except httpx.HTTPError as e:
             raise HTTPException(status_code=500, detail=f"Error connecting to LLAMA API: {str(e)}")
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error extracting product details: {str(e)}")
+
+    async def _stream_product_details(self, payload: dict, on_field: Callable[[tuple, Any], None]) -> dict:
+        """Stream the JSON-schema completion, parsing it as it arrives and reporting each completed field"""
+        parser = IncrementalJSONParser(product_details_schema["schema"])
+        async for token in self._stream_completion(dict(payload, stream=True), operation="extract_product_details"):
+            for path, value in parser.feed(token):
+                on_field(path, value)
+        with span("response_parse", "extract_product_details"):
+            try:
+                data = parser.close()
+            except ValueError:
+                return parse_product_details_text(parser.text())
+        if not isinstance(data, dict):
+            return parse_product_details_text(parser.text())
+        if parser.repaired or parser.errors:
+            logger.info("product details output needed fixing", extra={"fields": {"repaired": parser.repaired, "errors": parser.errors[:5]}})
+        return normalize_product_details(data)
     
-    def generate_script(self, product_description: str, key_features: List[str], customer_info: str = None, style: str = "professional", additional_suggestions: str = None) -> str:
-        # Create a detailed prompt for script generation
-        features_text = "\n".join(f"- {feature}" for feature in key_features)
-        
-        system_prompt = """You are an expert marketing video script writer. Create engaging, persuasive video scripts that highlight product benefits and drive customer action. 
+    def _build_script_payload(self, product_description: str, key_features: List[str], customer_info: str = None, style: str = "professional", additional_suggestions: str = None, temperature: Optional[float] = None) -> dict:
+        # Trim user input to its token budgets so a pasted spec sheet can't blow up the prompt
+        features = fit_items(key_features, self.features_token_budget, self.feature_token_budget)
+        # The request model allows style: null
+        style = style or "professional"
+        template = self.prompts.get("script", style)
+        messages = template.render(
+            product_description=truncate_to_tokens(product_description, self.description_token_budget),
+            features_text="\n".join(f"- {feature}" for feature in features),
+            customer_info=truncate_to_tokens(customer_info, self.context_token_budget) if customer_info else "General consumers",
+            style=style,
+            additional_requirements=(
+                f"Additional Requirements: {truncate_to_tokens(additional_suggestions, self.context_token_budget)}"
+                if additional_suggestions else ""
+            ),
+        )
+        payload = {
+            "model": "Llama-4-Maverick-17B-128E-Instruct-FP8",
+            "messages": messages,
+            "stream": True
+        }
+        if temperature is not None:
+            payload["temperature"] = temperature
+        return payload
 
-Your scripts should:
-- Be conversational and engaging 
-- Highlight key product benefits
-- Include a strong call-to-action
-- Be appropriate for a 60-90 second video
-- Use the specified style and tone"""
+    async def stream_script(self, product_description: str, key_features: List[str], customer_info: str = None, style: str = "professional", additional_suggestions: str = None):
+        """Yield script tokens as the Llama API streams them; a cached script comes back as one token"""
+        payload = self._build_script_payload(product_description, key_features, customer_info, style, additional_suggestions)
+        key = self.script_cache.key(payload)
+        entry = await self.script_cache.get(key)
+        if entry:
+            self._record_script(payload, entry["scripts"][0], "cache")
+            yield entry["scripts"][0]
+            return
 
-        user_prompt = f"""You are a knowledgeable and enthusiastic product expert. Create a conversational and engaging talking points script for a marketing video about the following product:
+        tokens = []
+        async for token in self._stream_completion(payload):
+            tokens.append(token)
+            yield token
+        script = "".join(tokens).strip()
+        if script:
+            self._record_script(payload, script, "llm")
+            await self.store_script(key, script)
 
-Product Description: {product_description}
+    async def _stream_completion(self, payload: dict, operation: str = "generate_script"):
+        timer = StreamTimer(operation)
+        LLM_PROMPT_TOKENS.observe(
+            sum(estimate_tokens(message["content"]) for message in payload["messages"]), operation=operation)
+        try:
+            async with self.admission.slot(operation) as ticket:
+                # Time to first token is the upstream's, not time spent queued for a slot
+                timer.started = time.perf_counter()
+                with span("llm_call", operation):
+                    async with self.upstream.stream(
+                        "POST",
+                        f"{self.base_url}/chat/completions", 
+                        headers={
+                            "Content-Type": "application/json",
+                            "Authorization": f"Bearer {self.api_key}",
+                            "Accept": "text/event-stream"
+                        }, 
+                        json=payload
+                    ) as response:
+                        if response.status_code != 200:
+                            await response.aread()
+                            raise HTTPException(status_code=response.status_code, detail=f"LLAMA API error: {response.text}")
 
-Key Features:
-{features_text}
+                        async def events():
+                            parser = SSEParser()
+                            async for chunk in response.aiter_text():
+                                for event in parser.feed(chunk):
+                                    yield event
+                            # A last event with no blank line after it is only dispatched by flush
+                            for event in parser.flush():
+                                yield event
 
-Target Audience: {customer_info or "General consumers"}
+                        async for event in events():
+                            try:
+                                data = event.json()
+                            except json.JSONDecodeError:
+                                # Skip malformed JSON chunks
+                                continue
 
-Style: {style}
+                            if "event" in data:
+                                if data["event"]["event_type"] == "progress":
+                                    token = data["event"]["delta"]["text"]
+                                    timer.token(token)
+                                    ticket.first_token()
+                                    yield token
+                                elif data["event"]["event_type"] == "complete":
+                                    return
 
-{f"Additional Requirements: {additional_suggestions}" if additional_suggestions else ""}
+        except HTTPException:
+            raise
+        except httpx.HTTPError as e:
+            raise HTTPException(status_code=500, detail=f"Error connecting to LLAMA API: {str(e)}")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error streaming {operation}: {str(e)}")
+        finally:
+            timer.finish()
 
-Please generate a 60 second talking points conversation scripts that highlights the key benefits and features of the product. Use a friendly and approachable tone, and make sure the script is easy to follow and understand. Focus on the most important information and avoid using overly technical or promotional language.
+    async def generate_script(self, product_description: str, key_features: List[str], customer_info: str = None, style: str = "professional", additional_suggestions: str = None) -> str:
+        result = await self.get_script(product_description, key_features, customer_info, style, additional_suggestions)
+        return result["script"]
 
-The script should be written in a natural, conversational style, as if you were talking directly to the target audience. You can use storytelling techniques, examples, or anecdotes to make the product more relatable and interesting.
+    async def get_script(self, product_description: str, key_features: List[str], customer_info: str = None, style: str = "professional", additional_suggestions: str = None, variant: Optional[int] = None, temperature: Optional[float] = None) -> dict:
+        """
+        Script for the prompt, from the cache when possible.
 
-Please output a script that is concise, clear, and engaging, and that effectively communicates the value of the product to the target audience.
-Please do not include any time stamp in the script, introduction or things about the script, just the actual talking points.
-"""
+        `variant` asks for one of the alternative scripts kept per prompt: a
+        stored one is returned as is, a new index generates (and stores) a
+        fresh script until the variant limit is reached, after which they cycle.
+        Identical concurrent requests share one completion.
+        """
+        payload = self._build_script_payload(product_description, key_features, customer_info, style, additional_suggestions, temperature)
+        key = self.script_cache.key(payload)
+        entry = await self.script_cache.get(key)
+        scripts = entry["scripts"] if entry else []
 
-        payload = {
-            "model": "Llama-4-Maverick-17B-128E-Instruct-FP8",
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            "stream": True
-        }
+        index = variant or 0
+        if scripts and (index < len(scripts) or len(scripts) >= self.script_cache.variants):
+            index %= len(scripts)
+            self._record_script(payload, scripts[index], "cache")
+            return {"script": scripts[index], "variant": index, "cached": True}
 
-        try:
-            # Send the request
-            response = requests.post(
-                f"{self.base_url}/chat/completions", 
-                headers={
-                    "Content-Type": "application/json",
-                    "Authorization": f"Bearer {self.api_key}",
-                    "Accept": "text/event-stream"
-                }, 
-                json=payload,
-                stream=True
-            )
-            
-            if response.status_code != 200:
-                raise HTTPException(status_code=response.status_code, detail=f"LLAMA API error: {response.text}")
-            
-            # Collect and process the full response
-            full_response = ""
-            for chunk in response.iter_lines():
-                if chunk:
-                    try:
-                        # Decode the chunk and parse JSON
-                        # The first 6 characters are "data: ", so we skip them
-                        decoded_chunk = chunk.decode("utf-8")[6:]
-                        data = json.loads(decoded_chunk)
-                        
-                        if "event" in data:
-                            if data["event"]["event_type"] == "progress":
-                                token = data["event"]["delta"]["text"]
-                                full_response += token
-                            elif data["event"]["event_type"] == "complete":
-                                break
-                    except json.JSONDecodeError:
-                        # Skip malformed JSON chunks
-                        continue
-            
-            if not full_response.strip():
-                raise HTTPException(status_code=500, detail="No response received from LLAMA API")
-            
-            return full_response.strip()
-            
-        except requests.exceptions.RequestException as e:
-            raise HTTPException(status_code=500, detail=f"Error connecting to LLAMA API: {str(e)}")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error generating script: {str(e)}")
+        (script, index), shared = await self.script_flights.do(
+            f"{key}#{len(scripts)}", lambda: self._generate_variant(key, payload)
+        )
+        self._record_script(payload, script, "coalesced" if shared else "llm")
+        return {"script": script, "variant": index, "cached": shared}
+
+    async def _generate_variant(self, key: str, payload: dict) -> tuple:
+        # Collect tokens in a list and join once; += would copy the script per token
+        tokens = [token async for token in self._stream_completion(payload)]
+        script = "".join(tokens).strip()
+        if not script:
+            raise HTTPException(status_code=500, detail="No response received from LLAMA API")
+
+        return script, await self.store_script(key, script)
+
+    async def store_script(self, key: str, script: str) -> int:
+        """Add a script as a new variant of its prompt and return its index"""
+        entry = await self.script_cache.get(key) or {"scripts": []}
+        scripts = entry["scripts"]
+        if script not in scripts and len(scripts) < self.script_cache.variants:
+            scripts.append(script)
+            await self.script_cache.set(key, {"scripts": scripts})
+        variant = scripts.index(script) if script in scripts else len(scripts) - 1
+        await self.storage.scripts.put({
+            "id": uuid.uuid4().hex,
+            "prompt_hash": key,
+            "variant": variant,
+            "script": script,
+            "status": "completed",
+            "created_at": time.time(),
+        })
+        return variant
+
+    def _record_script(self, payload: dict, script: str, source: str):
+        self.script_stats[source] += 1
+        if source != "llm":
+            prompt = "".join(message["content"] for message in payload["messages"])
+            self.script_stats["input_tokens_saved"] += estimate_tokens(prompt)
+            self.script_stats["output_tokens_saved"] += estimate_tokens(script)
+
+    def script_cache_stats(self) -> dict:
+        stats = self.script_stats
+        requests = stats["cache"] + stats["coalesced"] + stats["llm"]
+        cost_saved = (
+            stats["input_tokens_saved"] * self.input_cost_per_mtok
+            + stats["output_tokens_saved"] * self.output_cost_per_mtok
+        ) / 1_000_000
+        return {
+            "requests": requests,
+            "cache_hits": stats["cache"],
+            "coalesced": stats["coalesced"],
+            "llm_calls": stats["llm"],
+            "hit_rate": round((stats["cache"] + stats["coalesced"]) / requests, 4) if requests else 0.0,
+            "tokens_saved": {"input": stats["input_tokens_saved"], "output": stats["output_tokens_saved"]},
+            "cost_saved_usd": round(cost_saved, 6),
+            "in_flight": len(self.script_flights),
+            "cache": self.script_cache.stats(),
+        }
 
 class VideoGenerationService:
     def __init__(self):
@@ -362,13 +653,22 @@ class VideoGenerationService:
         if not self.tavus_api_key:
             raise ValueError("TAVUS_API_KEY environment variable is not set")
         
-        self.tavus_url = "https://tavusapi.com/v2/videos"
+        self.tavus_url = os.environ.get("TAVUS_API_URL", "https://tavusapi.com/v2/videos")
         self.headers = {
             "x-api-key": self.tavus_api_key,
             "Content-Type": "application/json"
         }
+        # Public URL of /api/webhooks/tavus; when set Tavus pushes status changes to us
+        self.callback_url = os.environ.get("TAVUS_CALLBACK_URL")
+        self.webhook_secret = os.environ.get("TAVUS_WEBHOOK_SECRET")
+        # Creating a video is not idempotent: only retry when the request surely never landed
+        self.upstream = Upstream.from_env(
+            "tavus",
+            retry_statuses=frozenset([429, 502, 503, 504]),
+            retry_exceptions=(httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout),
+        )
     
-    def create_video(self, script: str, video_name="new video", background_url: str = "", replica_id: str = "") -> dict:
+    async def create_video(self, script: str, video_name="new video", background_url: str = "", replica_id: str = "") -> dict:
         """
         Create a video using Tavus API  
         
@@ -384,117 +684,460 @@ class VideoGenerationService:
         if not video_name:
             video_name = f"Generated_Video_{uuid.uuid4().hex[:8]}"
         
-        print("in create video")
         payload = {
             "background_url": '',
             "replica_id": 'rca8a38779a8',
             "script": script,
             "video_name": video_name
         }
+        if self.callback_url:
+            payload["callback_url"] = self.callback_url
+            if self.webhook_secret:
+                separator = "&" if "?" in self.callback_url else "?"
+                payload["callback_url"] += f"{separator}token={self.webhook_secret}"
         
         try:
-            response = requests.post(
-                self.tavus_url,
-                json=payload,
-                headers=self.headers
-            )
-            print(response.json())
+            with span("tavus_call", "create_video"):
+                response = await self.upstream.post(
+                    self.tavus_url,
+                    json=payload,
+                    headers=self.headers
+                )
             if response.status_code != 200:
                 raise HTTPException(
                     status_code=response.status_code, 
                     detail=f"Tavus API error: {response.text}"
                 )
             
-            return response.json()
+            with span("response_parse", "create_video"):
+                result = response.json()
+            logger.info("tavus video created", extra={"fields": {
+                "video_id": result.get("video_id"),
+                "status": result.get("status"),
+            }})
+            return result
             
-        except requests.exceptions.RequestException as e:
+        except HTTPException:
+            raise
+        except httpx.HTTPError as e:
             raise HTTPException(status_code=500, detail=f"Error connecting to Tavus API: {str(e)}")
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error generating video: {str(e)}")
 
-# Initialize services
-try:
-    llama_service = LlamaService()
-except ValueError as e:
-    print(f"Warning: {e}")
-    llama_service = None
+    async def get_video(self, video_id: str) -> dict:
+        """Current state of a video from the Tavus API"""
+        try:
+            with span("tavus_call", "get_video"):
+                response = await self.upstream.request("GET", f"{self.tavus_url}/{video_id}", headers=self.headers)
+            if response.status_code != 200:
+                raise HTTPException(
+                    status_code=response.status_code,
+                    detail=f"Tavus API error: {response.text}"
+                )
+            return response.json()
+        except HTTPException:
+            raise
+        except httpx.HTTPError as e:
+            raise HTTPException(status_code=500, detail=f"Error connecting to Tavus API: {str(e)}")
+
+class Services:
+    """
+    Everything a worker builds from its environment: the store, the Llama and
+    Tavus services, caches, the video job queue and the pipelines on top of
+    them. Nothing here is built at import; the app builds one instance on
+    startup (see services_for) and the lifespan starts and closes it.
+    """
+
+    def __init__(self, storage: Storage):
+        # Video jobs, scripts, product extractions and tracked URLs; DATA_DIR/video_api.db by default
+        self.storage = storage
+        # Flipped by the lifespan; /readyz reports not ready outside of it
+        self.ready = False
+        self.draining = False
+        self.started_at = time.time()
+        self._leader_lock = None
+        self._purge_task = None
+
+        try:
+            self.llama = LlamaService(storage)
+        except ValueError as e:
+            logger.warning(str(e))
+            self.llama = None
+        try:
+            self.video = VideoGenerationService()
+        except ValueError as e:
+            logger.warning(str(e))
+            self.video = None
 
-try:
-    video_service = VideoGenerationService()
-except ValueError as e:
-    print(f"Warning: {e}")
-    video_service = None
+        # Status changes are pushed to /api/videos/{video_id}/events subscribers
+        self.video_updates = StatusBroker()
+        # Video jobs are queued and submitted to Tavus by a background worker pool
+        self.video_jobs = VideoJobQueue.from_env(
+            JobStore(storage.videos), handler=self._create_video_job, on_update=self._video_updated)
+        # Polls Tavus for videos still in progress, as a fallback for missed webhooks
+        self.video_reconciler = VideoStatusReconciler.from_env(
+            self.video_jobs.store,
+            self.video_updates,
+            fetch_status=self.video.get_video,
+            webhooks_enabled=bool(self.video.callback_url),
+        ) if self.video else None
+
+        self.upload_store = UploadStore.from_env()
+        self.image_pipeline = ImagePipeline.from_env()
+        # Long enough for a page's images on a slow CDN; extraction is answered without them after that
+        self.image_pipeline_timeout = float(os.environ.get("IMAGE_PIPELINE_TIMEOUT", 15))
+
+        self.campaign_pipeline = CampaignPipeline(
+            fetch=fetch_product_page,
+            extract=lambda url, page: self.llama.extract_product_details_from_page(url, page),
+            write_script=lambda *args: self.llama.generate_script(*args),
+            create_video=self._create_campaign_video,
+        )
+        # Re-extracts tracked URLs only when their page meaningfully changed; driven by refresh.py
+        self.product_tracker = ProductTracker.from_env(
+            storage.tracked,
+            extract=lambda url, page: self.llama.extract_product_details_from_page(url, page),
+        )
+
+    @classmethod
+    def from_env(cls) -> "Services":
+        return cls(Storage.from_env())
+
+    def is_background_leader(self) -> bool:
+        """
+        With several workers sharing one STORAGE_DB only one of them runs the
+        status reconciler and the retention purge; the first to take the lock
+        file keeps it for its lifetime.
+        """
+        if self.storage.path is None:
+            return True
+        if self._leader_lock is None:
+            handle = open(f"{self.storage.path}.leader.lock", "w")
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self._leader_lock = handle
+            except BlockingIOError:
+                handle.close()
+                self._leader_lock = False
+        return bool(self._leader_lock)
+
+    def start(self):
+        """Open the shared upstream connection pool and job workers before taking traffic"""
+        get_http_client().open()
+        self.video_jobs.start()
+        if self.is_background_leader():
+            if self.video_reconciler:
+                # Pick up videos that were still generating when the last process stopped
+                self.video_reconciler.start()
+            self._purge_task = asyncio.create_task(purge_old_records(self.storage))
+        self.ready = True
+
+    async def close(self, drain_timeout: float):
+        """Finish queued video submissions, then release the stores, caches and connection pool"""
+        self.ready = False
+        self.draining = True
+        if self._purge_task:
+            self._purge_task.cancel()
+        if self.video_reconciler:
+            await self.video_reconciler.stop()
+        await self.video_jobs.stop(drain=True, timeout=drain_timeout)
+        logger.info("worker drained", extra={"fields": {"pid": os.getpid()}})
+        self.storage.close()
+        await close_http_client()
+        self.image_pipeline.close()
+        if self.llama:
+            self.llama.product_cache.close()
+            self.llama.script_cache.close()
+
+    async def _create_video_job(self, payload: dict) -> dict:
+        return await self.video.create_video(**payload)
+
+    def _video_updated(self, job: dict):
+        self.video_updates.publish(job)
+        if self.video_reconciler and job.get("video_id") and not is_terminal(job) and self.is_background_leader():
+            self.video_reconciler.start()
+            self.video_reconciler.notify()
+
+    async def _create_campaign_video(self, payload: dict) -> dict:
+        """Submit a campaign video directly and record it so /api/videos can find it"""
+        result = await self.video.create_video(**payload)
+        job = new_job(payload)
+        job.update(
+            video_id=result.get("video_id"),
+            video_name=result.get("video_name"),
+            status=result.get("status"),
+            hosted_url=result.get("hosted_url"),
+            created_at=result.get("created_at"),
+        )
+        await self.video_jobs.store.create(job)
+        self._video_updated(job)
+        return job
+
+
+def services_for(app: FastAPI) -> Services:
+    """
+    The app's services, built on first use: by the lifespan before the worker
+    takes traffic, or by the first request when the app is driven without
+    one (an ASGI test client).
+    """
+    services = getattr(app.state, "services", None)
+    if services is None:
+        services = app.state.services = Services.from_env()
+    return services
+
+
+def get_services(request: Request) -> Services:
+    return services_for(request.app)
+
+
+def require_llama_service(services: Services = Depends(get_services)) -> LlamaService:
+    if not services.llama:
+        raise HTTPException(status_code=500, detail="LLAMA API service not available. Please check LLAMA_API_KEY environment variable.")
+    return services.llama
+
+
+def require_video_service(services: Services = Depends(get_services)) -> VideoGenerationService:
+    if not services.video:
+        raise HTTPException(status_code=500, detail="Tavus API service not available. Please check TAVUS_API_KEY environment variable.")
+    return services.video
+
+
+IMAGE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+router = APIRouter()
 
 # Routes
-@app.get("/")
+@router.get("/")
 async def root():
     return {"message": "Video Generator API is running!"}
 
-@app.post("/api/extract-product-details", response_model=ProductDetailsResponse)
-async def extract_product_details(request: ProductUrlRequest):
-    if not llama_service:
-        raise HTTPException(status_code=500, detail="LLAMA API service not available. Please check LLAMA_API_KEY environment variable.")
-    
+@router.get("/healthz")
+async def liveness(services: Services = Depends(get_services)):
+    """Liveness: the event loop is serving requests"""
+    return {"status": "alive", "pid": os.getpid(), "uptime_s": round(time.time() - services.started_at, 1)}
+
+@router.get("/readyz")
+async def readiness(services: Services = Depends(get_services)):
+    """Readiness: started, not draining and the store answers; upstream circuits are reported but not required"""
+    checks = {"started": services.ready, "draining": services.draining}
+    try:
+        await asyncio.wait_for(services.storage.videos.get("readyz"), timeout=2)
+        checks["storage"] = True
+    except Exception:
+        checks["storage"] = False
+    checks["llama"] = services.llama.upstream.breaker.state if services.llama else "unconfigured"
+    checks["tavus"] = services.video.upstream.breaker.state if services.video else "unconfigured"
+
+    ready = checks["started"] and not checks["draining"] and checks["storage"]
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "pid": os.getpid(), "checks": checks}
+    )
+
+async def process_product_images(services: Services, details: dict, request: ProductUrlRequest) -> Optional[List[dict]]:
+    if not (request.process_images and details.get("product_images") and services.image_pipeline.available):
+        return None
+    try:
+        return await asyncio.wait_for(
+            services.image_pipeline.process_urls(details["product_images"], base_url=request.url),
+            timeout=services.image_pipeline_timeout,
+        )
+    except asyncio.TimeoutError:
+        logger.warning("image pipeline timed out for %s", request.url)
+        return None
+
+def product_details_response(details: dict, images: Optional[List[dict]]) -> ProductDetailsResponse:
+    return ProductDetailsResponse(
+        product_description=details.get("product_description", ""),
+        key_features=details.get("key_features", []),
+        target_audience=details.get("target_audience", ""),
+        product_images=details.get("product_images", []),
+        images=images,
+        status="completed",
+        extraction_path=details.get("extraction_path")
+    )
+
+@router.post("/api/extract-product-details", response_model=ProductDetailsResponse)
+async def extract_product_details(
+    request: ProductUrlRequest,
+    llama_service: LlamaService = Depends(require_llama_service),
+    services: Services = Depends(get_services),
+):
     try:
         # Extract product details using Llama service
-        details = llama_service.extract_product_details(request.url)
-        
-        return ProductDetailsResponse(
-            product_description=details.get("product_description", ""),
-            key_features=details.get("key_features", []),
-            target_audience=details.get("target_audience", ""),
-            product_images=details.get("product_images", []),
-            status="completed"
+        details = await llama_service.extract_product_details(
+            request.url,
+            use_cache=not request.bypass_cache,
+            use_structured_data=not request.skip_structured_data
         )
+        images = await process_product_images(services, details, request)
+        return product_details_response(details, images)
     
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
-@app.post("/api/upload-images")
-async def upload_images(files: List[UploadFile] = File(...)):
-    uploaded_files = []
-    upload_dir = Path("uploads")
-    upload_dir.mkdir(exist_ok=True)
-    
+@router.post("/api/extract-product-details/stream")
+async def extract_product_details_stream(
+    request: ProductUrlRequest,
+    llama_service: LlamaService = Depends(require_llama_service),
+    services: Services = Depends(get_services),
+):
+    """
+    Stream a product extraction as server-sent events: a `field` event for
+    each field, key feature and image URL as soon as the LLM output parses,
+    then `done` with the same body as /api/extract-product-details. Cache and
+    page markup hits go straight to `done`.
+    """
+    fields: asyncio.Queue = asyncio.Queue()
+
+    async def extract():
+        try:
+            details = await llama_service.extract_product_details(
+                request.url,
+                use_cache=not request.bypass_cache,
+                use_structured_data=not request.skip_structured_data,
+                on_field=lambda path, value: fields.put_nowait({"path": list(path), "value": value})
+            )
+            images = await process_product_images(services, details, request)
+            return product_details_response(details, images)
+        finally:
+            await fields.put(None)
+
+    task = asyncio.create_task(extract())
+    # Wait for the first field so failures before any output are a normal HTTP error
+    first = await fields.get()
+    if first is None:
+        try:
+            task.result()
+        except HTTPException:
+            raise
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
+
+    async def events():
+        try:
+            field = first
+            while field is not None:
+                yield format_sse(field, event="field")
+                field = await fields.get()
+            try:
+                result = await task
+            except HTTPException as e:
+                yield format_sse({"detail": e.detail}, event="error")
+                return
+            except Exception as e:
+                yield format_sse({"detail": f"Unexpected error: {str(e)}"}, event="error")
+                return
+            yield format_sse(result.model_dump(), event="done")
+        finally:
+            task.cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/metrics")
+async def metrics(services: Services = Depends(get_services)):
+    """Prometheus scrape endpoint"""
+    llama_service = services.llama
+    if llama_service:
+        for level, counters in llama_service.product_cache.stats().items():
+            for name in ("hits", "misses", "evictions"):
+                PRODUCT_CACHE_EVENTS.set(counters[name], level=level, event=name)
+        for path, count in llama_service.extraction_paths.items():
+            EXTRACTION_PATHS.set(count, path=path)
+        for source in ("cache", "coalesced", "llm"):
+            SCRIPT_REQUESTS.set(llama_service.script_stats[source], source=source)
+    VIDEO_QUEUE_DEPTH.set(services.video_jobs.depth())
+    return PlainTextResponse(registry.expose(), media_type="text/plain; version=0.0.4")
+
+@router.get("/api/cache/stats")
+async def cache_stats(llama_service: LlamaService = Depends(require_llama_service)):
+    return llama_service.product_cache.stats()
+
+@router.get("/api/extraction/stats")
+async def extraction_stats(llama_service: LlamaService = Depends(require_llama_service)):
+    """How many product extractions were answered from cache, page markup or the LLM"""
+    paths = dict(llama_service.extraction_paths)
+    total = sum(paths.values())
+    llm_calls = paths.get("llm", 0) + paths.get("structured+llm", 0)
+    return {
+        "paths": paths,
+        "total": total,
+        "llm_calls": llm_calls,
+        "llm_calls_avoided": total - llm_calls,
+    }
+
+@router.get("/api/admission/stats")
+async def admission_stats(llama_service: LlamaService = Depends(require_llama_service)):
+    """Adaptive LLM concurrency limit, calls in flight and queued calls per priority and tenant"""
+    return llama_service.admission.stats()
+
+@router.get("/api/scripts/stats")
+async def script_stats(llama_service: LlamaService = Depends(require_llama_service)):
+    """Script cache hit rate, coalesced duplicates and the estimated LLM spend they avoided"""
+    return llama_service.script_cache_stats()
+
+@router.post("/api/upload-images")
+async def upload_images(files: List[UploadFile] = File(...), services: Services = Depends(get_services)):
     for file in files:
-        if not file.content_type.startswith("image/"):
+        if not (file.content_type or "").startswith("image/"):
             raise HTTPException(status_code=400, detail=f"File {file.filename} is not an image")
-        
-        file_id = str(uuid.uuid4())
-        file_path = upload_dir / f"{file_id}_{file.filename}"
-        
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
-        
-        uploaded_files.append({
-            "id": file_id,
-            "filename": file.filename,
-            "path": str(file_path)
-        })
-    
+
+    # Files are streamed to disk in chunks, in parallel, and stored once per content hash
+    uploaded_files = await services.upload_store.save_all(files)
+    if services.image_pipeline.available:
+        processed = await services.image_pipeline.process_files((info["id"], info["path"]) for info in uploaded_files)
+        for info, image in zip(uploaded_files, processed):
+            info["image"] = image
+
     return {"uploaded_files": uploaded_files}
 
-@app.post("/api/generate-script", response_model=ScriptResponse)
-async def generate_script(request: ScriptGenerationRequest):
-    if not llama_service:
-        raise HTTPException(status_code=500, detail="LLAMA API service not available. Please check LLAMA_API_KEY environment variable.")
-    
+@router.get("/api/images/{image_id}")
+async def get_image(image_id: str, services: Services = Depends(get_services)):
+    """Sizes and variant URLs of a processed image"""
+    if services.image_pipeline.store.file(image_id, "original") is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return services.image_pipeline.describe(image_id)
+
+@router.get("/api/images/{image_id}/{variant}")
+async def get_image_variant(image_id: str, variant: str, request: Request, services: Services = Depends(get_services)):
+    """
+    One variant (thumb, display, background or original) of a processed image.
+    Content never changes for an id, so clients and CDNs may cache it forever.
+    """
+    found = services.image_pipeline.store.file(image_id, variant)
+    if found is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    path, _ = found
+    etag = f'"{image_id[:16]}-{variant}"'
+    headers = {"Cache-Control": IMAGE_CACHE_CONTROL, "ETag": etag}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(path, media_type=MEDIA_TYPES.get(path.suffix, "application/octet-stream"), headers=headers)
+
+@router.post("/api/generate-script", response_model=ScriptResponse)
+async def generate_script(request: ScriptGenerationRequest, llama_service: LlamaService = Depends(require_llama_service)):
     try:
-        # Generate script using Llama service
-        script = llama_service.generate_script(
+        # Generate script using Llama service, reusing cached or in-flight scripts for the same prompt
+        result = await llama_service.get_script(
             request.product_description,
             request.key_features,
             request.customer_info,
             request.style,
-            request.additional_suggestions
+            request.additional_suggestions,
+            variant=request.variant
         )
         
         return ScriptResponse(
-            script=script,
-            status="completed"
+            script=result["script"],
+            status="completed",
+            variant=result["variant"],
+            cached=result["cached"]
         )
     
     except HTTPException:
@@ -502,55 +1145,301 @@ async def generate_script(request: ScriptGenerationRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
-@app.post("/api/generate-video", response_model=VideoResponse)
-async def generate_video(request: VideoGenerationRequest):
-    if not video_service:
-        raise HTTPException(status_code=500, detail="Tavus API service not available. Please check TAVUS_API_KEY environment variable.")
-    
+@router.post("/api/generate-script/stream")
+async def generate_script_stream(request: ScriptGenerationRequest, llama_service: LlamaService = Depends(require_llama_service)):
+    """Stream script tokens as server-sent events while the Llama completion runs"""
+    started = time.perf_counter()
+    tokens = llama_service.stream_script(
+        request.product_description,
+        request.key_features,
+        request.customer_info,
+        request.style,
+        request.additional_suggestions
+    )
+
+    # Wait for the first token before answering so upstream failures surface as a normal HTTP error
     try:
-        print(request.script)
-        # Generate video using Tavus API
-        tavus_response = video_service.create_video(
-            script=request.script,
-            video_name=request.video_name or "new video",
-            background_url=request.background_url or "",
-            replica_id=request.replica_id or ""
+        first_token = await tokens.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(status_code=500, detail="No response received from LLAMA API")
+    ttft_ms = (time.perf_counter() - started) * 1000
+
+    async def events():
+        script = [first_token]
+        yield format_sse({"text": first_token}, event="token")
+        try:
+            async for token in tokens:
+                script.append(token)
+                yield format_sse({"text": token}, event="token")
+        except HTTPException as e:
+            yield format_sse({"detail": e.detail}, event="error")
+            return
+        yield format_sse({
+            "script": "".join(script).strip(),
+            "status": "completed",
+            "ttft_ms": round(ttft_ms, 1),
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
+        }, event="done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/api/generate-script/variants")
+async def generate_script_variants(request: ScriptVariantsRequest, llama_service: LlamaService = Depends(require_llama_service)):
+    """
+    Generate several scripts for one product concurrently, one per style or
+    temperature. Streams a `variant` SSE event per script as it completes and
+    a final `done` event with the (optionally ranked) list; with stream=false
+    the list is returned as JSON.
+    """
+    variants = plan_variants(request)
+    key_features = request.key_features if request.rank else None
+
+    def generate(variant: dict):
+        return llama_service.get_script(
+            request.product_description,
+            request.key_features,
+            request.customer_info,
+            variant["style"],
+            request.additional_suggestions,
+            temperature=variant["temperature"]
         )
-        print(tavus_response)
-        # Store the result with Tavus response data
-        video_id = tavus_response.get("video_id")
-        generated_videos[video_id] = {
-            "script": request.script,
-            "video_id": video_id,
-            "video_name": tavus_response.get("video_name"),
-            "status": tavus_response.get("status"),
-            "hosted_url": tavus_response.get("hosted_url"),
-            "created_at": tavus_response.get("created_at")
+
+    def summary(results: List[dict], started: float) -> dict:
+        results = rank_variants(results) if request.rank else sorted(results, key=lambda r: r["index"])
+        return {
+            "variants": results,
+            "best": results[0] if request.rank and results[0]["status"] == "completed" else None,
+            "total_ms": round((time.perf_counter() - started) * 1000, 1),
         }
-        
+
+    if not request.stream:
+        started = time.perf_counter()
+        results = [result async for result in generate_variants(variants, generate, key_features)]
+        return summary(results, started)
+
+    async def events():
+        started = time.perf_counter()
+        results = []
+        async for result in generate_variants(variants, generate, key_features):
+            results.append(result)
+            yield format_sse(result, event="variant")
+        yield format_sse(summary(results, started), event="done")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/api/generate-video", response_model=VideoResponse)
+async def generate_video(
+    request: VideoGenerationRequest,
+    video_service: VideoGenerationService = Depends(require_video_service),
+    services: Services = Depends(get_services),
+):
+    try:
+        # Queue the Tavus call; poll /api/videos/{job_id} for the result
+        job = await services.video_jobs.submit({
+            "script": request.script,
+            "video_name": request.video_name or "new video",
+            "background_url": request.background_url or "",
+            "replica_id": request.replica_id or ""
+        })
+
         return VideoResponse(
-            video_id=video_id,
-            video_name=tavus_response.get("video_name"),
-            status=tavus_response.get("status"),
-            hosted_url=tavus_response.get("hosted_url"),
-            created_at=tavus_response.get("created_at"),
+            video_id=job["video_id"],
+            job_id=job["job_id"],
+            video_name=job["video_name"],
+            status=job["status"],
             script=request.script
         )
-    
+
+    except QueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "5"})
+    except QueueClosedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Unexpected error: {str(e)}")
 
-@app.get("/api/videos/{video_id}")
-async def get_video_status(video_id: str):
-    if video_id not in generated_videos:
+@router.post("/api/campaigns")
+async def run_campaign(
+    request: CampaignRequest,
+    llama_service: LlamaService = Depends(require_llama_service),
+    services: Services = Depends(get_services),
+):
+    """Run a batch of product URLs through the whole pipeline, streaming NDJSON results per item"""
+    if request.create_videos and not services.video:
+        raise HTTPException(status_code=500, detail="Tavus API service not available. Please check TAVUS_API_KEY environment variable.")
+
+    max_items = int(os.environ.get("CAMPAIGN_MAX_ITEMS", 500))
+    if not request.items:
+        raise HTTPException(status_code=400, detail="Campaign has no items")
+    if len(request.items) > max_items:
+        raise HTTPException(status_code=413, detail=f"Campaign has {len(request.items)} items, the limit is {max_items}")
+
+    # Campaigns are bulk work: their LLM calls queue behind interactive requests
+    set_request_class(priority=BATCH)
+
+    async def results():
+        started = time.perf_counter()
+        failed = 0
+        async for result in services.campaign_pipeline.run(request):
+            failed += result["status"] == "failed"
+            yield json.dumps(result) + "\n"
+        yield json.dumps({"summary": {
+            "total": len(request.items),
+            "completed": len(request.items) - failed,
+            "failed": failed,
+            "elapsed_ms": round((time.perf_counter() - started) * 1000, 1),
+        }}) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+async def _page(repository_list, limit: int, cursor: Optional[str], **filters) -> dict:
+    """One page of records, newest first, with the cursor for the next page"""
+    if not 1 <= limit <= 200:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 200")
+    try:
+        items, next_cursor = await repository_list(limit=limit, cursor=cursor, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/api/videos")
+async def list_videos(status: Optional[str] = None, limit: int = 50, cursor: Optional[str] = None, services: Services = Depends(get_services)):
+    return await _page(services.video_jobs.store.list, limit, cursor, status=status)
+
+@router.get("/api/scripts")
+async def list_scripts(limit: int = 50, cursor: Optional[str] = None, services: Services = Depends(get_services)):
+    return await _page(services.storage.scripts.list, limit, cursor)
+
+@router.get("/api/extractions")
+async def list_extractions(status: Optional[str] = None, limit: int = 50, cursor: Optional[str] = None, services: Services = Depends(get_services)):
+    return await _page(services.storage.extractions.list, limit, cursor, status=status)
+
+@router.get("/api/tracked-urls")
+async def list_tracked_urls(status: Optional[str] = None, limit: int = 50, cursor: Optional[str] = None, services: Services = Depends(get_services)):
+    """Tracked product URLs with the outcome of their last refresh"""
+    return await _page(services.storage.tracked.list, limit, cursor, status=status)
+
+@router.get("/api/videos/{video_id}")
+async def get_video_status(video_id: str, services: Services = Depends(get_services)):
+    video = await services.video_jobs.store.lookup(video_id)
+    if video is None:
         raise HTTPException(status_code=404, detail="Video not found")
     
-    return generated_videos[video_id]
+    return video
+
+@router.get("/api/videos/{video_id}/events")
+async def video_status_events(video_id: str, request: Request, services: Services = Depends(get_services)):
+    """SSE stream of a video's record: the current state, then every change until it settles"""
+    video_jobs, video_updates = services.video_jobs, services.video_updates
+    if await video_jobs.store.lookup(video_id) is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    heartbeat = float(os.environ.get("VIDEO_EVENTS_HEARTBEAT", 15))
+
+    async def events():
+        with video_updates.subscribe(video_id) as updates:
+            # Read the snapshot after subscribing so no change can slip in between
+            video = await video_jobs.store.lookup(video_id)
+            if video is None:
+                return
+            yield format_sse(video, event="status")
+            while not is_terminal(video):
+                try:
+                    video = await asyncio.wait_for(updates.get(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    # Webhooks may land on another worker; catch up from the shared store
+                    latest = await video_jobs.store.lookup(video_id)
+                    if latest is not None and latest.get("updated_at") != video.get("updated_at"):
+                        video = latest
+                        yield format_sse(video, event="status")
+                    else:
+                        yield ": keep-alive\n\n"
+                    continue
+                yield format_sse(video, event="status")
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/api/webhooks/tavus")
+async def tavus_webhook(request: Request, token: Optional[str] = None, services: Services = Depends(get_services)):
+    """Tavus callback for video status changes"""
+    secret = services.video.webhook_secret if services.video else None
+    if secret and not hmac.compare_digest(token or "", secret):
+        raise HTTPException(status_code=401, detail="Invalid webhook token")
+
+    try:
+        body = await request.json()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Webhook body must be JSON")
+    video_id = body.get("video_id") if isinstance(body, dict) else None
+    if not video_id:
+        raise HTTPException(status_code=400, detail="Webhook body has no video_id")
+
+    video, changed = await apply_status_update(
+        services.video_jobs.store, services.video_updates, video_id, tavus_fields(body), source="webhook"
+    )
+    if video is None:
+        raise HTTPException(status_code=404, detail="Video not found")
+    logger.info("tavus webhook", extra={"fields": {
+        "video_id": video_id,
+        "status": video.get("status"),
+        "changed": changed,
+    }})
+    return {"video_id": video_id, "status": video.get("status"), "changed": changed}
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the services and start the connection pool and job workers before taking traffic
+    services = services_for(app)
+    services.start()
+    logger.info("worker ready", extra={"fields": {"pid": os.getpid(), "leader": services.is_background_leader()}})
+    yield
+
+    # Shutdown (SIGTERM): uvicorn has stopped accepting connections and waited
+    # for in-flight requests; finish queued video submissions before closing
+    await services.close(drain_timeout=float(os.environ.get("SHUTDOWN_DRAIN_TIMEOUT", 25)))
+
+
+def create_app() -> FastAPI:
+    """
+    The API with its middleware and routes. Building it opens nothing: the
+    store, caches and upstream services are created by the lifespan of the
+    worker that serves it.
+    """
+    app = FastAPI(title="Video Generator API", version="1.0.0", lifespan=lifespan)
+    app.add_middleware(TraceRequests)
+    app.middleware("http")(classify_requests)
+    # Turn away oversized uploads before Starlette spools the multipart body
+    app.add_middleware(UploadSizeLimit, paths=frozenset(["/api/upload-images"]))
+    # CORS middleware for React frontend
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["http://localhost:3000"],  # React dev server
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.include_router(router)
+    return app
+
+
+app = create_app()
 
 if __name__ == "__main__":
     import uvicorn
-    print("Starting server...")
-    print(f"Current directory: {os.getcwd()}")
+    # Development server with auto-reload; use server.py for production
+    logger.info("Starting server", extra={"fields": {"cwd": os.getcwd()}})
     uvicorn.run("app:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
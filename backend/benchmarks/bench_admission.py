@@ -0,0 +1,135 @@
+# backend/benchmarks/bench_admission.py
+"""
+Admission control benchmark: one tenant's bulk run against a few interactive
+users, all calling a simulated Llama upstream that serves `--capacity` calls
+at a time and queues the rest first come, first served (as a saturated
+provider does), answering 429 once more than `--upstream-queue` calls wait.
+
+Compares calling the upstream directly with going through the
+AdmissionController: interactive latency, bulk throughput, upstream 429s,
+fast 429s from the controller and where the adaptive limit settled.
+
+Usage (from backend/):
+    python benchmarks/bench_admission.py --bulk 600 --bulk-concurrency 120 --capacity 12
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import HTTPException
+
+from admission import BATCH, INTERACTIVE, AdmissionController, AdmissionRejected, AimdLimit, set_request_class
+
+
+class SimulatedUpstream:
+    def __init__(self, capacity: int, latency: float, max_queue: int):
+        self.slots = asyncio.Semaphore(capacity)
+        self.latency = latency
+        self.max_queue = max_queue
+        self.waiting = 0
+        self.throttled = 0
+
+    async def call(self):
+        if self.waiting >= self.max_queue:
+            self.throttled += 1
+            raise HTTPException(status_code=429, detail="rate limited")
+        self.waiting += 1
+        try:
+            await self.slots.acquire()
+        finally:
+            self.waiting -= 1
+        try:
+            await asyncio.sleep(self.latency * random.lognormvariate(0, 0.3))
+        finally:
+            self.slots.release()
+
+
+async def run(args, controller) -> dict:
+    upstream = SimulatedUpstream(args.capacity, args.latency, args.upstream_queue)
+    interactive, outcomes = [], {"bulk_ok": 0, "bulk_failed": 0, "interactive_failed": 0, "rejected": 0}
+    bulk_done = asyncio.Event()
+
+    async def call(operation: str):
+        if controller is None:
+            return await upstream.call()
+        async with controller.slot(operation):
+            await upstream.call()
+
+    pending = iter(range(args.bulk))
+
+    async def bulk_worker():
+        set_request_class(tenant="bulk", priority=BATCH)
+        for _ in pending:
+            try:
+                await call("extract_product_details")
+                outcomes["bulk_ok"] += 1
+            except AdmissionRejected:
+                outcomes["rejected"] += 1
+                # Honor the hint instead of hammering
+                await asyncio.sleep(0.5)
+            except HTTPException:
+                outcomes["bulk_failed"] += 1
+
+    async def user(n: int):
+        set_request_class(tenant=f"user-{n}", priority=INTERACTIVE)
+        while not bulk_done.is_set():
+            started = time.perf_counter()
+            try:
+                await call("generate_script")
+                interactive.append(time.perf_counter() - started)
+            except HTTPException:
+                outcomes["interactive_failed"] += 1
+            await asyncio.sleep(args.think_time * random.uniform(0.5, 1.5))
+
+    async def bulk():
+        await asyncio.gather(*(bulk_worker() for _ in range(args.bulk_concurrency)))
+        bulk_done.set()
+
+    started = time.perf_counter()
+    await asyncio.gather(bulk(), *(user(n) for n in range(args.users)))
+    elapsed = time.perf_counter() - started
+    interactive.sort()
+    return {
+        **outcomes,
+        "elapsed": elapsed,
+        "interactive_calls": len(interactive),
+        "interactive_p50": interactive[len(interactive) // 2] if interactive else 0.0,
+        "interactive_p95": interactive[int(len(interactive) * 0.95) - 1] if interactive else 0.0,
+        "upstream_429": upstream.throttled,
+        "limit": controller.limit.value if controller else None,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bulk", type=int, default=600, help="calls in the bulk run")
+    parser.add_argument("--bulk-concurrency", type=int, default=120)
+    parser.add_argument("--users", type=int, default=5, help="interactive users calling one at a time")
+    parser.add_argument("--think-time", type=float, default=0.2, help="pause between a user's calls, seconds")
+    parser.add_argument("--capacity", type=int, default=12, help="calls the upstream serves at once")
+    parser.add_argument("--upstream-queue", type=int, default=60, help="waiting calls before the upstream answers 429")
+    parser.add_argument("--latency", type=float, default=0.1, help="upstream service time, seconds")
+    args = parser.parse_args()
+
+    print(f"bulk run of {args.bulk} calls at concurrency {args.bulk_concurrency}, {args.users} interactive users; "
+          f"upstream serves {args.capacity} at a time in {args.latency * 1000:.0f} ms")
+    print(f"{'':<12} {'wall s':>7} {'bulk/s':>7} {'int p50 ms':>11} {'int p95 ms':>11} "
+          f"{'int failed':>11} {'bulk failed':>12} {'upstream 429':>13} {'fast 429':>9} {'limit':>6}")
+    for label, controller in (
+        ("direct", None),
+        ("admission", AdmissionController("llama", limit=AimdLimit(initial=16, maximum=64))),
+    ):
+        r = await run(args, controller)
+        limit = f"{r['limit']:6.1f}" if r["limit"] is not None else f"{'-':>6}"
+        print(f"{label:<12} {r['elapsed']:7.2f} {r['bulk_ok'] / r['elapsed']:7.1f} {r['interactive_p50'] * 1000:11.0f} "
+              f"{r['interactive_p95'] * 1000:11.0f} {r['interactive_failed']:11} {r['bulk_failed']:12} "
+              f"{r['upstream_429']:13} {r['rejected']:9} {limit}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
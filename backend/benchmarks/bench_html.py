@@ -0,0 +1,117 @@
+# backend/benchmarks/bench_html.py
+"""
+Micro-benchmark for page cleaning: the original BeautifulSoup cleaner versus
+the single-pass extractor in html_extract (stdlib and lxml drivers).
+
+Reports ms/page and estimated output tokens. Pass --corpus with a directory of
+saved product pages (*.html); without it a synthetic retail-style corpus is
+generated.
+
+Usage (from backend/):
+    python benchmarks/bench_html.py --corpus ~/saved-pages --repeat 5
+"""
+import argparse
+import random
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from html_extract import estimate_tokens, etree, extract_page
+
+
+def legacy_clean_html(html):
+    """The cleaner simple_fetch_html used before the single-pass extractor"""
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, 'html.parser')
+    for element in soup(['script', 'style', 'nav', 'header', 'footer',
+                         'aside', 'iframe', 'noscript', 'form', 'button']):
+        element.decompose()
+    remove_selectors = [
+        '[class*="ad"]', '[id*="ad"]', '[class*="banner"]',
+        '[class*="popup"]', '[class*="modal"]', '[class*="cookie"]',
+        '[class*="social"]', '[class*="share"]', '[class*="newsletter"]',
+        '[class*="sidebar"]', '[class*="menu"]', '[class*="navigation"]'
+    ]
+    for selector in remove_selectors:
+        for element in soup.select(selector):
+            element.decompose()
+    clean_text = soup.get_text(separator=' ', strip=True)
+    clean_text = re.sub(r'\s+', ' ', clean_text)
+    return clean_text.strip()
+
+
+WORDS = ("durable lightweight premium comfort design fabric battery wireless steel "
+         "warranty compact ergonomic waterproof adjustable portable quality").split()
+
+
+def synthetic_page(rng: random.Random, blocks: int) -> str:
+    """A retail-style page: nav, JSON-LD, product block, reviews, recommendations, footer"""
+    def sentence(n=12):
+        return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+    parts = ["<html><head><title>Acme Product</title>",
+             '<meta name="description" content="' + sentence() + '">',
+             '<script type="application/ld+json">{"@type":"Product","name":"Acme Product",'
+             '"offers":{"price":"49.99","priceCurrency":"USD"}}</script>',
+             "<script>" + "var x = 1;" * 500 + "</script><style>" + ".a{color:red}" * 500 + "</style>",
+             '</head><body><header class="site-header"><nav class="menu">' +
+             "".join(f"<a href='/c/{i}'>Category {i}</a>" for i in range(80)) + "</nav></header>",
+             '<div class="product"><h1>Acme Product</h1><span class="price">$49.99</span><ul>' +
+             "".join(f"<li>{sentence(6)}</li>" for _ in range(8)) + "</ul></div>"]
+    for i in range(blocks):
+        parts.append(f'<div class="review" id="review-{i}"><p>{sentence(40)}</p></div>')
+        if i % 10 == 0:
+            parts.append(f'<div class="ad-slot banner">{sentence()}</div>'
+                         f'<div class="recommendations"><ul>' +
+                         "".join(f"<li><a href='/p/{j}'>{sentence(4)}</a></li>" for j in range(12)) +
+                         "</ul></div>")
+    parts.append('<footer><div class="newsletter">' + sentence() + "</div></footer></body></html>")
+    return "".join(parts)
+
+
+def load_corpus(corpus):
+    if corpus:
+        return [(path.name, path.read_text(errors="replace")) for path in sorted(Path(corpus).glob("*.html"))]
+    rng = random.Random(7)
+    return [(f"synthetic-{blocks}", synthetic_page(rng, blocks)) for blocks in (50, 200, 800, 2000)]
+
+
+def measure(fn, html, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        output = fn(html)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), estimate_tokens(output)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", help="directory of saved *.html product pages")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--budget", type=int, default=6000, help="token budget for the new extractor")
+    args = parser.parse_args()
+
+    engines = [
+        ("legacy bs4", legacy_clean_html),
+        ("single-pass stdlib", lambda html: extract_page(html, use_lxml=False).render(args.budget)),
+    ]
+    if etree is not None:
+        engines.append(("single-pass lxml", lambda html: extract_page(html, use_lxml=True).render(args.budget)))
+
+    print(f"{'page':<22}{'KB':>8}  " + "".join(f"{name:>22}" for name, _ in engines))
+    for name, html in load_corpus(args.corpus):
+        cells = []
+        for _, fn in engines:
+            ms, tokens = measure(fn, html, args.repeat)
+            cells.append(f"{ms:9.1f} ms {tokens:7d} tok")
+        print(f"{name:<22}{len(html) / 1024:8.0f}  " + "".join(f"{cell:>22}" for cell in cells))
+
+
+if __name__ == "__main__":
+    main()
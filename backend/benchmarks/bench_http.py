@@ -0,0 +1,89 @@
+# backend/benchmarks/bench_http.py
+"""
+Load benchmark for outbound HTTP: blocking `requests` calls inside async routes
+versus the shared pooled async client, both against local stub servers.
+
+Usage (from backend/):
+    python benchmarks/bench_http.py --requests 200 --concurrency 50 --latency 0.05
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+import requests
+from fastapi import FastAPI
+
+from stubs import start_stub_server
+
+
+def build_blocking_app(base_url: str) -> FastAPI:
+    """The pre-async call pattern: synchronous requests.post inside an async route"""
+    legacy = FastAPI()
+
+    @legacy.post("/api/generate-video")
+    async def generate_video(body: dict):
+        response = requests.post(f"{base_url}/v2/videos", json=body, headers={"x-api-key": "bench"})
+        return response.json()
+
+    return legacy
+
+
+async def drive(app, path: str, body: dict, total: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        async def one():
+            async with semaphore:
+                response = await client.post(path, json=body)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        # The routes print request/response bodies; keep them out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            await asyncio.gather(*(one() for _ in range(total)))
+        return total / (time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub upstream latency in seconds")
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(latency=args.latency)
+    os.environ.update({
+        "LLAMA_API_KEY": "bench",
+        "TAVUS_API_KEY": "bench",
+        "LLAMA_BASE_URL": f"{base_url}/v1",
+        "TAVUS_API_URL": f"{base_url}/v2/videos",
+        "STORAGE_DB": ":memory:",
+    })
+    import app as app_module
+    from http_client import close_http_client
+
+    video_body = {"script": "Meet the Acme Trail Runner.", "video_name": "bench"}
+    script_body = {"product_description": "Trail shoe", "key_features": ["Grippy"], "style": "professional"}
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, upstream latency {args.latency * 1000:.0f} ms")
+    before = await drive(build_blocking_app(base_url), "/api/generate-video", video_body, args.requests, args.concurrency)
+    print(f"  generate-video  blocking requests : {before:8.1f} req/s")
+    after = await drive(app_module.app, "/api/generate-video", video_body, args.requests, args.concurrency)
+    print(f"  generate-video  pooled async      : {after:8.1f} req/s  ({after / before:.1f}x)")
+    streamed = await drive(app_module.app, "/api/generate-script", script_body, args.requests, args.concurrency)
+    print(f"  generate-script pooled async      : {streamed:8.1f} req/s")
+
+    await close_http_client()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
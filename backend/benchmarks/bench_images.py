@@ -0,0 +1,82 @@
+# backend/benchmarks/bench_images.py
+"""
+Benchmark for the product image pipeline against a stub image server that
+serves photo-sized (3000x2000) JPEGs.
+
+Reports, per configuration of fetch concurrency and process-pool size, the
+wall time to fetch and process a page's worth of images cold, the time for the
+same URLs once cached, and the bytes the frontend downloads for a thumbnail
+or display image compared with the original.
+
+Usage (from backend/):
+    python benchmarks/bench_images.py --images 12 --latency 0.15
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from http_client import close_http_client
+from images import ImagePipeline, ImageStore
+from stubs import product_image, start_stub_server
+
+
+async def run(urls, fetch_concurrency: int, process_workers: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        pipeline = ImagePipeline(ImageStore(directory), fetch_concurrency=fetch_concurrency, process_workers=process_workers)
+        try:
+            if process_workers:
+                # Start the worker processes outside the timed run
+                await asyncio.get_running_loop().run_in_executor(pipeline._pool(), time.sleep, 0)
+            started = time.perf_counter()
+            results = await pipeline.process_urls(urls)
+            cold = time.perf_counter() - started
+            started = time.perf_counter()
+            await pipeline.process_urls(urls)
+            warm = time.perf_counter() - started
+        finally:
+            pipeline.close()
+            await close_http_client()
+    failed = [r for r in results if "error" in r]
+    if failed:
+        raise RuntimeError(failed[0]["error"])
+    return {"cold": cold, "warm": warm, "results": results}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", type=int, default=12)
+    parser.add_argument("--latency", type=float, default=0.15, help="stub image server latency in seconds")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4],
+                        help="process pool sizes; 0 resizes in the default thread pool")
+    args = parser.parse_args()
+
+    stub, stub_url = start_stub_server(latency=args.latency)
+    urls = [f"{stub_url}/images/{i}.jpg" for i in range(args.images)]
+    # Render the stub's images up front so the first configuration doesn't pay for it
+    for i in range(args.images):
+        product_image(i % 16)
+    print(f"{args.images} images, {args.latency * 1000:.0f} ms server latency")
+    print(f"{'fetch':>6} {'pool':>5} {'cold s':>8} {'per image ms':>13} {'cached ms':>10}")
+    configs = [(1, 0)] + [(8, workers) for workers in args.workers]
+    for fetch_concurrency, workers in configs:
+        result = await run(urls, fetch_concurrency, workers)
+        print(f"{fetch_concurrency:>6} {workers or 'thr':>5} {result['cold']:8.2f} "
+              f"{result['cold'] / args.images * 1000:13.0f} {result['warm'] * 1000:10.1f}")
+
+    print("\nbytes per image (median)")
+    original = statistics.median(len(product_image(i % 16)) for i in range(args.images))
+    print(f"  {'original':<12}{original / 1024:8.0f} KB")
+    for variant in ("thumb", "display", "background"):
+        sizes = [r["variants"][variant]["bytes"] for r in result["results"]]
+        print(f"  {variant:<12}{statistics.median(sizes) / 1024:8.0f} KB  {statistics.median(sizes) / original:6.1%} of original")
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+# backend/benchmarks/bench_parse.py
+"""
+Parse time and peak memory for Llama outputs of growing size.
+
+For a product-details JSON document of each size, streamed as ~4-character
+tokens, compares:
+  * concat + loads: the old path, full_response += token then json.loads
+  * join + loads: tokens collected in a list, joined once, then json.loads
+  * incremental: IncrementalJSONParser fed token by token (fields come out
+    as they complete), then close()
+  * repair: the same document cut off mid-way and wrapped in a code fence,
+    through loads_lenient
+
+Peak memory is measured with tracemalloc in a separate, untimed run.
+
+Usage (from backend/):
+    python benchmarks/bench_parse.py --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app import product_details_schema
+from llm_output import IncrementalJSONParser, loads_lenient
+
+TOKEN_CHARS = 4
+
+
+def document(size: int) -> str:
+    """A product details document of about `size` characters, mostly features and a long description"""
+    features = []
+    feature = 'Feature with "quotes", commas, {braces} and an escaped \\\\ backslash'
+    description = "A lightweight trail running shoe with a grippy outsole. "
+    details = {
+        "product_description": description * max(1, size // (4 * len(description))),
+        "key_features": features,
+        "target_audience": "Trail runners",
+        "product_images": ["https://example.com/img/%d.jpg" % i for i in range(20)],
+        "status": "completed",
+    }
+    while len(json.dumps(details)) < size:
+        features.extend(f"{feature} #{len(features)}" for _ in range(max(1, size // 2000)))
+    return json.dumps(details)
+
+
+def tokens_of(text: str):
+    return [text[i:i + TOKEN_CHARS] for i in range(0, len(text), TOKEN_CHARS)]
+
+
+def concat_loads(tokens):
+    text = ""
+    for token in tokens:
+        text += token
+    return json.loads(text)
+
+
+def join_loads(tokens):
+    return json.loads("".join(tokens))
+
+
+def incremental(tokens):
+    parser = IncrementalJSONParser(product_details_schema["schema"])
+    fields = 0
+    for token in tokens:
+        fields += len(parser.feed(token))
+    return parser.close()
+
+
+def measure(fn, arg, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    fn(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'size':>10} {'tokens':>8}  {'method':<16} {'ms':>9} {'peak MB':>9}")
+    for size in args.sizes:
+        text = document(size)
+        tokens = tokens_of(text)
+        damaged = "```json\n" + text[: len(text) * 3 // 4]
+        expected = json.loads(text)
+        assert incremental(tokens) == expected
+        assert loads_lenient(damaged)[1]
+        for name, fn, arg in (
+            ("concat + loads", concat_loads, tokens),
+            ("join + loads", join_loads, tokens),
+            ("incremental", incremental, tokens),
+            ("repair", loads_lenient, damaged),
+        ):
+            elapsed, peak = measure(fn, arg, args.repeat)
+            print(f"{len(text):>10} {len(tokens):>8}  {name:<16} {elapsed * 1000:9.2f} {peak / 2**20:9.2f}")
+
+
+if __name__ == "__main__":
+    main()
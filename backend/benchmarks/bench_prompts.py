@@ -0,0 +1,166 @@
+# backend/benchmarks/bench_prompts.py
+"""
+Micro-benchmark for prompt building: the inline f-string prompts LlamaService
+used before versus the precompiled templates in prompt/, plus the cost and
+effect of the local token estimator.
+
+Reports:
+  - µs per script / product-details prompt render (inline, str.format of the
+    raw template every call, precompiled template)
+  - µs per token estimate versus the old chars/4 rule, and the estimate's
+    error against tiktoken's cl100k encoding when tiktoken is installed
+  - estimated prompt tokens before and after the token budgets, for feature
+    lists of growing size and for the synthetic page corpus from bench_html
+
+Usage (from backend/):
+    python benchmarks/bench_prompts.py --repeat 20000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_html import WORDS, load_corpus
+from html_extract import extract_page
+from prompts import PromptRegistry
+from tokens import estimate_tokens, fit_items, truncate_to_tokens
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+def legacy_script_messages(product_description, key_features, customer_info=None, style="professional", additional_suggestions=None):
+    """The prompt _build_script_payload built inline before prompt/script.md"""
+    features_text = "\n".join(f"- {feature}" for feature in key_features)
+    system_prompt = """You are an expert marketing video script writer. Create engaging, persuasive video scripts that highlight product benefits and drive customer action. 
+
+Your scripts should:
+- Be conversational and engaging 
+- Highlight key product benefits
+- Include a strong call-to-action
+- Be appropriate for a 60-90 second video
+- Use the specified style and tone"""
+    user_prompt = f"""You are a knowledgeable and enthusiastic product expert. Create a conversational and engaging talking points script for a marketing video about the following product:
+
+Product Description: {product_description}
+
+Key Features:
+{features_text}
+
+Target Audience: {customer_info or "General consumers"}
+
+Style: {style}
+
+{f"Additional Requirements: {additional_suggestions}" if additional_suggestions else ""}
+
+Please generate a 60 second talking points conversation scripts that highlights the key benefits and features of the product. Use a friendly and approachable tone, and make sure the script is easy to follow and understand. Focus on the most important information and avoid using overly technical or promotional language.
+
+The script should be written in a natural, conversational style, as if you were talking directly to the target audience. You can use storytelling techniques, examples, or anecdotes to make the product more relatable and interesting.
+
+Please output a script that is concise, clear, and engaging, and that effectively communicates the value of the product to the target audience.
+Please do not include any time stamp in the script, introduction or things about the script, just the actual talking points.
+"""
+    return [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_prompt}]
+
+
+def script_values(description, features, customer_info=None, style="professional", suggestions=None, budgets=None):
+    if budgets:
+        description = truncate_to_tokens(description, budgets["description"])
+        features = fit_items(features, budgets["features"], budgets["feature"])
+    return dict(
+        product_description=description,
+        features_text="\n".join(f"- {feature}" for feature in features),
+        customer_info=customer_info or "General consumers",
+        style=style,
+        additional_requirements=f"Additional Requirements: {suggestions}" if suggestions else "",
+    )
+
+
+def prompt_tokens(messages):
+    return sum(estimate_tokens(message["content"]) for message in messages)
+
+
+def per_call_us(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - started) / repeat * 1e6
+
+
+def sentence(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20000)
+    parser.add_argument("--page-budget", type=int, default=6000)
+    parser.add_argument("--features-budget", type=int, default=300)
+    parser.add_argument("--feature-budget", type=int, default=40)
+    parser.add_argument("--description-budget", type=int, default=600)
+    args = parser.parse_args()
+    budgets = {"description": args.description_budget, "features": args.features_budget, "feature": args.feature_budget}
+
+    started = time.perf_counter()
+    registry = PromptRegistry().load()
+    print(f"loaded {len(registry.templates)} templates in {(time.perf_counter() - started) * 1000:.2f} ms\n")
+    script = registry.get("script")
+    product_details = registry.get("product_details")
+    raw = {
+        section: getattr(script, section).source for section in ("system", "user")
+    }
+
+    rng = random.Random(11)
+    description = sentence(rng, 60) + "."
+    features = [sentence(rng, 8) for _ in range(6)]
+    values = script_values(description, features, "Busy parents", "casual", "Mention the warranty")
+
+    print("render cost (6 features)")
+    print(f"  {'inline f-string':<28}{per_call_us(lambda: legacy_script_messages(description, features, 'Busy parents', 'casual', 'Mention the warranty'), args.repeat):8.2f} µs")
+    print(f"  {'str.format per call':<28}{per_call_us(lambda: [raw['system'].format(**values), raw['user'].format(**values)], args.repeat):8.2f} µs")
+    print(f"  {'precompiled template':<28}{per_call_us(lambda: script.render(**values), args.repeat):8.2f} µs")
+    print(f"  {'precompiled + budgets':<28}{per_call_us(lambda: script.render(**script_values(description, features, 'Busy parents', 'casual', 'Mention the warranty', budgets)), args.repeat // 4):8.2f} µs")
+    assert legacy_script_messages(description, features, "Busy parents", "casual", "Mention the warranty")[1]["content"].strip() == script.render(**values)[1]["content"]
+
+    text = extract_page(load_corpus(None)[1][1], use_lxml=False).render(None)
+    print(f"\ntoken estimate over {len(text) // 1024} KB of page text")
+    print(f"  {'chars / 4':<28}{per_call_us(lambda: (len(text) + 3) // 4, args.repeat):8.2f} µs  {(len(text) + 3) // 4:7d} tok")
+    print(f"  {'estimate_tokens':<28}{per_call_us(lambda: estimate_tokens(text), max(1, args.repeat // 200)):8.2f} µs  {estimate_tokens(text):7d} tok")
+    if tiktoken is not None:
+        encoding = tiktoken.get_encoding("cl100k_base")
+        actual = len(encoding.encode(text))
+        print(f"  {'tiktoken cl100k':<28}{per_call_us(lambda: encoding.encode(text), max(1, args.repeat // 200)):8.2f} µs  {actual:7d} tok")
+        script_text = "".join(m["content"] for m in script.render(**values))
+        for name, estimate in (("chars / 4", (len(script_text) + 3) // 4), ("estimate_tokens", estimate_tokens(script_text))):
+            print(f"  script prompt error, {name:<16}{(estimate - len(encoding.encode(script_text))) / len(encoding.encode(script_text)):+8.1%}")
+    else:
+        print("  (install tiktoken to compare against a real tokenizer)")
+
+    print("\nscript prompt tokens by feature count (feature lists pasted from spec sheets)")
+    print(f"  {'features':>8} {'before':>8} {'after':>8} {'saved':>7}")
+    for count in (5, 20, 60, 200):
+        long_features = [sentence(rng, rng.randint(6, 40)) for _ in range(count)]
+        long_description = sentence(rng, 40 * max(1, count // 5)) + "."
+        before = prompt_tokens(legacy_script_messages(long_description, long_features))
+        after = prompt_tokens(script.render(**script_values(long_description, long_features, budgets=budgets)))
+        print(f"  {count:>8} {before:>8} {after:>8} {1 - after / before:7.1%}")
+
+    print(f"\nproduct-details prompt tokens by page (page budget {args.page_budget})")
+    print(f"  {'page':<16} {'untrimmed':>10} {'after':>8} {'render µs':>10}")
+    for name, html in load_corpus(None):
+        page = extract_page(html, use_lxml=False)
+        before = prompt_tokens(product_details.render(page=page.render(None)))
+        trimmed = page.render(args.page_budget)
+        after = prompt_tokens(product_details.render(page=trimmed))
+        render_us = per_call_us(lambda: page.render(args.page_budget), 20)
+        print(f"  {name:<16} {before:>10} {after:>8} {render_us:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
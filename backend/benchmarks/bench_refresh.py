@@ -0,0 +1,76 @@
+# backend/benchmarks/bench_refresh.py
+"""
+Weekly catalog refresh through refresh.py against a stub catalog and stub
+Llama API.
+
+Runs the refresh command three times over the same URLs:
+  1. first run: every URL is new and goes through extraction
+  2. after a simulated week: a tenth of the pages changed price, a tenth
+     rotated a recommendations strip, the rest are unchanged (most answer
+     304 to the stored ETag, a tenth send no validators at all)
+  3. the same week with --force, i.e. what re-extracting everything costs
+
+Usage (from backend/):
+    python benchmarks/bench_refresh.py --urls 2000 --concurrency 64
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+
+from stubs import CATALOG, start_stub_server
+
+
+def run_refresh(args, env, extra=()):
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "refresh.py", args.file, "--json", "--concurrency", str(args.concurrency), *extra],
+        cwd=BACKEND, env=env, capture_output=True, text=True, check=True,
+    )
+    summary = json.loads(completed.stdout)
+    summary["wall_s"] = time.perf_counter() - started
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--urls", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.02, help="stub latency in seconds (page and LLM)")
+    args = parser.parse_args()
+
+    stub, stub_url = start_stub_server(latency=args.latency)
+    with tempfile.TemporaryDirectory() as data_dir:
+        args.file = os.path.join(data_dir, "catalog.txt")
+        with open(args.file, "w") as handle:
+            handle.writelines(f"{stub_url}/catalog/{n}\n" for n in range(args.urls))
+        env = dict(
+            os.environ,
+            STORAGE_DB=os.path.join(data_dir, "refresh.db"),
+            LLAMA_API_KEY="bench",
+            TAVUS_API_KEY="bench",
+            LLAMA_BASE_URL=stub_url,
+            LOG_LEVEL="WARNING",
+        )
+
+        print(f"{args.urls} URLs, concurrency {args.concurrency}, {args.latency * 1000:.0f} ms stub latency")
+        print(f"{'run':<16} {'wall s':>7} {'URLs/s':>7} {'extract':>8} {'LLM':>6} {'LLM skipped':>12}  outcomes")
+        for name, extra in (("first run", ()), ("week later", ()), ("week, --force", ("--force",))):
+            if name == "week later":
+                CATALOG["revision"] += 1
+            summary = run_refresh(args, env, extra)
+            outcomes = ", ".join(f"{k} {v}" for k, v in sorted(summary["outcomes"].items()))
+            print(f"{name:<16} {summary['wall_s']:7.1f} {summary['urls_per_s']:7.0f} {summary['extractions']:8} "
+                  f"{summary['llm_calls']:6} {summary['llm_calls_skipped']:12}  {outcomes}")
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
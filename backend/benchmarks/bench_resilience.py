@@ -0,0 +1,84 @@
+# backend/benchmarks/bench_resilience.py
+"""
+Resilience benchmark for the Upstream wrapper against a stub Llama API that
+fails a configurable fraction of calls.
+
+Compares success rate with and without retries on a flaky upstream, and the
+time spent on calls during a full outage with and without the circuit breaker.
+
+Usage (from backend/):
+    python benchmarks/bench_resilience.py --requests 300 --error-rate 0.3
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import HTTPException
+
+from stubs import start_stub_server
+from upstream import CircuitBreaker, Upstream
+
+
+async def drive(upstream: Upstream, url: str, total: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    outcomes = {"ok": 0, "failed": 0, "rejected": 0}
+
+    async def one():
+        async with semaphore:
+            try:
+                response = await upstream.post(url, json={"messages": []})
+            except HTTPException:
+                outcomes["rejected"] += 1
+                return
+            outcomes["ok" if response.status_code == 200 else "failed"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    return outcomes, time.perf_counter() - started
+
+
+def report(label: str, outcomes: dict, elapsed: float, total: int):
+    print(f"{label:<24} {outcomes['ok'] / total:8.1%} ok {outcomes['failed']:6} failed "
+          f"{outcomes['rejected']:6} failed fast {elapsed:8.2f} s")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.02, help="stub upstream latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.3, help="fraction of calls the flaky stub fails")
+    args = parser.parse_args()
+
+    flaky, flaky_url = start_stub_server(latency=args.latency, error_rate=args.error_rate)
+    down, down_url = start_stub_server(latency=args.latency, error_rate=1.0)
+    never_opens = 10 ** 9
+
+    print(f"Flaky upstream: {args.error_rate:.0%} of calls return 503")
+    for label, attempts in (("no retries", 1), ("3 attempts", 3), ("5 attempts", 5)):
+        upstream = Upstream(
+            "bench", max_attempts=attempts, backoff_base=0.01, backoff_max=0.1,
+            breaker=CircuitBreaker("bench", failure_threshold=never_opens),
+        )
+        outcomes, elapsed = await drive(upstream, f"{flaky_url}/chat/completions", args.requests, args.concurrency)
+        report(label, outcomes, elapsed, args.requests)
+
+    print("\nFull outage: every call returns 503")
+    for label, threshold in (("retries, no breaker", never_opens), ("retries + breaker", 5)):
+        upstream = Upstream(
+            "bench", max_attempts=3, backoff_base=0.01, backoff_max=0.1,
+            breaker=CircuitBreaker("bench", failure_threshold=threshold, reset_timeout=30.0),
+        )
+        outcomes, elapsed = await drive(upstream, f"{down_url}/chat/completions", args.requests, args.concurrency)
+        report(label, outcomes, elapsed, args.requests)
+
+    flaky.shutdown()
+    down.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
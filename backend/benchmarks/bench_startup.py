@@ -0,0 +1,143 @@
+# backend/benchmarks/bench_startup.py
+"""
+How fast a new worker can take traffic, as when autoscaling adds one.
+
+Each run is a fresh interpreter, so nothing is warm in sys.modules:
+  * import: `import app` (FastAPI, pydantic models, routes; no services)
+  * startup: the lifespan building the store, caches and services and
+    starting the job workers
+  * first request / second request: /api/generate-script through the ASGI
+    app against the stub upstream, so the first one pays for whatever is
+    still created lazily
+
+Then server.py (one worker) is started against the same stubs and timed from
+spawn to the first 200 from /readyz, and to its first script response.
+Medians over --runs.
+
+Usage (from backend/):
+    python benchmarks/bench_startup.py --runs 10
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+
+import httpx
+
+from bench_workers import free_port
+from stubs import start_stub_server
+
+SCRIPT_BODY = {"product_description": "Trail shoe", "key_features": ["Grippy"], "style": "professional"}
+
+# Runs in a fresh interpreter; prints one JSON line of timings in milliseconds
+IN_PROCESS = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+import httpx
+
+async def main():
+    timings = {"import": (imported - started) * 1000}
+    async with app.app.router.lifespan_context(app.app):
+        timings["startup"] = (time.perf_counter() - imported) * 1000
+        transport = httpx.ASGITransport(app=app.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            for name in ("first_request", "second_request"):
+                body = dict(json.loads(sys.argv[1]), product_description=name)
+                sent = time.perf_counter()
+                response = await client.post("/api/generate-script", json=body)
+                assert response.status_code == 200, response.text
+                timings[name] = (time.perf_counter() - sent) * 1000
+    print(json.dumps(timings))
+
+asyncio.run(main())
+"""
+
+
+def environment(stub_url: str, data_dir: str, **extra) -> dict:
+    return dict(
+        os.environ,
+        LLAMA_API_KEY="bench",
+        TAVUS_API_KEY="bench",
+        LLAMA_BASE_URL=f"{stub_url}/v1",
+        TAVUS_API_URL=f"{stub_url}/v2/videos",
+        STORAGE_DB=os.path.join(data_dir, "video_api.db"),
+        LOG_LEVEL="WARNING",
+        **extra,
+    )
+
+
+def in_process(stub_url: str) -> dict:
+    with tempfile.TemporaryDirectory() as data_dir:
+        output = subprocess.run(
+            [sys.executable, "-c", IN_PROCESS, json.dumps(SCRIPT_BODY)],
+            cwd=BACKEND, env=environment(stub_url, data_dir), capture_output=True, text=True, check=True,
+        )
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+async def server_process(stub_url: str) -> dict:
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = environment(stub_url, data_dir, WEB_CONCURRENCY="1", PORT=str(port), HOST="127.0.0.1")
+        started = time.perf_counter()
+        server = subprocess.Popen([sys.executable, "server.py"], cwd=BACKEND, env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            async with httpx.AsyncClient(base_url=base_url, timeout=30) as client:
+                while True:
+                    try:
+                        if (await client.get("/readyz")).status_code == 200:
+                            break
+                    except httpx.TransportError:
+                        pass
+                    if server.poll() is not None or time.perf_counter() - started > 60:
+                        raise RuntimeError("server did not become ready")
+                    await asyncio.sleep(0.01)
+                ready = time.perf_counter()
+                response = await client.post("/api/generate-script", json=SCRIPT_BODY)
+                assert response.status_code == 200, response.text
+                answered = time.perf_counter()
+        finally:
+            server.terminate()
+            server.wait(timeout=30)
+    return {"ready": (ready - started) * 1000, "first_response": (answered - started) * 1000}
+
+
+def summarize(runs) -> dict:
+    return {name: statistics.median(run[name] for run in runs) for name in runs[0]}
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.0, help="stub upstream latency in seconds")
+    args = parser.parse_args()
+
+    stub, stub_url = start_stub_server(latency=args.latency)
+    try:
+        timings = summarize([in_process(stub_url) for _ in range(args.runs)])
+        print(f"median of {args.runs} fresh interpreters, ms")
+        for name, value in timings.items():
+            print(f"  {name:<22} {value:8.1f}")
+        served = summarize([await server_process(stub_url) for _ in range(args.runs)])
+        print("server.py, one worker, from spawn, ms")
+        print(f"  {'ready (/readyz 200)':<22} {served['ready']:8.1f}")
+        print(f"  {'first script response':<22} {served['first_response']:8.1f}")
+    finally:
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+# backend/benchmarks/bench_storage.py
+"""
+Throughput benchmark for the storage repositories: inserts, point reads,
+read-modify-write updates and paginated listing, from 1..N concurrent workers.
+
+Runs the SQLite (WAL, connection per thread) backend against a temporary
+file and the in-memory backend for reference.
+
+Usage (from backend/):
+    python benchmarks/bench_storage.py --operations 4000 --workers 1 4 16 64
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from jobs import JobStore, new_job
+from storage import Storage
+
+
+async def run(storage: Storage, workload: str, operations: int, workers: int) -> float:
+    store = JobStore(storage.videos)
+    seeded = []
+    for i in range(200):
+        job = new_job({"script": f"seed script {i}", "video_name": f"seed {i}"})
+        job.update(video_id=uuid.uuid4().hex[:10], status="queued")
+        await store.create(job)
+        seeded.append(job)
+
+    async def one(i: int):
+        if workload == "insert":
+            await store.create(new_job({"script": f"script {i}", "video_name": f"video {i}"}))
+        elif workload == "get":
+            await store.get_by_video_id(random.choice(seeded)["video_id"])
+        elif workload == "update":
+            await store.update(random.choice(seeded)["job_id"], status=random.choice(["queued", "generating"]))
+        elif workload == "list":
+            await store.list(status="queued", limit=50)
+
+    semaphore = asyncio.Semaphore(workers)
+
+    async def bounded(i: int):
+        async with semaphore:
+            await one(i)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(bounded(i) for i in range(operations)))
+    return operations / (time.perf_counter() - started)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--operations", type=int, default=4000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    print(f"{'backend':<8} {'workload':<8} " + " ".join(f"{w:>9} w" for w in args.workers) + "   (ops/s)")
+    with tempfile.TemporaryDirectory() as directory:
+        for backend in ("sqlite", "memory"):
+            for workload in ("insert", "get", "update", "list"):
+                rates = []
+                for workers in args.workers:
+                    path = os.path.join(directory, f"{uuid.uuid4().hex}.db") if backend == "sqlite" else None
+                    storage = Storage(path)
+                    try:
+                        rates.append(await run(storage, workload, args.operations, workers))
+                    finally:
+                        storage.close()
+                print(f"{backend:<8} {workload:<8} " + " ".join(f"{rate:11.0f}" for rate in rates))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
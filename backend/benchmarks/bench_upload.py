@@ -0,0 +1,107 @@
+# backend/benchmarks/bench_upload.py
+"""
+Memory benchmark for /api/upload-images: the original read-whole-file handler
+versus the chunked, content-addressed UploadStore.
+
+Each mode runs in its own process so peak RSS is comparable; Python heap peak
+is tracked with tracemalloc.
+
+Usage (from backend/):
+    python benchmarks/bench_upload.py --files 4 --size-mb 100
+"""
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import uuid
+from pathlib import Path
+from typing import List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+from fastapi import FastAPI, File, UploadFile
+
+
+def build_app(mode: str, upload_dir: str) -> FastAPI:
+    bench = FastAPI()
+
+    if mode == "legacy":
+        @bench.post("/api/upload-images")
+        async def upload_images(files: List[UploadFile] = File(...)):
+            uploaded = []
+            for file in files:
+                file_path = Path(upload_dir) / f"{uuid.uuid4()}_{file.filename}"
+                with open(file_path, "wb") as buffer:
+                    content = await file.read()
+                    buffer.write(content)
+                uploaded.append(str(file_path))
+            return {"uploaded_files": uploaded}
+    else:
+        from uploads import UploadStore
+        store = UploadStore(directory=upload_dir, max_bytes=1024 ** 3)
+
+        @bench.post("/api/upload-images")
+        async def upload_images(files: List[UploadFile] = File(...)):
+            return {"uploaded_files": await store.save_all(files)}
+
+    return bench
+
+
+async def run_once(mode: str, sources: List[str], upload_dir: str):
+    transport = httpx.ASGITransport(app=build_app(mode, upload_dir))
+    handles = [open(path, "rb") for path in sources]
+    try:
+        files = [("files", (f"shot-{i}.jpg", handle, "image/jpeg")) for i, handle in enumerate(handles)]
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            response = await client.post("/api/upload-images", files=files)
+            response.raise_for_status()
+    finally:
+        for handle in handles:
+            handle.close()
+
+
+def child(mode: str, sources: List[str]):
+    with tempfile.TemporaryDirectory() as upload_dir:
+        tracemalloc.start()
+        started = time.perf_counter()
+        asyncio.run(run_once(mode, sources, upload_dir))
+        elapsed = time.perf_counter() - started
+        _, heap_peak = tracemalloc.get_traced_memory()
+    rss_peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{mode:<10} {elapsed:8.2f} s {heap_peak / 1024 ** 2:12.1f} MB heap {rss_peak_mb:10.1f} MB rss")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--size-mb", type=int, default=100)
+    parser.add_argument("--mode", choices=["legacy", "streaming"], help=argparse.SUPPRESS)
+    parser.add_argument("sources", nargs="*", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        child(args.mode, args.sources)
+        return
+
+    with tempfile.TemporaryDirectory() as source_dir:
+        sources = []
+        for i in range(args.files):
+            path = os.path.join(source_dir, f"source-{i}.jpg")
+            with open(path, "wb") as handle:
+                for _ in range(args.size_mb):
+                    handle.write(os.urandom(1024 * 1024))
+            sources.append(path)
+
+        print(f"{args.files} files x {args.size_mb} MB")
+        for mode in ("legacy", "streaming"):
+            subprocess.run([sys.executable, __file__, "--mode", mode, *sources], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+# backend/benchmarks/bench_workers.py
+"""
+Local load test of the production entry point (server.py) at 1..N worker
+processes, against stub Llama/Tavus/product-page servers.
+
+Each run starts server.py on a free port, waits for /readyz, drives product
+extractions (page fetch + HTML extraction + LLM call, cache bypassed) at a
+fixed concurrency, then sends SIGTERM and times the graceful shutdown.
+
+Usage (from backend/):
+    python benchmarks/bench_workers.py --workers 1 2 4 --requests 600 --concurrency 64
+"""
+import argparse
+import asyncio
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+
+import httpx
+
+from stubs import start_stub_server
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def wait_ready(base_url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get("/readyz")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+async def drive(base_url: str, page_url: str, total: int, concurrency: int):
+    latencies = []
+    failures = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        async def one(i: int):
+            nonlocal failures
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/api/extract-product-details", json={
+                    "url": f"{page_url}/product/{i}",
+                    "bypass_cache": True,
+                    "skip_structured_data": True,
+                })
+                latencies.append(time.perf_counter() - started)
+                failures += response.status_code != 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "failures": failures,
+    }
+
+
+async def run(workers: int, args, stub_url: str) -> dict:
+    port = free_port()
+    with tempfile.TemporaryDirectory() as data_dir:
+        env = dict(
+            os.environ,
+            WEB_CONCURRENCY=str(workers),
+            PORT=str(port),
+            HOST="127.0.0.1",
+            DATA_DIR=data_dir,
+            LLAMA_API_KEY="bench",
+            TAVUS_API_KEY="bench",
+            LLAMA_BASE_URL=stub_url,
+            TAVUS_API_URL=f"{stub_url}/videos",
+            LOG_LEVEL="WARNING",
+        )
+        server = subprocess.Popen([sys.executable, "server.py"], cwd=BACKEND, env=env)
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            await wait_ready(base_url)
+            # Warm up connections and lazily created clients in every worker
+            await drive(base_url, stub_url, args.concurrency, args.concurrency)
+            result = await drive(base_url, stub_url, args.requests, args.concurrency)
+        finally:
+            stop_started = time.perf_counter()
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+            result_shutdown = time.perf_counter() - stop_started
+    result["shutdown_s"] = result_shutdown
+    result["exit_code"] = server.returncode
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=600)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--latency", type=float, default=0.05, help="stub upstream latency in seconds")
+    args = parser.parse_args()
+
+    stub, stub_url = start_stub_server(latency=args.latency)
+    print(f"{os.cpu_count()} cores, {args.requests} extractions at concurrency {args.concurrency}, "
+          f"{args.latency * 1000:.0f} ms upstream latency")
+    print(f"{'workers':>7} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'failed':>7} {'shutdown s':>11}")
+    baseline = None
+    for workers in args.workers:
+        result = await run(workers, args, stub_url)
+        baseline = baseline or result["rps"]
+        print(f"{workers:>7} {result['rps']:9.1f} {result['p50_ms']:9.1f} {result['p95_ms']:9.1f} "
+              f"{result['failures']:7} {result['shutdown_s']:11.2f}   x{result['rps'] / baseline:.2f}")
+    stub.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
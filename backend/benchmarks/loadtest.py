@@ -0,0 +1,462 @@
+# backend/benchmarks/loadtest.py
+"""
+Offline load test of every API endpoint against local Llama, Tavus, product
+page and image stand-ins (benchmarks/stubs.py). Needs no API keys or network.
+
+Starts the stubs and server.py as subprocesses on free ports, then drives each
+scenario in turn at a fixed concurrency after a short warmup. Reports per
+scenario the p50/p95/p99 latency, throughput, failures, time to first token
+for streaming endpoints, and the server's resident memory (sum over its
+worker processes). Results are written as JSON, by default to
+benchmarks/results/<commit>.json, so two commits can be compared:
+
+    python benchmarks/loadtest.py --requests 200 --concurrency 32
+    python benchmarks/loadtest.py --compare benchmarks/results/abc1234.json --fail-over 10
+
+Upstream latency specs are those of stubs.Latency: 0.05, uniform:0.02,0.2,
+lognormal:0.4,0.5 or exp:0.1. --target drives an already running server
+(configured against the stubs by hand) instead of starting one.
+
+Usage (from backend/):
+    python benchmarks/loadtest.py --scenarios script script_stream --llm-latency lognormal:0.3,0.4
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import platform
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(BACKEND))
+
+import httpx
+
+from bench_workers import free_port, wait_ready
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+# A 1x1 PNG; uploads measure the upload path, not image resizing
+PIXEL_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+)
+FEATURES = ["Breathable mesh upper", "Grippy outsole", "Weighs 240 g"]
+# Lower is better for these; everything else (throughput) higher is better
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "ttft_p50_ms", "ttft_p95_ms", "rss_peak_mb")
+
+
+def script_request(i: int, **extra) -> dict:
+    # A distinct description per request so the script cache never answers
+    return {
+        "product_description": f"Trail running shoe, batch {i}: light, grippy and made for long climbs",
+        "key_features": FEATURES,
+        "style": "professional",
+        **extra,
+    }
+
+
+async def read_sse(response: httpx.Response, started: float):
+    """Consume an SSE response; returns (time to first token event or None, last event name)"""
+    ttft = None
+    event = None
+    async for line in response.aiter_lines():
+        if line.startswith("event:"):
+            event = line[6:].strip()
+            if ttft is None and event in ("token", "variant", "field"):
+                ttft = time.perf_counter() - started
+    return ttft, event
+
+
+# Each scenario sends one request and returns (ok, time to first token or None)
+async def health(client, i, ctx):
+    return (await client.get("/healthz")).status_code == 200, None
+
+
+async def metrics(client, i, ctx):
+    return (await client.get("/metrics")).status_code == 200, None
+
+
+async def extract(client, i, ctx):
+    response = await client.post("/api/extract-product-details", json={
+        "url": f"{ctx['stub_url']}/product/{i}",
+        "bypass_cache": True,
+        "process_images": False,
+    })
+    return response.status_code == 200, None
+
+
+async def extract_cached(client, i, ctx):
+    response = await client.post("/api/extract-product-details", json={
+        "url": f"{ctx['stub_url']}/product/cached",
+        "process_images": False,
+    })
+    return response.status_code == 200, None
+
+
+async def extract_stream(client, i, ctx):
+    started = time.perf_counter()
+    request = {"url": f"{ctx['stub_url']}/product/stream-{i}", "bypass_cache": True, "process_images": False}
+    async with client.stream("POST", "/api/extract-product-details/stream", json=request) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return False, None
+        ttft, last = await read_sse(response, started)
+    return last == "done", ttft
+
+
+async def script(client, i, ctx):
+    response = await client.post("/api/generate-script", json=script_request(i))
+    return response.status_code == 200, None
+
+
+async def script_stream(client, i, ctx):
+    started = time.perf_counter()
+    async with client.stream("POST", "/api/generate-script/stream", json=script_request(i)) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return False, None
+        ttft, last = await read_sse(response, started)
+    return last == "done", ttft
+
+
+async def variants(client, i, ctx):
+    started = time.perf_counter()
+    request = script_request(i, count=3, stream=True)
+    async with client.stream("POST", "/api/generate-script/variants", json=request) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return False, None
+        ttft, last = await read_sse(response, started)
+    return last == "done", ttft
+
+
+async def video(client, i, ctx):
+    response = await client.post("/api/generate-video", json={
+        "script": f"Meet the Acme Trail Runner, take {i}.",
+        "video_name": f"loadtest {i}",
+    })
+    return response.status_code == 200, None
+
+
+async def campaign(client, i, ctx):
+    items = [{"url": f"{ctx['stub_url']}/product/campaign-{i}-{n}"} for n in range(3)]
+    async with client.stream("POST", "/api/campaigns", json={"items": items, "create_videos": True}) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return False, None
+        summary = None
+        async for line in response.aiter_lines():
+            if line:
+                summary = json.loads(line).get("summary", summary)
+    return bool(summary) and summary["failed"] == 0, None
+
+
+async def upload(client, i, ctx):
+    # Vary a trailing byte so each upload is new content rather than a dedup hit
+    data = PIXEL_PNG + i.to_bytes(4, "big")
+    response = await client.post("/api/upload-images", files={"files": (f"{i}.png", data, "image/png")})
+    return response.status_code == 200, None
+
+
+async def list_videos(client, i, ctx):
+    return (await client.get("/api/videos", params={"limit": 50})).status_code == 200, None
+
+
+SCENARIOS = {
+    "health": health,
+    "extract": extract,
+    "extract_cached": extract_cached,
+    "extract_stream": extract_stream,
+    "script": script,
+    "script_stream": script_stream,
+    "variants": variants,
+    "video": video,
+    "campaign": campaign,
+    "upload": upload,
+    "list_videos": list_videos,
+    "metrics": metrics,
+}
+
+
+def percentile(values, q: float):
+    """Nearest-rank percentile of sorted values"""
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, int(round(q * len(values) + 0.5)) - 1))]
+
+
+def process_tree(pid: int):
+    """pid and every descendant, from /proc"""
+    pids = [pid]
+    for parent in pids:
+        try:
+            for task in os.listdir(f"/proc/{parent}/task"):
+                with open(f"/proc/{parent}/task/{task}/children") as handle:
+                    pids.extend(int(child) for child in handle.read().split())
+        except OSError:
+            continue
+    return pids
+
+
+def rss_bytes(pid: int) -> int:
+    """Resident memory of a process tree; 0 where /proc is unavailable"""
+    total = 0
+    for member in process_tree(pid):
+        try:
+            with open(f"/proc/{member}/statm") as handle:
+                total += int(handle.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            continue
+    return total
+
+
+class MemorySampler:
+    """Samples a process tree's RSS in the background and keeps the peak"""
+
+    def __init__(self, pid, interval: float = 0.05):
+        self.pid = pid
+        self.interval = interval
+        self.peak = 0
+        self._task = None
+
+    def current(self) -> int:
+        return rss_bytes(self.pid) if self.pid else 0
+
+    async def _run(self):
+        while True:
+            self.peak = max(self.peak, self.current())
+            await asyncio.sleep(self.interval)
+
+    def __enter__(self):
+        self.peak = self.current()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+        self.peak = max(self.peak, self.current())
+
+
+async def run_scenario(name: str, client: httpx.AsyncClient, ctx: dict, args, offset: int) -> dict:
+    scenario = SCENARIOS[name]
+    latencies, ttfts = [], []
+    failures = 0
+    counter = iter(range(offset, offset + args.requests))
+
+    async def worker():
+        nonlocal failures
+        for i in counter:
+            started = time.perf_counter()
+            try:
+                ok, ttft = await scenario(client, i, ctx)
+            except httpx.HTTPError:
+                ok, ttft = False, None
+            latencies.append(time.perf_counter() - started)
+            failures += not ok
+            if ttft is not None:
+                ttfts.append(ttft)
+
+    # Warm up lazily created clients, pools and caches outside the measurement
+    warmup = iter(range(offset - args.warmup, offset))
+    await asyncio.gather(*(scenario(client, i, ctx) for i in warmup))
+
+    sampler = MemorySampler(ctx["pid"])
+    before = sampler.current()
+    with sampler:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(min(args.concurrency, args.requests))))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ttfts.sort()
+    result = {
+        "requests": len(latencies),
+        "concurrency": args.concurrency,
+        "failures": failures,
+        "elapsed_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+        "max_ms": round(latencies[-1] * 1000, 1),
+    }
+    if ttfts:
+        result["ttft_p50_ms"] = round(percentile(ttfts, 0.50) * 1000, 1)
+        result["ttft_p95_ms"] = round(percentile(ttfts, 0.95) * 1000, 1)
+    if ctx["pid"]:
+        result["rss_before_mb"] = round(before / 2**20, 1)
+        result["rss_peak_mb"] = round(sampler.peak / 2**20, 1)
+        result["rss_after_mb"] = round(sampler.current() / 2**20, 1)
+    return result
+
+
+def git_revision() -> dict:
+    def git(*command):
+        completed = subprocess.run(["git", *command], cwd=BACKEND, capture_output=True, text=True)
+        return completed.stdout.strip() if completed.returncode == 0 else None
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "subject": git("log", "-1", "--format=%s"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def start_stubs(args):
+    port = free_port()
+    command = [
+        sys.executable, str(Path(__file__).resolve().parent / "stubs.py"),
+        "--port", str(port),
+        "--latency", args.latency,
+        "--token-interval", args.token_interval,
+        "--stream-tokens", str(args.stream_tokens),
+    ]
+    for flag in ("llm_latency", "tavus_latency", "page_latency"):
+        if getattr(args, flag):
+            command += [f"--{flag.replace('_', '-')}", getattr(args, flag)]
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    # The stubs print one line once they are listening
+    process.stdout.readline()
+    return process, f"http://127.0.0.1:{port}"
+
+
+def start_server(args, stub_url: str, data_dir: str):
+    port = free_port()
+    env = dict(
+        os.environ,
+        WEB_CONCURRENCY=str(args.workers),
+        PORT=str(port),
+        HOST="127.0.0.1",
+        DATA_DIR=data_dir,
+        UPLOAD_DIR=os.path.join(data_dir, "uploads"),
+        IMAGE_DIR=os.path.join(data_dir, "images"),
+        LLAMA_API_KEY="loadtest",
+        TAVUS_API_KEY="loadtest",
+        LLAMA_BASE_URL=stub_url,
+        TAVUS_API_URL=f"{stub_url}/v2/videos",
+        LOG_LEVEL="WARNING",
+    )
+    process = subprocess.Popen([sys.executable, "server.py"], cwd=BACKEND, env=env)
+    return process, f"http://127.0.0.1:{port}"
+
+
+def compare(current: dict, baseline: dict, fail_over) -> int:
+    """Print per-metric changes against a baseline run; returns the number of regressions"""
+    print(f"\ncompared with {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})")
+    print(f"{'scenario':<15} {'metric':<12} {'baseline':>10} {'current':>10} {'change':>8}")
+    regressions = 0
+    for name, result in current["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if not before:
+            continue
+        for metric in ("rps",) + LOWER_IS_BETTER:
+            if metric not in result or not before.get(metric):
+                continue
+            change = (result[metric] - before[metric]) / before[metric] * 100
+            worse = change if metric in LOWER_IS_BETTER else -change
+            flag = ""
+            if fail_over is not None and worse > fail_over:
+                regressions += 1
+                flag = "  REGRESSION"
+            print(f"{name:<15} {metric:<12} {before[metric]:10.1f} {result[metric]:10.1f} {change:+7.1f}%{flag}")
+    return regressions
+
+
+async def drive(args, base_url: str, ctx: dict) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    results = {}
+    print(f"{'scenario':<15} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'ttft p50':>9} {'failed':>7} {'rss peak MB':>12}")
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        for n, name in enumerate(args.scenarios):
+            # Disjoint request numbers per scenario keep their URLs and prompts apart
+            result = await run_scenario(name, client, ctx, args, offset=(n + 1) * 1_000_000)
+            results[name] = result
+            ttft = f"{result['ttft_p50_ms']:9.1f}" if "ttft_p50_ms" in result else f"{'-':>9}"
+            rss = f"{result['rss_peak_mb']:12.1f}" if "rss_peak_mb" in result else f"{'-':>12}"
+            print(f"{name:<15} {result['rps']:8.1f} {result['p50_ms']:8.1f} {result['p95_ms']:8.1f} "
+                  f"{result['p99_ms']:8.1f} {ttft} {result['failures']:7} {rss}")
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=200, help="measured requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=8, help="unmeasured requests per scenario")
+    parser.add_argument("--workers", type=int, default=1, help="server.py worker processes")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--latency", default="0.05", help="default upstream latency spec")
+    parser.add_argument("--llm-latency", help="Llama latency / time to first token spec")
+    parser.add_argument("--tavus-latency", help="Tavus latency spec")
+    parser.add_argument("--page-latency", help="product page and image latency spec")
+    parser.add_argument("--token-interval", default="0.005", help="gap between streamed tokens")
+    parser.add_argument("--stream-tokens", type=int, default=60)
+    parser.add_argument("--target", help="drive this running server instead of starting one")
+    parser.add_argument("--stub-url", help="with --target: where the server's upstream stubs run")
+    parser.add_argument("--output", help="results file; default benchmarks/results/<commit>.json")
+    parser.add_argument("--compare", help="baseline results file to compare against")
+    parser.add_argument("--fail-over", type=float,
+                        help="with --compare: exit 1 if any metric is this many percent worse")
+    args = parser.parse_args()
+
+    stubs = server = None
+    data_dir = tempfile.TemporaryDirectory()
+    try:
+        if args.target:
+            base_url = args.target.rstrip("/")
+            stub_url = args.stub_url
+            if not stub_url:
+                stubs, stub_url = start_stubs(args)
+            pid = None
+        else:
+            stubs, stub_url = start_stubs(args)
+            server, base_url = start_server(args, stub_url, data_dir.name)
+            pid = server.pid
+            await wait_ready(base_url)
+
+        print(f"{os.cpu_count()} cores, {args.workers} worker(s), {args.requests} requests per scenario "
+              f"at concurrency {args.concurrency}; upstream latency {args.latency}")
+        started = time.time()
+        scenarios = await drive(args, base_url, {"stub_url": stub_url, "pid": pid})
+    finally:
+        if server:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+        if stubs:
+            stubs.terminate()
+            stubs.wait()
+        data_dir.cleanup()
+
+    revision = git_revision()
+    report = {
+        "meta": {
+            **revision,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(started)),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "compare", "fail_over")},
+        },
+        "scenarios": scenarios,
+    }
+    output = Path(args.output) if args.output else RESULTS_DIR / f"{revision['commit'] or 'unknown'}{'-dirty' if revision['dirty'] else ''}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"\nresults written to {output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text())
+        regressions = compare(report, baseline, args.fail_over)
+        if regressions:
+            print(f"{regressions} metric(s) regressed by more than {args.fail_over}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,352 @@
+# backend/benchmarks/stubs.py
+"""Local stand-ins for the Llama and Tavus APIs, product pages and images"""
+import functools
+import io
+import json
+import math
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PRODUCT_PAGE = """<html><head><title>Acme Trail Runner</title></head>
+<body>
+<nav class="menu">Home | Shop</nav>
+<div class="product">
+  <h1>Acme Trail Runner</h1>
+  <p class="price">$129.00</p>
+  <p>A lightweight trail running shoe with a grippy outsole.</p>
+  <ul><li>Vibram outsole</li><li>Waterproof upper</li><li>240 g per shoe</li></ul>
+</div>
+<div class="cookie-banner">We use cookies</div>
+</body></html>"""
+
+STRUCTURED_PRODUCT_PAGE = """<html><head><title>Acme Trail Runner</title>
+<meta property="og:type" content="product">
+<script type="application/ld+json">
+{"@context": "https://schema.org", "@type": "Product", "name": "Acme Trail Runner",
+ "description": "A lightweight trail running shoe with a grippy Vibram outsole and waterproof upper.",
+ "image": ["https://images.example.com/trail-runner.jpg"],
+ "brand": {"@type": "Brand", "name": "Acme"},
+ "additionalProperty": [{"@type": "PropertyValue", "name": "Weight", "value": "240 g"}],
+ "offers": {"@type": "Offer", "price": "129.00", "priceCurrency": "USD"},
+ "aggregateRating": {"@type": "AggregateRating", "ratingValue": "4.6", "reviewCount": "212"}}
+</script></head>
+<body><h1>Acme Trail Runner</h1><p>A lightweight trail running shoe.</p></body></html>"""
+
+PRODUCT_DETAILS = {
+    "product_description": "A lightweight trail running shoe with a grippy outsole.",
+    "key_features": ["Vibram outsole", "Waterproof upper", "240 g per shoe"],
+    "target_audience": "Trail runners",
+    "product_images": [],
+    "status": "completed",
+}
+
+# Bumped by the refresh benchmark to simulate a week passing on the catalog
+CATALOG = {"revision": 0}
+
+
+def catalog_page(n: int, revision: int):
+    """
+    Catalog product page `n` as of `revision`, as (html, etag or None). Every
+    tenth page changes price each revision, every tenth rotates a
+    recommendations strip, every tenth sends no validators; the rest are static.
+    """
+    kind = n % 10
+    price = 100 + n % 50 + (revision if kind == 0 else 0)
+    reviews = " ".join(
+        f"Review {i}: the Acme Runner {n} fits well, the outsole grips on wet rock and the upper stays dry."
+        for i in range(40)
+    )
+    rotating = f"<div class='recs'>Customers also viewed model {1000 + revision}</div>" if kind == 1 else ""
+    html = (f"<html><head><title>Acme Runner {n}</title></head><body><div class='product'>"
+            f"<h1>Acme Runner {n}</h1><p class='price'>${price}.00</p>"
+            f"<ul><li>Vibram outsole</li><li>Waterproof upper</li><li>{200 + n % 80} g per shoe</li></ul>"
+            f"<p>{reviews}</p>{rotating}</div></body></html>")
+    etag = None if kind == 2 else f'"{n}-{price}-{revision if kind == 1 else 0}"'
+    return html, etag
+
+
+PRODUCT_IMAGE_SIZE = (3000, 2000)
+
+
+@functools.lru_cache(maxsize=16)
+def product_image(seed: int) -> bytes:
+    """A photo-sized JPEG: gradients, shapes and sensor-like noise so it compresses like a real photo"""
+    from PIL import Image, ImageDraw
+
+    rng = random.Random(seed)
+    width, height = PRODUCT_IMAGE_SIZE
+    channels = [Image.linear_gradient("L").rotate(rng.randint(0, 359)).resize((width, height)) for _ in range(3)]
+    image = Image.merge("RGB", channels)
+    draw = ImageDraw.Draw(image)
+    for _ in range(40):
+        x, y = rng.randrange(width), rng.randrange(height)
+        r = rng.randint(40, 400)
+        draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(rng.randrange(256) for _ in range(3)))
+    noise = Image.effect_noise((width, height), 24).convert("RGB")
+    image = Image.blend(image, noise, 0.15)
+    out = io.BytesIO()
+    image.save(out, "JPEG", quality=92)
+    return out.getvalue()
+
+
+SCRIPT_TOKENS = ["Meet ", "the ", "Acme ", "Trail ", "Runner. ", "Built ", "for ", "the ", "trail."]
+
+
+class Latency:
+    """
+    A latency distribution in seconds, parsed from a short spec:
+
+        0.05                 constant
+        uniform:0.02,0.2     uniform between two bounds
+        lognormal:0.3,0.6    log-normal with that median and sigma (long tail)
+        exp:0.1              exponential with that mean
+    """
+
+    def __init__(self, spec="0"):
+        self.spec = str(spec)
+        kind, _, params = self.spec.partition(":")
+        if not params:
+            kind, params = "constant", kind
+        self.kind = kind
+        self.params = [float(value) for value in params.split(",")]
+        if kind not in ("constant", "uniform", "lognormal", "exp"):
+            raise ValueError(f"Unknown latency distribution {spec!r}")
+
+    def sample(self) -> float:
+        if self.kind == "constant":
+            return self.params[0]
+        if self.kind == "uniform":
+            return random.uniform(*self.params)
+        if self.kind == "lognormal":
+            median, sigma = self.params
+            return random.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+        return random.expovariate(1 / self.params[0]) if self.params[0] > 0 else 0.0
+
+    def sleep(self):
+        delay = self.sample()
+        if delay > 0:
+            time.sleep(delay)
+
+    def __repr__(self):
+        return f"Latency({self.spec!r})"
+
+
+def json_tokens(value, size: int = 6):
+    """A JSON document split into model-sized tokens"""
+    text = json.dumps(value)
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+def script_tokens(count: int):
+    """`count` streamed tokens; the stock nine-token script when count is 9 or less"""
+    if count <= len(SCRIPT_TOKENS):
+        return SCRIPT_TOKENS
+    return [SCRIPT_TOKENS[i % len(SCRIPT_TOKENS)] for i in range(count)]
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Per-upstream latency: a Llama completion (time to first token when
+    # streaming), a Tavus call, and any GET (product pages, images, video status)
+    llm_latency = Latency()
+    tavus_latency = Latency()
+    page_latency = Latency()
+    # Gap between streamed tokens, and how many tokens a streamed script has
+    token_interval = Latency()
+    stream_tokens = len(SCRIPT_TOKENS)
+    # Fault injection for the resilience benchmark: fail this fraction of POSTs
+    error_rate = 0.0
+    error_status = 503
+    retry_after = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, body, status=200):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.page_latency.sleep()
+        if "/videos/" in self.path:
+            video_id = self.path.rsplit("/", 1)[-1]
+            self._send_json({
+                "video_id": video_id,
+                "status": "ready",
+                "hosted_url": "https://videos.example.com/stub",
+                "download_url": f"https://videos.example.com/{video_id}.mp4",
+            })
+            return
+        if "/images/" in self.path:
+            data = product_image(int(self.path.rsplit("/", 1)[-1].split(".")[0]) % 16)
+            self.send_response(200)
+            self.send_header("Content-Type", "image/jpeg")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        if "/catalog/" in self.path:
+            html, etag = catalog_page(int(self.path.rsplit("/", 1)[-1]), CATALOG["revision"])
+            if etag and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            data = html.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            if etag:
+                self.send_header("ETag", etag)
+            self.end_headers()
+            self.wfile.write(data)
+            return
+        page = STRUCTURED_PRODUCT_PAGE if "structured" in self.path else PRODUCT_PAGE
+        data = page.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        payload = json.loads(self.rfile.read(length) or b"{}")
+        streaming = self.path.endswith("/chat/completions") and payload.get("stream")
+        if not streaming:
+            (self.llm_latency if self.path.endswith("/chat/completions") else self.tavus_latency).sleep()
+
+        if self.error_rate and random.random() < self.error_rate:
+            self._send_error()
+        elif streaming:
+            # A JSON-schema completion streams the product details document
+            self._send_stream(json_tokens(PRODUCT_DETAILS) if payload.get("response_format") else None)
+        elif self.path.endswith("/chat/completions"):
+            self._send_json({
+                "completion_message": {
+                    "role": "assistant",
+                    "content": {"type": "text", "text": json.dumps(PRODUCT_DETAILS)},
+                }
+            })
+        elif self.path.endswith("/videos"):
+            self._send_json({
+                "video_id": uuid.uuid4().hex[:10],
+                "video_name": payload.get("video_name"),
+                "status": "queued",
+                "hosted_url": "https://videos.example.com/stub",
+                "created_at": time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime()),
+            })
+        else:
+            self._send_json({"detail": "Not found"}, status=404)
+
+    def _send_error(self):
+        data = json.dumps({"detail": "Injected failure"}).encode()
+        self.send_response(self.error_status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if self.retry_after is not None:
+            self.send_header("Retry-After", str(self.retry_after))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_stream(self, tokens=None):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        self.wfile.flush()
+        self.llm_latency.sleep()
+        events = [
+            {"event": {"event_type": "progress", "delta": {"text": token}}}
+            for token in tokens or script_tokens(self.stream_tokens)
+        ]
+        events.append({"event": {"event_type": "complete"}})
+        for i, event in enumerate(events):
+            if i:
+                self.token_interval.sleep()
+            line = f"data: {json.dumps(event)}\n\n".encode()
+            self.wfile.write(f"{len(line):x}\r\n".encode() + line + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def start_stub_server(
+    latency=0.0,
+    port: int = 0,
+    error_rate: float = 0.0,
+    error_status: int = 503,
+    retry_after=None,
+    llm_latency=None,
+    tavus_latency=None,
+    page_latency=None,
+    token_interval=0.0,
+    stream_tokens: int = len(SCRIPT_TOKENS),
+):
+    """
+    Start a stub server in a background thread and return (server, base_url).
+
+    Latencies are seconds or Latency specs; `latency` applies to every
+    upstream not given its own.
+    """
+    handler = type("Handler", (StubHandler,), {
+        "llm_latency": Latency(latency if llm_latency is None else llm_latency),
+        "tavus_latency": Latency(latency if tavus_latency is None else tavus_latency),
+        "page_latency": Latency(latency if page_latency is None else page_latency),
+        "token_interval": Latency(token_interval),
+        "stream_tokens": stream_tokens,
+        "error_rate": error_rate,
+        "error_status": error_status,
+        "retry_after": retry_after,
+    })
+    server = StubServer(("127.0.0.1", port), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve the Llama, Tavus, product page and image stand-ins")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument("--latency", default="0", help="default latency spec for every upstream")
+    parser.add_argument("--llm-latency", help="Llama completion latency / time to first token, e.g. lognormal:0.4,0.5")
+    parser.add_argument("--tavus-latency", help="Tavus call latency")
+    parser.add_argument("--page-latency", help="product page, image and status GET latency")
+    parser.add_argument("--token-interval", default="0", help="gap between streamed tokens")
+    parser.add_argument("--stream-tokens", type=int, default=len(SCRIPT_TOKENS))
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(
+        latency=args.latency,
+        port=args.port,
+        error_rate=args.error_rate,
+        llm_latency=args.llm_latency,
+        tavus_latency=args.tavus_latency,
+        page_latency=args.page_latency,
+        token_interval=args.token_interval,
+        stream_tokens=args.stream_tokens,
+    )
+    print(f"stubs listening on {base_url}: LLAMA_BASE_URL={base_url} TAVUS_API_URL={base_url}/v2/videos", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# backend/cache.py
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that never change page content
+TRACKING_PARAMS = {"fbclid", "gclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src"}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL so trivially different spellings share a cache entry"""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = parts.hostname.lower() if parts.hostname else ""
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not (key.lower().startswith("utm_") or key.lower() in TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """In-process LRU cache with a per-entry time to live"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.evictions += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """On-disk JSON value store with a time to live, shared between processes"""
+
+    def __init__(self, path: str, ttl: float = 7 * 24 * 3600.0):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            if row[1] < time.time():
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self.evictions += 1
+                self.misses += 1
+                return None
+            self.hits += 1
+            return json.loads(row[0])
+
+    def set(self, key: str, value: Any):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), time.time() + self.ttl),
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class TieredCache:
+    """In-process LRU in front of an optional SQLite cache shared between workers"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, db_path: Optional[str] = None, disk_ttl: Optional[float] = None):
+        self.memory = LRUCache(max_entries=max_entries, ttl=ttl)
+        self.disk = SQLiteCache(db_path, ttl=disk_ttl or ttl) if db_path else None
+
+    async def get(self, key: str) -> Optional[dict]:
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            value = await asyncio.to_thread(self.disk.get, key)
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    async def set(self, key: str, value: dict):
+        self.memory.set(key, value)
+        if self.disk is not None:
+            await asyncio.to_thread(self.disk.set, key, value)
+
+    def stats(self) -> dict:
+        stats = {
+            "memory": {
+                "entries": len(self.memory),
+                "hits": self.memory.hits,
+                "misses": self.memory.misses,
+                "evictions": self.memory.evictions,
+            }
+        }
+        if self.disk is not None:
+            stats["disk"] = {
+                "hits": self.disk.hits,
+                "misses": self.disk.misses,
+                "evictions": self.disk.evictions,
+            }
+        return stats
+
+    def close(self):
+        if self.disk is not None:
+            self.disk.close()
+
+
+class ProductDetailsCache(TieredCache):
+    """
+    Two-level cache for extracted product details.
+
+    Entries are keyed on the normalized URL plus a hash of the cleaned page text,
+    so an unchanged page skips the LLM while an edited page misses naturally.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 3600.0, db_path: Optional[str] = None):
+        super().__init__(max_entries, ttl, db_path, disk_ttl=7 * 24 * 3600.0)
+
+    @classmethod
+    def from_env(cls) -> "ProductDetailsCache":
+        return cls(
+            max_entries=int(os.environ.get("PRODUCT_CACHE_SIZE", 1024)),
+            ttl=float(os.environ.get("PRODUCT_CACHE_TTL", 3600)),
+            db_path=os.environ.get("PRODUCT_CACHE_DB") or None,
+        )
+
+    @staticmethod
+    def key(url: str, clean_text: str) -> str:
+        return f"{normalize_url(url)}#{content_hash(clean_text)}"
+
+
+class ScriptCache(TieredCache):
+    """
+    Generated scripts keyed on a hash of the full rendered prompt.
+
+    Each entry holds up to `variants` alternative scripts for the same prompt so
+    "regenerate" can cycle through them without another completion.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 24 * 3600.0, db_path: Optional[str] = None, variants: int = 3):
+        super().__init__(max_entries, ttl, db_path)
+        self.variants = max(1, variants)
+
+    @classmethod
+    def from_env(cls) -> "ScriptCache":
+        return cls(
+            max_entries=int(os.environ.get("SCRIPT_CACHE_SIZE", 1024)),
+            ttl=float(os.environ.get("SCRIPT_CACHE_TTL", 24 * 3600)),
+            db_path=os.environ.get("SCRIPT_CACHE_DB") or None,
+            variants=int(os.environ.get("SCRIPT_CACHE_VARIANTS", 3)),
+        )
+
+    @staticmethod
+    def key(payload: dict) -> str:
+        """Canonical hash of the completion request, ignoring transport-only fields"""
+        canonical = {key: value for key, value in payload.items() if key != "stream"}
+        return content_hash(json.dumps(canonical, sort_keys=True, separators=(",", ":")))
+
+
+class SingleFlight:
+    """Run one call per key at a time; concurrent callers with the same key share its result"""
+
+    def __init__(self):
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Returns (result, shared) where shared is True if another caller started the call"""
+        call = self._calls.get(key)
+        shared = call is not None
+        if call is None:
+            call = self._calls[key] = asyncio.ensure_future(fn())
+            call.add_done_callback(lambda _: self._calls.pop(key, None))
+        # One caller giving up must not cancel the call for everyone else
+        return await asyncio.shield(call), shared
+
+    def __len__(self):
+        return len(self._calls)
@@ -0,0 +1,128 @@
+# backend/campaigns.py
+import asyncio
+import os
+import time
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+from html_extract import PageExtract
+
+
+class CampaignItem(BaseModel):
+    url: str
+    style: Optional[str] = "professional"
+    customer_info: Optional[str] = None
+    additional_suggestions: Optional[str] = None
+    video_name: Optional[str] = None
+
+
+class CampaignRequest(BaseModel):
+    items: List[CampaignItem]
+    create_videos: Optional[bool] = True
+
+
+class StageLimits:
+    """Concurrency limit per pipeline stage, shared by every campaign in the process"""
+
+    def __init__(self, fetch: int = 16, extract: int = 4, script: int = 4, video: int = 2):
+        self.fetch = asyncio.Semaphore(fetch)
+        self.extract = asyncio.Semaphore(extract)
+        self.script = asyncio.Semaphore(script)
+        self.video = asyncio.Semaphore(video)
+
+    @classmethod
+    def from_env(cls) -> "StageLimits":
+        return cls(
+            fetch=int(os.environ.get("CAMPAIGN_FETCH_CONCURRENCY", 16)),
+            extract=int(os.environ.get("CAMPAIGN_EXTRACT_CONCURRENCY", 4)),
+            script=int(os.environ.get("CAMPAIGN_SCRIPT_CONCURRENCY", 4)),
+            video=int(os.environ.get("CAMPAIGN_VIDEO_CONCURRENCY", 2)),
+        )
+
+
+class CampaignPipeline:
+    """
+    Runs fetch -> extract -> script -> video for many products at once.
+
+    Every item is its own chain of stages, and each stage is gated by its own
+    semaphore, so while item N holds an LLM slot item N+1 can already be
+    fetching its page. A failing item reports the stage it died in and never
+    affects the rest of the batch.
+    """
+
+    def __init__(
+        self,
+        fetch: Callable[[str], Awaitable[Optional[PageExtract]]],
+        extract: Callable[[str, PageExtract], Awaitable[dict]],
+        write_script: Callable[..., Awaitable[str]],
+        create_video: Callable[[dict], Awaitable[dict]],
+        limits: Optional[StageLimits] = None,
+    ):
+        self.fetch = fetch
+        self.extract = extract
+        self.write_script = write_script
+        self.create_video = create_video
+        self.limits = limits or StageLimits.from_env()
+
+    async def run_item(self, index: int, item: CampaignItem, create_videos: bool = True) -> dict:
+        result = {"index": index, "url": item.url, "status": "completed", "timings_ms": {}}
+        stage = "fetch"
+
+        async def timed(name, semaphore, call):
+            async with semaphore:
+                started = time.perf_counter()
+                value = await call()
+                result["timings_ms"][name] = round((time.perf_counter() - started) * 1000, 1)
+                return value
+
+        try:
+            page = await timed("fetch", self.limits.fetch, lambda: self.fetch(item.url))
+            if page is None:
+                raise ValueError("Could not fetch product page")
+
+            stage = "extract"
+            details = await timed("extract", self.limits.extract, lambda: self.extract(item.url, page))
+            if details.get("status") == "error":
+                raise ValueError("Could not extract product details")
+            result["product_details"] = details
+
+            stage = "script"
+            script = await timed("script", self.limits.script, lambda: self.write_script(
+                details.get("product_description", ""),
+                details.get("key_features", []),
+                item.customer_info or details.get("target_audience"),
+                item.style,
+                item.additional_suggestions,
+            ))
+            result["script"] = script
+
+            if create_videos:
+                stage = "video"
+                video = await timed("video", self.limits.video, lambda: self.create_video({
+                    "script": script,
+                    "video_name": item.video_name or "new video",
+                }))
+                result["video"] = video
+
+        except Exception as e:
+            result["status"] = "failed"
+            result["failed_stage"] = stage
+            result["error"] = e.detail if isinstance(e, HTTPException) else str(e)
+
+        return result
+
+    async def run(self, request: CampaignRequest) -> AsyncIterator[dict]:
+        """Yield one result per item, in completion order"""
+        tasks = [
+            asyncio.create_task(self.run_item(index, item, request.create_videos))
+            for index, item in enumerate(request.items)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # The client went away mid-batch; stop work nobody will read
+            for task in tasks:
+                task.cancel()
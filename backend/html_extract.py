@@ -0,0 +1,284 @@
+# backend/html_extract.py
+import json
+import os
+import re
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+from tokens import estimate_tokens, truncate_to_tokens
+
+# Subtrees that never carry product content
+SKIP_TAGS = frozenset([
+    "script", "style", "nav", "header", "footer", "aside", "iframe",
+    "noscript", "form", "button", "svg", "template",
+])
+VOID_TAGS = frozenset([
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+])
+META_KEYS = frozenset([
+    "description", "og:type", "og:title", "og:description", "og:image", "og:price:amount",
+    "product:price:amount", "product:price:currency", "twitter:title", "twitter:description",
+])
+
+# One matcher over class/id instead of a selector sweep per pattern. "ad" only
+# matches as a whole token so "header", "shadow" or "download" survive.
+NOISE_PATTERN = re.compile(
+    r"(?:^|[\s_-])ads?(?:$|[\s_-])|banner|popup|modal|cookie|social|share|newsletter|sidebar|menu|navigation",
+    re.IGNORECASE,
+)
+PRICE_PATTERN = re.compile(r"price", re.IGNORECASE)
+WHITESPACE = re.compile(r"\s+")
+
+DEFAULT_TOKEN_BUDGET = int(os.environ.get("PAGE_TOKEN_BUDGET", 6000))
+DEFAULT_MAX_BYTES = int(os.environ.get("PAGE_MAX_BYTES", 2 * 1024 * 1024))
+
+
+def _squash(text: str) -> str:
+    return WHITESPACE.sub(" ", text).strip()
+
+
+def _dedupe(items: List[str]) -> List[str]:
+    seen = set()
+    return [item for item in items if not (item in seen or seen.add(item))]
+
+
+class PageExtract:
+    """Product-relevant regions of a page, collected in a single pass"""
+
+    def __init__(self):
+        self.title = ""
+        self.headings: List[str] = []
+        self.meta: Dict[str, str] = {}
+        self.prices: List[str] = []
+        self.list_items: List[str] = []
+        self.json_ld: List[str] = []
+        self.microdata: Dict[str, List[str]] = {}
+        self.item_types: List[str] = []
+        self.body: List[str] = []
+
+    @property
+    def text(self) -> str:
+        return _squash(" ".join(self.body))
+
+    def product_json_ld(self) -> List[str]:
+        """JSON-LD blocks that describe a Product, compacted"""
+        blocks = []
+        for raw in self.json_ld:
+            try:
+                data = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+            if '"Product"' in raw or "'Product'" in raw:
+                blocks.append(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+        return blocks
+
+    def sections(self) -> List[str]:
+        """Regions in priority order: title, description, price, structured data, bullets, body"""
+        sections = []
+        title = self.title or self.meta.get("og:title", "")
+        if title:
+            sections.append(f"Title: {title}")
+        headings = [heading for heading in _dedupe(self.headings) if heading != title]
+        if headings:
+            sections.append("Heading: " + " | ".join(headings[:3]))
+
+        description = self.meta.get("description") or self.meta.get("og:description")
+        if description:
+            sections.append(f"Description: {description}")
+
+        prices = _dedupe(self.prices)[:3]
+        meta_price = self.meta.get("product:price:amount") or self.meta.get("og:price:amount")
+        if meta_price:
+            currency = self.meta.get("product:price:currency", "")
+            prices.insert(0, f"{meta_price} {currency}".strip())
+        if prices:
+            sections.append("Price: " + ", ".join(prices))
+
+        for block in self.product_json_ld():
+            sections.append(f"Structured data: {block}")
+
+        items = [item for item in _dedupe(self.list_items) if 3 <= len(item) <= 300]
+        if items:
+            sections.append("Features:\n" + "\n".join(f"- {item}" for item in items))
+
+        text = self.text
+        if text:
+            sections.append(f"Page text: {text}")
+        return sections
+
+    def render(self, token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET) -> str:
+        """Join sections in priority order, truncating once the token budget is spent"""
+        sections = self.sections()
+        if token_budget is None:
+            return "\n".join(sections)
+
+        remaining = token_budget
+        kept = []
+        for section in sections:
+            if remaining <= 0:
+                break
+            section = truncate_to_tokens(section, remaining, marker="")
+            if not section:
+                break
+            kept.append(section)
+            remaining -= estimate_tokens(section)
+        return "\n".join(kept)
+
+
+class _ExtractHandler:
+    """Parser-independent callbacks; both the stdlib and lxml drivers feed this"""
+
+    def __init__(self):
+        self.page = PageExtract()
+        self._stack: List[str] = []
+        self._skip_depth: Optional[int] = None
+        # Active captures as [kind, depth, parts]
+        self._captures: List[list] = []
+        self._exclusive = False
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]):
+        tag = tag.lower()
+        if self._skip_depth is not None:
+            if tag not in VOID_TAGS:
+                self._stack.append(tag)
+            return
+
+        if attrs.get("itemtype"):
+            self.page.item_types.append(attrs["itemtype"])
+        itemprop = attrs.get("itemprop")
+
+        if tag == "meta":
+            key = (attrs.get("name") or attrs.get("property") or "").lower()
+            if key in META_KEYS and attrs.get("content"):
+                self.page.meta.setdefault(key, _squash(attrs["content"]))
+        if tag in VOID_TAGS:
+            if itemprop:
+                value = attrs.get("content") or attrs.get("src") or attrs.get("href")
+                if value:
+                    self.page.microdata.setdefault(itemprop, []).append(_squash(value))
+            return
+
+        self._stack.append(tag)
+        depth = len(self._stack)
+
+        if tag == "script" and (attrs.get("type") or "").lower() == "application/ld+json":
+            self._captures.append(["json_ld", depth, []])
+            self._exclusive = True
+            return
+
+        marker = f"{attrs.get('class') or ''} {attrs.get('id') or ''}"
+        if tag in SKIP_TAGS or NOISE_PATTERN.search(marker):
+            self._skip_depth = depth
+            return
+
+        if tag == "title":
+            self._captures.append(["title", depth, []])
+            self._exclusive = True
+        elif tag == "h1":
+            self._captures.append(["heading", depth, []])
+        elif tag == "li":
+            self._captures.append(["list_item", depth, []])
+
+        if PRICE_PATTERN.search(f"{marker} {itemprop or ''}"):
+            self._captures.append(["price", depth, []])
+        if itemprop and "itemscope" not in attrs:
+            if attrs.get("content"):
+                self.page.microdata.setdefault(itemprop, []).append(_squash(attrs["content"]))
+            else:
+                self._captures.append([f"itemprop:{itemprop}", depth, []])
+
+    def end(self, tag: str):
+        tag = tag.lower()
+        if tag in VOID_TAGS or tag not in self._stack:
+            return
+        while self._stack:
+            popped = self._stack.pop()
+            depth = len(self._stack)
+            if self._skip_depth is not None and depth < self._skip_depth:
+                self._skip_depth = None
+            while self._captures and self._captures[-1][1] > depth:
+                self._finish(*self._captures.pop())
+            if popped == tag:
+                break
+
+    def data(self, text: str):
+        if self._skip_depth is not None:
+            return
+        if self._exclusive:
+            self._captures[-1][2].append(text)
+            return
+        self.page.body.append(text)
+        for capture in self._captures:
+            capture[2].append(text)
+
+    def _finish(self, kind: str, depth: int, parts: List[str]):
+        if kind == "json_ld":
+            self._exclusive = False
+            self.page.json_ld.append("".join(parts).strip())
+            return
+        text = _squash("".join(parts))
+        if kind == "title":
+            self._exclusive = False
+            self.page.title = text
+        elif not text:
+            return
+        elif kind == "heading":
+            self.page.headings.append(text)
+        elif kind == "list_item":
+            self.page.list_items.append(text)
+        elif kind == "price":
+            self.page.prices.append(text)
+        elif kind.startswith("itemprop:"):
+            self.page.microdata.setdefault(kind[9:], []).append(text)
+
+    def close(self) -> PageExtract:
+        if self._stack:
+            self.end(self._stack[0])
+        return self.page
+
+
+class _StdlibDriver(HTMLParser):
+    def __init__(self, handler: _ExtractHandler):
+        super().__init__(convert_charrefs=True)
+        self.handler = handler
+
+    def handle_starttag(self, tag, attrs):
+        self.handler.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handler.start(tag, dict(attrs))
+        self.handler.end(tag)
+
+    def handle_endtag(self, tag):
+        self.handler.end(tag)
+
+    def handle_data(self, data):
+        self.handler.data(data)
+
+
+def extract_page(html: str, use_lxml: Optional[bool] = None) -> PageExtract:
+    """Parse a page once and collect its product-relevant regions"""
+    if use_lxml is None:
+        use_lxml = etree is not None
+
+    handler = _ExtractHandler()
+    if use_lxml:
+        parser = etree.HTMLParser(target=handler, recover=True)
+        parser.feed(html)
+        return parser.close()
+
+    parser = _StdlibDriver(handler)
+    parser.feed(html)
+    parser.close()
+    return handler.close()
+
+
+def extract_text(html: str, token_budget: Optional[int] = DEFAULT_TOKEN_BUDGET) -> str:
+    """Cleaned, budgeted page text ready to go into an LLM prompt"""
+    return extract_page(html).render(token_budget)
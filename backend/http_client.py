@@ -0,0 +1,106 @@
+# backend/http_client.py
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+class HttpClient:
+    """Shared async HTTP client with keep-alive pooling and per-host concurrency limits"""
+
+    def __init__(
+        self,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        max_connections: Optional[int] = None,
+        max_keepalive_connections: Optional[int] = None,
+        per_host_limit: Optional[int] = None,
+    ):
+        self.connect_timeout = connect_timeout or _env_float("HTTP_CONNECT_TIMEOUT", 10.0)
+        self.read_timeout = read_timeout or _env_float("HTTP_READ_TIMEOUT", 120.0)
+        self.max_connections = max_connections or _env_int("HTTP_MAX_CONNECTIONS", 200)
+        self.max_keepalive_connections = max_keepalive_connections or _env_int("HTTP_MAX_KEEPALIVE", 50)
+        self.per_host_limit = per_host_limit or _env_int("HTTP_PER_HOST_LIMIT", 50)
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_keepalive_connections,
+                ),
+                follow_redirects=True,
+            )
+        return self._client
+
+    def open(self) -> httpx.AsyncClient:
+        """Create the pool now, transport and TLS context included, instead of on the first request"""
+        return self.client
+
+    def _semaphore_for(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        semaphore = self._host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.per_host_limit)
+            self._host_semaphores[host] = semaphore
+        return semaphore
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request and read the full response body"""
+        async with self._semaphore_for(url):
+            return await self.client.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs):
+        """Send a request and yield the response without reading the body"""
+        async with self._semaphore_for(url):
+            async with self.client.stream(method, url, **kwargs) as response:
+                yield response
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        self._host_semaphores.clear()
+
+
+_shared_client: Optional[HttpClient] = None
+
+
+def get_http_client() -> HttpClient:
+    """Return the process-wide HTTP client, creating it on first use"""
+    global _shared_client
+    if _shared_client is None:
+        _shared_client = HttpClient()
+    return _shared_client
+
+
+async def close_http_client():
+    global _shared_client
+    if _shared_client is not None:
+        await _shared_client.aclose()
+        _shared_client = None
@@ -0,0 +1,324 @@
+# backend/images.py
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+from cache import SingleFlight
+from http_client import get_http_client
+from instrumentation import registry, span
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+IMAGES_PROCESSED = registry.counter(
+    "images_processed_total", "Images through the image pipeline, by source and outcome", ("source", "outcome"))
+
+# Name -> (max width, max height, format). Variants keep the aspect ratio and
+# are never upscaled.
+VARIANTS = {
+    "thumb": (320, 320, "WEBP"),
+    "display": (1024, 1024, "WEBP"),
+    # Tavus takes JPEG backgrounds; 1080p is all the video needs
+    "background": (1920, 1080, "JPEG"),
+}
+EXTENSIONS = {"WEBP": ".webp", "JPEG": ".jpg", "PNG": ".png"}
+MEDIA_TYPES = {".webp": "image/webp", ".jpg": "image/jpeg", ".jpeg": "image/jpeg", ".png": "image/png",
+               ".gif": "image/gif", ".avif": "image/avif", ".bmp": "image/bmp", ".tiff": "image/tiff"}
+IMAGE_ID = re.compile(r"^[0-9a-f]{64}$")
+
+
+def process_image(source: str, directory: str, quality: int = 82, max_pixels: int = 40_000_000) -> dict:
+    """
+    Decode one original and write every variant next to it. Runs in a worker
+    process: everything it needs comes in as plain arguments.
+    """
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    directory = Path(directory)
+    with Image.open(source) as original:
+        source_format = original.format
+        width, height = original.size
+        largest = max(VARIANTS.values(), key=lambda v: v[0] * v[1])
+        # JPEG can decode straight at a fraction of full size, far cheaper than a full decode and resize
+        original.draft("RGB", (largest[0], largest[1]))
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info or image.mode in ("LA", "PA") else "RGB")
+
+        variants = {}
+        # Largest first so each smaller variant resizes an already reduced image
+        for name, (max_width, max_height, fmt) in sorted(VARIANTS.items(), key=lambda item: -item[1][0] * item[1][1]):
+            if fmt == "WEBP" and not features.check("webp"):
+                fmt = "JPEG"
+            scale = min(1.0, max_width / image.width, max_height / image.height)
+            size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+            # Bicubic with a reducing gap of 2 is close to Lanczos for downscaling at about half the cost
+            resized = image.resize(size, Image.Resampling.BICUBIC, reducing_gap=2.0) if scale < 1 else image
+            if fmt == "JPEG" and resized.mode == "RGBA":
+                # Flatten transparency onto white; JPEG has no alpha
+                background = Image.new("RGB", resized.size, (255, 255, 255))
+                background.paste(resized, mask=resized.getchannel("A"))
+                resized = background
+            filename = f"{name}{EXTENSIONS[fmt]}"
+            temp_path = directory / f".{filename}.{uuid.uuid4().hex}.part"
+            resized.save(temp_path, fmt, quality=quality, optimize=fmt == "JPEG", method=4 if fmt == "WEBP" else 0)
+            os.replace(temp_path, directory / filename)
+            variants[name] = {
+                "file": filename,
+                "width": resized.width,
+                "height": resized.height,
+                "bytes": (directory / filename).stat().st_size,
+            }
+            image = resized if resized.mode == image.mode else image
+
+    meta = {
+        "width": width,
+        "height": height,
+        "format": source_format,
+        "original": Path(source).name,
+        "bytes": Path(source).stat().st_size,
+        "variants": variants,
+    }
+    temp_meta = directory / f".meta.{uuid.uuid4().hex}.part"
+    temp_meta.write_text(json.dumps(meta))
+    os.replace(temp_meta, directory / "meta.json")
+    return meta
+
+
+class ImageStore:
+    """
+    Content-addressed image files: `<dir>/<id[:2]>/<id>/` holds the original,
+    one file per variant and a meta.json written last, so an image whose
+    meta.json exists is complete. The id is the SHA-256 of the original bytes.
+    """
+
+    def __init__(self, directory: str = "images"):
+        self.directory = Path(directory)
+
+    def path(self, image_id: str) -> Path:
+        return self.directory / image_id[:2] / image_id
+
+    def meta(self, image_id: str) -> Optional[dict]:
+        try:
+            return json.loads((self.path(image_id) / "meta.json").read_text())
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+
+    def file(self, image_id: str, variant: str) -> Optional[Tuple[Path, dict]]:
+        """The file for a variant (or "original") of a processed image"""
+        if not IMAGE_ID.match(image_id):
+            return None
+        meta = self.meta(image_id)
+        if meta is None:
+            return None
+        if variant == "original":
+            return self.path(image_id) / meta["original"], meta
+        if variant not in meta["variants"]:
+            return None
+        return self.path(image_id) / meta["variants"][variant]["file"], meta
+
+    def adopt(self, temp_path: Path, image_id: str, suffix: str) -> Path:
+        """Move a downloaded file into place as the original for its id"""
+        directory = self.path(image_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        final_path = directory / f"original{suffix}"
+        if final_path.exists():
+            temp_path.unlink(missing_ok=True)
+        else:
+            os.replace(temp_path, final_path)
+        return final_path
+
+    def link(self, source: Path, image_id: str, suffix: str) -> Path:
+        """Reference an existing file (an upload) as the original, hard-linked when possible"""
+        directory = self.path(image_id)
+        directory.mkdir(parents=True, exist_ok=True)
+        final_path = directory / f"original{suffix}"
+        if not final_path.exists():
+            temp_path = directory / f".original.{uuid.uuid4().hex}.part"
+            try:
+                os.link(source, temp_path)
+            except OSError:
+                shutil.copyfile(source, temp_path)
+            os.replace(temp_path, final_path)
+        return final_path
+
+
+class ImagePipeline:
+    """
+    Downloads product images and processes uploads into right-sized variants.
+
+    Downloads run concurrently, up to `fetch_concurrency` at a time, and stop at
+    `max_bytes`. Decoding and resizing are CPU bound, so they run in a process
+    pool. Results are keyed by content hash, so the same image found under two
+    URLs, or uploaded again, is processed once; concurrent requests for the same
+    URL share one download.
+    """
+
+    def __init__(
+        self,
+        store: ImageStore,
+        fetch_concurrency: int = 8,
+        process_workers: int = 2,
+        max_bytes: int = 10 * 1024 * 1024,
+        max_pixels: int = 40_000_000,
+        quality: int = 82,
+        fetch_timeout: float = 10.0,
+        max_urls: int = 10_000,
+    ):
+        self.store = store
+        self.max_bytes = max_bytes
+        self.max_pixels = max_pixels
+        self.quality = quality
+        self.fetch_timeout = fetch_timeout
+        self.process_workers = process_workers
+        self.max_urls = max_urls
+        self._fetch_semaphore = asyncio.Semaphore(fetch_concurrency)
+        self._executor: Optional[Executor] = None
+        self._flights = SingleFlight()
+        # Source URL -> image id, so a repeat extraction skips the download
+        self._by_url: "OrderedDict[str, str]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls) -> "ImagePipeline":
+        return cls(
+            store=ImageStore(os.environ.get("IMAGE_DIR", "images")),
+            fetch_concurrency=int(os.environ.get("IMAGE_FETCH_CONCURRENCY", 8)),
+            process_workers=int(os.environ.get("IMAGE_PROCESS_WORKERS", min(4, os.cpu_count() or 1))),
+            max_bytes=int(os.environ.get("IMAGE_MAX_BYTES", 10 * 1024 * 1024)),
+            max_pixels=int(os.environ.get("IMAGE_MAX_PIXELS", 40_000_000)),
+            quality=int(os.environ.get("IMAGE_QUALITY", 82)),
+            fetch_timeout=float(os.environ.get("IMAGE_FETCH_TIMEOUT", 10)),
+        )
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def _pool(self) -> Optional[Executor]:
+        if self._executor is None and self.process_workers > 0:
+            # spawn, not fork: the server process has threads and an event loop
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.process_workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def process_urls(self, urls: Iterable[str], base_url: Optional[str] = None) -> List[dict]:
+        """Fetch and process every image URL concurrently; failures come back with an error"""
+        resolved = []
+        for url in urls:
+            url = urljoin(base_url, url) if base_url else url
+            if urlsplit(url).scheme in ("http", "https") and url not in resolved:
+                resolved.append(url)
+        return list(await asyncio.gather(*(self._process_url(url) for url in resolved)))
+
+    async def process_files(self, files: Iterable[Tuple[str, str]]) -> List[dict]:
+        """Process already stored files given as (content hash, path)"""
+        return list(await asyncio.gather(*(self._process_file(image_id, path) for image_id, path in files)))
+
+    async def _process_url(self, url: str) -> dict:
+        image_id = self._by_url.get(url)
+        if image_id is not None and self.store.meta(image_id) is not None:
+            self._by_url.move_to_end(url)
+            IMAGES_PROCESSED.inc(source="url", outcome="cached")
+            return self.describe(image_id, source_url=url)
+        try:
+            result, _ = await self._flights.do(url, lambda: self._fetch_and_process(url))
+            return result
+        except Exception as e:
+            IMAGES_PROCESSED.inc(source="url", outcome="failed")
+            return {"source_url": url, "error": str(e)}
+
+    async def _fetch_and_process(self, url: str) -> dict:
+        image_id, path = await self._download(url)
+        self._by_url[url] = image_id
+        if len(self._by_url) > self.max_urls:
+            self._by_url.popitem(last=False)
+        await self._process(image_id, path, source="url")
+        return self.describe(image_id, source_url=url)
+
+    async def _process_file(self, image_id: str, path: str) -> dict:
+        try:
+            original = await asyncio.to_thread(self.store.link, Path(path), image_id, Path(path).suffix.lower())
+            await self._process(image_id, original, source="upload")
+            return self.describe(image_id)
+        except Exception as e:
+            IMAGES_PROCESSED.inc(source="upload", outcome="failed")
+            return {"id": image_id, "error": str(e)}
+
+    async def _download(self, url: str) -> Tuple[str, Path]:
+        """Download one image, hashing as it goes, and move it into the store"""
+        digest = hashlib.sha256()
+        chunks = []
+        size = 0
+        async with self._fetch_semaphore:
+            with span("image_fetch"):
+                async with get_http_client().stream("GET", url, timeout=self.fetch_timeout) as response:
+                    response.raise_for_status()
+                    content_type = response.headers.get("content-type", "").split(";")[0].strip()
+                    if not content_type.startswith("image/"):
+                        raise ValueError(f"Not an image ({content_type or 'no content type'})")
+                    if int(response.headers.get("content-length") or 0) > self.max_bytes:
+                        raise ValueError(f"Image is larger than {self.max_bytes} bytes")
+                    async for chunk in response.aiter_bytes():
+                        size += len(chunk)
+                        if size > self.max_bytes:
+                            raise ValueError(f"Image is larger than {self.max_bytes} bytes")
+                        digest.update(chunk)
+                        chunks.append(chunk)
+
+        suffix = Path(urlsplit(url).path).suffix.lower()
+        if suffix not in MEDIA_TYPES:
+            suffix = "." + content_type.split("/")[1].split("+")[0]
+        image_id = digest.hexdigest()
+        return image_id, await asyncio.to_thread(self._write_original, image_id, suffix, chunks)
+
+    def _write_original(self, image_id: str, suffix: str, chunks: List[bytes]) -> Path:
+        self.store.directory.mkdir(parents=True, exist_ok=True)
+        temp_path = self.store.directory / f".{uuid.uuid4().hex}.part"
+        with open(temp_path, "wb") as handle:
+            handle.writelines(chunks)
+        return self.store.adopt(temp_path, image_id, suffix)
+
+    async def _process(self, image_id: str, original: Path, source: str):
+        if self.store.meta(image_id) is not None:
+            IMAGES_PROCESSED.inc(source=source, outcome="deduplicated")
+            return
+        if not self.available:
+            raise RuntimeError("Image processing needs Pillow installed")
+        with span("image_resize"):
+            await asyncio.get_running_loop().run_in_executor(
+                self._pool(), process_image, str(original), str(self.store.path(image_id)), self.quality, self.max_pixels
+            )
+        IMAGES_PROCESSED.inc(source=source, outcome="processed")
+
+    def describe(self, image_id: str, source_url: Optional[str] = None) -> dict:
+        """API view of a processed image: its size and a URL per variant"""
+        meta = self.store.meta(image_id) or {"variants": {}}
+        described = {"id": image_id}
+        if source_url:
+            described["source_url"] = source_url
+        described.update(
+            width=meta.get("width"),
+            height=meta.get("height"),
+            url=f"/api/images/{image_id}/original",
+            variants={
+                name: {"url": f"/api/images/{image_id}/{name}", "width": v["width"], "height": v["height"], "bytes": v["bytes"]}
+                for name, v in meta["variants"].items()
+            },
+        )
+        return described
@@ -0,0 +1,245 @@
+# backend/instrumentation.py
+import json
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Seconds; covers fast cache hits through slow LLM completions
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 40.0, 80.0)
+
+
+def _label_key(labelnames: Tuple[str, ...], labels: Dict[str, str]) -> Tuple[str, ...]:
+    return tuple(str(labels.get(name, "")) for name in labelnames)
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{name}="{value}"' for name, value in zip(labelnames, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_label_key(self.labelnames, labels), 0.0)
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Gauge(Counter):
+    def set(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def expose(self) -> List[str]:
+        lines = super().expose()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _label_key(self.labelnames, labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def count(self, **labels) -> float:
+        series = self._values.get(_label_key(self.labelnames, labels))
+        return series[-1] if series else 0.0
+
+    def expose(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._values.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._metrics.get(name) or self.register(Counter(name, help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._metrics.get(name) or self.register(Gauge(name, help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: Iterable[str] = (), buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._metrics.get(name) or self.register(Histogram(name, help, labelnames, buckets))
+
+    def expose(self) -> str:
+        """Prometheus text exposition format"""
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.expose())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route", ("method", "route", "status"))
+STAGE_DURATION = registry.histogram(
+    "pipeline_stage_duration_seconds", "Time spent in each generation pipeline stage", ("stage", "operation"))
+STAGE_ERRORS = registry.counter(
+    "pipeline_stage_errors_total", "Pipeline stages that raised", ("stage", "operation"))
+LLM_TTFT = registry.histogram(
+    "llm_time_to_first_token_seconds", "Time from sending a streamed completion to its first token", ("operation",))
+LLM_TOKENS_PER_SECOND = registry.histogram(
+    "llm_tokens_per_second", "Streamed completion throughput after the first token", ("operation",),
+    buckets=(5, 10, 20, 40, 60, 80, 100, 150, 200, 300, 500))
+LLM_PROMPT_TOKENS = registry.histogram(
+    "llm_prompt_tokens", "Estimated prompt tokens sent per completion", ("operation",),
+    buckets=(100, 250, 500, 1000, 2000, 4000, 6000, 8000, 12000, 16000))
+
+# Spans recorded during the current HTTP request, for the access log line
+_current_trace: ContextVar[Optional[dict]] = ContextVar("current_trace", default=None)
+
+
+@contextmanager
+def span(stage: str, operation: str = ""):
+    """Time a pipeline stage into the stage histogram and the current request's trace"""
+    started = time.perf_counter()
+    try:
+        yield
+    except GeneratorExit:
+        raise
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage, operation=operation)
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_DURATION.observe(elapsed, stage=stage, operation=operation)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace["spans"].append({"stage": stage, "operation": operation, "ms": round(elapsed * 1000, 1)})
+
+
+class StreamTimer:
+    """Time-to-first-token and tokens/sec for a streamed LLM completion"""
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.started = time.perf_counter()
+        self.first_token_at: Optional[float] = None
+        self.tokens = 0
+
+    def token(self, text: str):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            LLM_TTFT.observe(self.first_token_at - self.started, operation=self.operation)
+        # Rough token count (about four characters per token)
+        self.tokens += max(1, (len(text) + 3) // 4)
+
+    def finish(self):
+        if self.first_token_at is None:
+            return
+        generation_time = time.perf_counter() - self.first_token_at
+        if generation_time > 0:
+            LLM_TOKENS_PER_SECOND.observe(self.tokens / generation_time, operation=self.operation)
+
+
+def start_trace(method: str, path: str) -> Tuple[dict, object]:
+    trace = {"request_id": uuid.uuid4().hex[:16], "method": method, "path": path, "spans": []}
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token):
+    _current_trace.reset(token)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep every WARNING and above, and a random fraction of lower-level records"""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno >= logging.WARNING or self.rate >= 1.0 or random.random() < self.rate
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        trace = _current_trace.get()
+        if trace is not None:
+            entry["request_id"] = trace["request_id"]
+        entry.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging():
+    """Leveled, sampled JSON logging configured from LOG_LEVEL / LOG_SAMPLE_RATE"""
+    logger = logging.getLogger("video_api")
+    if logger.handlers:
+        return logger
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter())
+    handler.addFilter(SamplingFilter(float(os.environ.get("LOG_SAMPLE_RATE", 1.0))))
+    logger.addHandler(handler)
+    logger.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+    logger.propagate = False
+    return logger
@@ -0,0 +1,191 @@
+# backend/jobs.py
+import asyncio
+import contextvars
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from storage import InMemoryRepository, Repository
+
+
+# Tavus statuses after which a video never changes again, plus our own "failed"
+TERMINAL_STATUSES = frozenset(["ready", "completed", "error", "failed", "deleted"])
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class QueueClosedError(Exception):
+    pass
+
+
+class JobStore:
+    """Video job records on top of a storage repository; records are plain dicts keyed by job_id"""
+
+    def __init__(self, repository: Optional[Repository] = None):
+        self.repository = repository or InMemoryRepository(id_field="job_id", time_field="submitted_at")
+
+    async def create(self, job: dict):
+        await self.repository.put(job)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await self.repository.get(job_id)
+
+    async def get_by_video_id(self, video_id: str) -> Optional[dict]:
+        jobs, _ = await self.repository.list(video_id=video_id, limit=1)
+        return jobs[0] if jobs else None
+
+    async def update(self, job_id: str, **fields) -> Optional[dict]:
+        job = await self.get(job_id)
+        if job is None:
+            return None
+        job.update(fields, updated_at=time.time())
+        await self.repository.put(job)
+        return job
+
+    async def in_progress(self) -> List[dict]:
+        """Jobs that reached Tavus and have not settled yet"""
+        jobs, _ = await self.repository.list(exclude_statuses=TERMINAL_STATUSES, limit=100_000)
+        return [job for job in jobs if job.get("video_id")]
+
+    async def list(self, status: Optional[str] = None, limit: int = 50, cursor: Optional[str] = None) -> Tuple[List[dict], Optional[str]]:
+        return await self.repository.list(status=status, limit=limit, cursor=cursor)
+
+    async def lookup(self, key: str) -> Optional[dict]:
+        """Find a job by its job id or by the Tavus video id"""
+        return await self.get(key) or await self.get_by_video_id(key)
+
+
+def new_job(payload: dict) -> dict:
+    return {
+        "job_id": uuid.uuid4().hex,
+        "video_id": None,
+        "video_name": payload.get("video_name"),
+        "script": payload.get("script"),
+        "status": "pending",
+        "hosted_url": None,
+        "created_at": None,
+        "error": None,
+        "submitted_at": time.time(),
+    }
+
+
+class VideoJobQueue:
+    """
+    Bounded queue plus a fixed pool of workers that submit videos to Tavus.
+
+    `submit` records the job and returns at once; when the queue is full it
+    raises QueueFullError so the route can push back on the client.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        handler: Callable[[dict], Awaitable[dict]],
+        concurrency: int = 4,
+        max_queue: int = 100,
+        on_update: Optional[Callable[[dict], None]] = None,
+    ):
+        self.store = store
+        self.handler = handler
+        self.on_update = on_update
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        # Set once shutdown starts; new submissions are refused
+        self.closed = False
+
+    @classmethod
+    def from_env(cls, store: JobStore, handler: Callable[[dict], Awaitable[dict]], on_update: Optional[Callable[[dict], None]] = None) -> "VideoJobQueue":
+        return cls(
+            store=store,
+            handler=handler,
+            concurrency=int(os.environ.get("VIDEO_JOB_CONCURRENCY", 4)),
+            max_queue=int(os.environ.get("VIDEO_JOB_QUEUE_SIZE", 100)),
+            on_update=on_update,
+        )
+
+    def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        # Workers outlive the request that started them, so give them a fresh context
+        self._workers = [
+            contextvars.Context().run(asyncio.create_task, self._worker())
+            for _ in range(self.concurrency)
+        ]
+
+    async def stop(self, drain: bool = True, timeout: Optional[float] = None):
+        """
+        Stop the workers, first letting them finish the queue when `drain` is
+        set (for at most `timeout` seconds). Jobs left unsubmitted are marked failed.
+        """
+        self.closed = True
+        if not self._workers:
+            return
+        if drain:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        while not self._queue.empty():
+            job_id, _ = self._queue.get_nowait()
+            await self._update(job_id, status="failed", error="Server shut down before the video was submitted")
+
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def submit(self, payload: dict) -> dict:
+        if self.closed:
+            raise QueueClosedError("Server is shutting down")
+        self.start()
+        if self._queue.full():
+            raise QueueFullError(f"Video queue is full ({self.max_queue} jobs waiting)")
+
+        job = new_job(payload)
+        await self.store.create(job)
+        try:
+            self._queue.put_nowait((job["job_id"], payload))
+        except asyncio.QueueFull:
+            # Another submit filled the queue while the record was being written
+            await self.store.update(job["job_id"], status="failed", error="Video queue is full")
+            raise QueueFullError(f"Video queue is full ({self.max_queue} jobs waiting)")
+        return job
+
+    async def _update(self, job_id: str, **fields):
+        job = await self.store.update(job_id, **fields)
+        if job is not None and self.on_update is not None:
+            self.on_update(job)
+
+    async def _worker(self):
+        while True:
+            job_id, payload = await self._queue.get()
+            try:
+                await self._update(job_id, status="submitting")
+                result = await self.handler(payload)
+                await self._update(
+                    job_id,
+                    video_id=result.get("video_id"),
+                    video_name=result.get("video_name"),
+                    status=result.get("status"),
+                    hosted_url=result.get("hosted_url"),
+                    created_at=result.get("created_at"),
+                )
+            except HTTPException as e:
+                await self._update(job_id, status="failed", error=str(e.detail))
+            except Exception as e:
+                await self._update(job_id, status="failed", error=str(e))
+            except asyncio.CancelledError:
+                await self._update(job_id, status="failed", error="Interrupted by shutdown; Tavus may still have created the video")
+                raise
+            finally:
+                self._queue.task_done()
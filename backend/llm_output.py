@@ -0,0 +1,357 @@
+# backend/llm_output.py
+import json
+import re
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+
+STRUCTURAL = re.compile(r'[{}\[\]",:]')
+STRING_SPECIAL = re.compile(r'["\\]')
+FENCE = re.compile(r"```[a-zA-Z]*")
+PYTHON_LITERALS = re.compile(r"\b(True|False|None)\b")
+
+# Tokens are merged into one chunk once this many have arrived, so a long
+# output is held as a few hundred strings rather than one object per token
+MERGE_CHUNKS = 64
+_INVALID = object()
+
+JSON_TYPES = {
+    "string": str,
+    "array": list,
+    "object": dict,
+    "boolean": bool,
+    "null": type(None),
+}
+
+
+def completion_text(result: dict) -> Optional[str]:
+    """The assistant text of a Llama completion: plain text, a text part, or a list of parts"""
+    message = result.get("completion_message") or {}
+    content = message.get("content")
+    if isinstance(content, str):
+        return content
+    if isinstance(content, dict):
+        return content.get("text")
+    if isinstance(content, list):
+        parts = [part.get("text", "") if isinstance(part, dict) else str(part) for part in content]
+        return "".join(parts)
+    return None
+
+
+def validate(value: Any, schema: dict, path: str = "$") -> List[str]:
+    """
+    Errors for `value` against the subset of JSON Schema used by response
+    formats here: type, properties, required and items.
+    """
+    errors = []
+    expected = schema.get("type")
+    if expected in ("number", "integer"):
+        ok = isinstance(value, (int, float)) and not isinstance(value, bool)
+        ok = ok and (expected == "number" or float(value).is_integer())
+    elif expected in JSON_TYPES:
+        ok = isinstance(value, JSON_TYPES[expected]) and not (expected != "boolean" and isinstance(value, bool))
+    else:
+        ok = True
+    if not ok:
+        return [f"{path}: expected {expected}, got {type(value).__name__}"]
+    if isinstance(value, dict):
+        properties = schema.get("properties", {})
+        for name in schema.get("required", ()):
+            if name not in value:
+                errors.append(f"{path}: missing required {name!r}")
+        for name, item in value.items():
+            if name in properties:
+                errors.extend(validate(item, properties[name], f"{path}.{name}"))
+    elif isinstance(value, list) and "items" in schema:
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema["items"], f"{path}[{i}]"))
+    return errors
+
+
+def repair_json(text: str) -> str:
+    """
+    Best-effort fix of the ways models break JSON: code fences and prose
+    around the object, Python literals, single-quoted strings, trailing commas,
+    and output cut off mid-document (open strings, arrays and objects are closed).
+    """
+    text = FENCE.sub("", text)
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if starts:
+        text = text[min(starts):]
+    out: List[str] = []
+    stack: List[str] = []
+    quote = None
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if quote:
+            if ch == "\\" and i + 1 < len(text):
+                nxt = text[i + 1]
+                # \' is only an escape inside single quotes, and means nothing in JSON
+                out.append(nxt if nxt == "'" else ch + nxt)
+                i += 2
+                continue
+            if ch == quote:
+                out.append('"')
+                quote = None
+            elif ch == '"':
+                out.append('\\"')
+            else:
+                out.append(ch)
+            i += 1
+            continue
+        if ch in "\"'":
+            quote = ch
+            out.append('"')
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+            out.append(ch)
+        elif ch in "}]":
+            _drop_trailing_comma(out)
+            if stack:
+                out.append(stack.pop())
+            if not stack:
+                break
+        else:
+            # Everything up to the next quote or bracket has no strings in it
+            end = i + 1
+            while end < len(text) and text[end] not in "\"'{}[]":
+                end += 1
+            out.append(PYTHON_LITERALS.sub(lambda m: {"True": "true", "False": "false", "None": "null"}[m.group()], text[i:end]))
+            i = end
+            continue
+        i += 1
+
+    if quote:
+        out.append('"')
+    if stack:
+        _drop_trailing_comma(out)
+        body = "".join(out).rstrip()
+        if body.endswith(":"):
+            body += " null"
+        elif stack[-1] == "}" and _ends_with_key(body):
+            body += ": null"
+        return body + "".join(reversed(stack))
+    return "".join(out).strip()
+
+
+def _drop_trailing_comma(out: List[str]):
+    while out and not out[-1].strip():
+        out.pop()
+    if out and out[-1].rstrip().endswith(","):
+        out[-1] = out[-1].rstrip()[:-1]
+
+
+def _ends_with_key(body: str) -> bool:
+    """Whether an object was cut off right after a key, as in '{"a": 1, "b"'"""
+    if not body.endswith('"'):
+        return False
+    i = len(body) - 2
+    while i >= 0 and not (body[i] == '"' and body[i - 1] != "\\"):
+        i -= 1
+    return body[:max(i, 0)].rstrip().endswith(("{", ","))
+
+
+def loads_lenient(text: str) -> Tuple[Any, bool]:
+    """Parse JSON, repairing it if needed; returns (value, repaired) and raises ValueError if it can't"""
+    try:
+        return json.loads(text, strict=False), False
+    except json.JSONDecodeError:
+        pass
+    try:
+        return json.loads(repair_json(text), strict=False), True
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Unparseable JSON output: {e}") from e
+
+
+class IncrementalJSONParser:
+    """
+    Parses a streamed JSON object as its text arrives.
+
+    Feed it completion tokens; it reports each top-level member as soon as its
+    value is complete, and each element of a top-level array as soon as that
+    element is, checking both against `schema`. Only the delimiters are
+    scanned in Python (regexes skip over string contents); each value is
+    decoded once by json.loads, and a top-level array is assembled from its
+    already decoded elements. Tokens are kept in a list, merged in batches and
+    joined per value, never concatenated onto one growing string.
+
+    Prose or a code fence before the object and anything after it are
+    ignored. A member that doesn't parse is repaired; if the document still
+    isn't valid, close() falls back to repairing the whole text.
+    """
+
+    def __init__(self, schema: Optional[dict] = None):
+        self.schema = schema or {}
+        self.value: Dict[str, Any] = {}
+        self.errors: List[str] = []
+        self.repaired = False
+        self.done = False
+        self._malformed = False
+        self._chunks: List[str] = []
+        self._offsets: List[int] = []
+        self._unmerged = 0
+        self._size = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escaped = False
+        self._member_start = 0
+        self._colon: Optional[int] = None
+        self._key: Optional[str] = None
+        self._item_start = 0
+        self._items: Optional[list] = None
+
+    def feed(self, chunk: str) -> List[Tuple[tuple, Any]]:
+        """Add text; returns (path, value) for every member or array element completed by it"""
+        if self.done or not chunk:
+            return []
+        base = self._size
+        chunks = self._chunks
+        chunks.append(chunk)
+        self._offsets.append(base)
+        self._size = base + len(chunk)
+        self._unmerged += 1
+        if self._unmerged >= MERGE_CHUNKS:
+            first = len(chunks) - MERGE_CHUNKS
+            chunks[first:] = ["".join(chunks[first:])]
+            del self._offsets[first + 1:]
+            self._unmerged = 0
+        events: List[Tuple[tuple, Any]] = []
+        i = 0
+        if self._escaped:
+            self._escaped = False
+            i = 1
+        end = len(chunk)
+        stack = self._stack
+        while i < end:
+            if self._in_string:
+                match = STRING_SPECIAL.search(chunk, i)
+                if match is None:
+                    break
+                i = match.end()
+                if match.group() == "\\":
+                    if i >= end:
+                        self._escaped = True
+                    i += 1
+                else:
+                    self._in_string = False
+                continue
+            match = STRUCTURAL.search(chunk, i)
+            if match is None:
+                break
+            ch = match.group()
+            pos = base + match.start()
+            i = match.end()
+            if not stack:
+                # Outside the object: skip prose until it opens
+                if ch == "{":
+                    stack.append(ch)
+                    self._member_start = pos + 1
+                continue
+            if ch == '"':
+                self._in_string = True
+            elif ch == "{" or ch == "[":
+                stack.append(ch)
+                if len(stack) == 2 and ch == "[":
+                    self._item_start = pos + 1
+                    self._items = []
+            elif ch == "}" or ch == "]":
+                if len(stack) == 2 and stack[-1] == "[":
+                    self._end_item(pos, events)
+                elif len(stack) == 1:
+                    self._end_member(pos, events)
+                    self.done = True
+                stack.pop()
+                if self.done:
+                    break
+            elif ch == ",":
+                if len(stack) == 1:
+                    self._end_member(pos, events)
+                    self._member_start = pos + 1
+                elif len(stack) == 2 and stack[-1] == "[":
+                    self._end_item(pos, events)
+                    self._item_start = pos + 1
+            elif ch == ":" and len(stack) == 1 and self._colon is None:
+                self._colon = pos
+        return events
+
+    def close(self) -> Any:
+        """The parsed document, repaired from the full text if streaming didn't yield a valid one"""
+        if not self.done or self._malformed:
+            text = self.text()
+            try:
+                self.value, _ = loads_lenient(text)
+            except ValueError:
+                if not self.value:
+                    raise
+            self.repaired = True
+        self.errors = validate(self.value, self.schema) if self.schema else []
+        return self.value
+
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def _slice(self, start: int, end: int) -> str:
+        first = bisect_right(self._offsets, start) - 1
+        last = bisect_right(self._offsets, end - 1) - 1 if end > start else first
+        if first == last:
+            offset = self._offsets[first]
+            return self._chunks[first][start - offset:end - offset]
+        text = "".join(self._chunks[first:last + 1])
+        offset = self._offsets[first]
+        return text[start - offset:end - offset]
+
+    def _decode(self, text: str) -> Any:
+        try:
+            value, repaired = loads_lenient(text)
+        except ValueError:
+            self._malformed = True
+            return _INVALID
+        self.repaired |= repaired
+        return value
+
+    def _current_key(self) -> Optional[str]:
+        if self._key is None and self._colon is not None:
+            key = self._decode(self._slice(self._member_start, self._colon).strip())
+            self._key = key if isinstance(key, str) else None
+        return self._key
+
+    def _property_schema(self, key: str) -> dict:
+        return self.schema.get("properties", {}).get(key, {})
+
+    def _end_item(self, pos: int, events: list):
+        text = self._slice(self._item_start, pos).strip()
+        if not text:
+            return
+        key = self._current_key()
+        value = self._decode(text)
+        if key is None or value is _INVALID:
+            return
+        index = len(self._items)
+        self._items.append(value)
+        items = self._property_schema(key).get("items")
+        if items:
+            self.errors.extend(validate(value, items, f"$.{key}[{index}]"))
+        events.append(((key, index), value))
+
+    def _end_member(self, pos: int, events: list):
+        if self._colon is None:
+            # An empty object or a trailing comma; anything else is malformed
+            if self._slice(self._member_start, pos).strip():
+                self._malformed = True
+            return
+        key = self._current_key()
+        if self._items is not None:
+            # The value was a top-level array whose elements are already decoded
+            value, self._items = self._items, None
+        else:
+            value = self._decode(self._slice(self._colon + 1, pos).strip())
+        self._colon = None
+        self._key = None
+        if key is None or self._malformed:
+            self._malformed = True
+            return
+        self.value[key] = value
+        schema = self._property_schema(key)
+        if schema:
+            self.errors.extend(validate(value, schema, f"$.{key}"))
+        events.append(((key,), value))
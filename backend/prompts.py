@@ -0,0 +1,110 @@
+# backend/prompts.py
+import os
+import re
+from pathlib import Path
+from string import Formatter
+from typing import Dict, List, Optional, Tuple
+
+PROMPT_DIR = Path(os.environ.get("PROMPT_DIR", Path(__file__).resolve().parent / "prompt"))
+
+SECTION_MARKER = re.compile(r"^<!-- (system|user) -->$", re.MULTILINE)
+COMMENT = re.compile(r"<!--.*?-->\n?", re.DOTALL)
+
+
+class CompiledText:
+    """A str.format-style template split once into literal text and field names"""
+
+    def __init__(self, source: str):
+        self.source = source
+        self.parts: List[Tuple[str, Optional[str]]] = []
+        for literal, field, spec, conversion in Formatter().parse(source):
+            if spec or conversion:
+                raise ValueError(f"Format specs are not supported in prompt templates: {{{field}}}")
+            self.parts.append((literal, field))
+        self.fields = frozenset(field for _, field in self.parts if field)
+
+    def render(self, values: Dict[str, Optional[str]]) -> str:
+        out = []
+        for literal, field in self.parts:
+            out.append(literal)
+            if field:
+                # Optional request fields arrive as None; they render as nothing
+                value = values[field]
+                out.append("" if value is None else str(value))
+        return "".join(out)
+
+
+class PromptTemplate:
+    """A system + user message pair loaded from a prompt/*.md file"""
+
+    def __init__(self, name: str, system: str, user: str):
+        self.name = name
+        self.system = CompiledText(system)
+        self.user = CompiledText(user)
+        self.fields = self.system.fields | self.user.fields
+
+    @classmethod
+    def parse(cls, name: str, text: str) -> "PromptTemplate":
+        sections = {}
+        matches = list(SECTION_MARKER.finditer(text))
+        for i, match in enumerate(matches):
+            end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+            sections[match.group(1)] = COMMENT.sub("", text[match.end():end]).strip("\n")
+        if "user" not in sections:
+            raise ValueError(f"Prompt template {name} has no <!-- user --> section")
+        return cls(name, sections.get("system", ""), sections["user"])
+
+    def render(self, **values: Optional[str]) -> List[dict]:
+        missing = self.fields - values.keys()
+        if missing:
+            raise KeyError(f"Prompt template {self.name} is missing values for {sorted(missing)}")
+        messages = []
+        if self.system.source:
+            messages.append({"role": "system", "content": self.system.render(values)})
+        messages.append({"role": "user", "content": self.user.render(values)})
+        return messages
+
+
+class PromptRegistry:
+    """
+    Every template in the prompt directory, parsed and compiled once.
+
+    `name.md` is the base template; `name.<style>.md` overrides it for that
+    style, e.g. script.scene.md for style "scene".
+    """
+
+    def __init__(self, directory: Path = PROMPT_DIR):
+        self.directory = Path(directory)
+        self.templates: Dict[str, PromptTemplate] = {}
+
+    def load(self) -> "PromptRegistry":
+        templates = {}
+        for path in sorted(self.directory.glob("*.md")):
+            templates[path.stem] = PromptTemplate.parse(path.stem, path.read_text(encoding="utf-8"))
+        self.templates = templates
+        return self
+
+    def get(self, name: str, style: Optional[str] = None) -> PromptTemplate:
+        if style:
+            variant = self.templates.get(f"{name}.{style.strip().lower()}")
+            if variant is not None:
+                return variant
+        try:
+            return self.templates[name]
+        except KeyError:
+            raise KeyError(f"No prompt template named {name} in {self.directory}")
+
+    def styles(self, name: str) -> List[str]:
+        prefix = f"{name}."
+        return [key[len(prefix):] for key in self.templates if key.startswith(prefix)]
+
+
+_registry: Optional[PromptRegistry] = None
+
+
+def get_prompts() -> PromptRegistry:
+    """Process-wide registry, loaded from disk on first use"""
+    global _registry
+    if _registry is None:
+        _registry = PromptRegistry().load()
+    return _registry
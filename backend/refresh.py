@@ -0,0 +1,89 @@
+# backend/refresh.py
+"""
+Refresh tracked product URLs, re-extracting only pages that meaningfully changed.
+
+    python refresh.py catalog.txt                # track and refresh the URLs in a file
+    python refresh.py                            # refresh every URL already tracked
+    python refresh.py catalog.txt --force        # re-extract everything
+
+The file has one URL per line; blank lines and lines starting with # are
+ignored. Tracked URLs, their validators, fingerprints and last extraction live
+in STORAGE_DB, by default DATA_DIR/video_api.db as for the API, so the next
+run, and the API, see what this one tracked. Prints one line per changed or failed URL and a
+summary with the LLM calls skipped; --json prints the summary as JSON.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from dotenv import load_dotenv
+
+
+def read_urls(path: str):
+    with open(path) as handle:
+        for line in handle:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                yield line
+
+
+async def refresh(args) -> dict:
+    # Imported late so .env is loaded before the modules read their settings
+    from app import Services
+    from admission import BATCH, set_request_class
+    from http_client import close_http_client
+    from tracking import summarize
+
+    set_request_class(tenant="refresh", priority=BATCH)
+
+    # The stores and Llama service only, without the web app or its job workers
+    services = Services.from_env()
+    if services.llama is None:
+        raise SystemExit("LLAMA_API_KEY is not set")
+    tracker = services.product_tracker
+    if args.urls:
+        urls = list(dict.fromkeys(read_urls(args.urls)))
+    else:
+        urls = [url async for url in tracker.tracked_urls()]
+
+    results = []
+    started = time.perf_counter()
+    try:
+        async for result in tracker.refresh_all(urls, force=args.force, concurrency=args.concurrency):
+            results.append(result)
+            if result["outcome"] in ("new", "changed", "error") and not args.json:
+                print(f"{result['outcome']:>8}  {result['url']}  {result['error'] or result['extraction_path'] or ''}")
+            if args.progress and len(results) % args.progress == 0:
+                print(f"{len(results)}/{len(urls)} refreshed", file=sys.stderr)
+    finally:
+        await close_http_client()
+        services.llama.product_cache.close()
+        services.storage.close()
+    return summarize(results, time.perf_counter() - started)
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("urls", nargs="?", help="file with one product URL per line; default: every tracked URL")
+    parser.add_argument("--concurrency", type=int, default=int(os.environ.get("TRACKING_CONCURRENCY", 32)))
+    parser.add_argument("--force", action="store_true", help="re-extract every page, ignoring validators and fingerprints")
+    parser.add_argument("--progress", type=int, default=0, help="report progress every N URLs on stderr")
+    parser.add_argument("--json", action="store_true", help="print only the summary, as JSON")
+    args = parser.parse_args()
+
+    summary = asyncio.run(refresh(args))
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    outcomes = ", ".join(f"{name} {count}" for name, count in sorted(summary["outcomes"].items()))
+    print(f"\n{summary['urls']} URLs in {summary['elapsed_s']} s ({summary['urls_per_s']}/s): {outcomes}")
+    print(f"extractions run: {summary['extractions']}, LLM calls made: {summary['llm_calls']}, "
+          f"LLM calls skipped: {summary['llm_calls_skipped']}")
+
+
+if __name__ == "__main__":
+    main()
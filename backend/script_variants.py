@@ -0,0 +1,122 @@
+# backend/script_variants.py
+import asyncio
+import os
+import re
+import time
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+
+from fastapi import HTTPException
+from pydantic import BaseModel
+
+# Speaking rate used to turn a script's word count into seconds of video
+WORDS_PER_MINUTE = float(os.environ.get("SCRIPT_WORDS_PER_MINUTE", 150))
+TARGET_SECONDS = float(os.environ.get("SCRIPT_TARGET_SECONDS", 60))
+MAX_VARIANTS = int(os.environ.get("SCRIPT_VARIANTS_MAX", 6))
+# Spread used when variants differ only by temperature
+DEFAULT_TEMPERATURES = (0.6, 0.8, 1.0, 0.7, 0.9, 1.1)
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:['.][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in is it its of on or per that the this to with your you".split()
+)
+
+
+class ScriptVariantsRequest(BaseModel):
+    product_description: str
+    key_features: List[str]
+    customer_info: Optional[str] = None
+    style: Optional[str] = "professional"
+    additional_suggestions: Optional[str] = None
+    # One variant per style; without styles, `count` variants of `style` at different temperatures
+    styles: Optional[List[str]] = None
+    temperatures: Optional[List[float]] = None
+    count: Optional[int] = 3
+    rank: Optional[bool] = True
+    stream: Optional[bool] = True
+
+
+def plan_variants(request: ScriptVariantsRequest) -> List[dict]:
+    """The (style, temperature) of each variant to generate"""
+    styles = request.styles or [request.style or "professional"] * (request.count or 1)
+    if not 1 <= len(styles) <= MAX_VARIANTS:
+        raise HTTPException(status_code=400, detail=f"Between 1 and {MAX_VARIANTS} variants can be generated at once")
+    temperatures = request.temperatures
+    # An empty list means no preference, like an empty `styles`
+    if not temperatures:
+        # Distinct styles already differ; repeated ones need a temperature spread to not all match
+        temperatures = [None] * len(styles) if len(set(styles)) == len(styles) else list(DEFAULT_TEMPERATURES)
+    return [
+        {"index": i, "style": style, "temperature": temperatures[i % len(temperatures)]}
+        for i, style in enumerate(styles)
+    ]
+
+
+def _words(text: str) -> List[str]:
+    return WORD_PATTERN.findall(text.lower())
+
+
+def score_script(script: str, key_features: List[str]) -> dict:
+    """
+    Heuristic quality score in [0, 1]: half for how close the spoken length is
+    to the target duration, half for how many key features the script mentions.
+    A feature counts as mentioned when most of its significant words appear.
+    """
+    words = _words(script)
+    seconds = len(words) / WORDS_PER_MINUTE * 60
+    length_fit = max(0.0, 1 - abs(seconds - TARGET_SECONDS) / TARGET_SECONDS)
+
+    vocabulary = set(words)
+    missing = []
+    for feature in key_features:
+        terms = [word for word in _words(feature) if word not in STOPWORDS and len(word) > 2]
+        if terms and sum(term in vocabulary for term in terms) / len(terms) < 0.5:
+            missing.append(feature)
+    coverage = 1 - len(missing) / len(key_features) if key_features else 1.0
+
+    return {
+        "score": round(0.5 * length_fit + 0.5 * coverage, 4),
+        "length_fit": round(length_fit, 4),
+        "feature_coverage": round(coverage, 4),
+        "words": len(words),
+        "estimated_seconds": round(seconds, 1),
+        "missing_features": missing,
+    }
+
+
+async def generate_variants(
+    variants: List[dict],
+    generate: Callable[[dict], Awaitable[dict]],
+    key_features: Optional[List[str]] = None,
+) -> AsyncIterator[dict]:
+    """
+    Run every variant's completion concurrently and yield each result as soon
+    as it finishes, scored when `key_features` is given. A failed variant is
+    reported with its error instead of failing the others.
+    """
+    async def run(variant: dict) -> dict:
+        started = time.perf_counter()
+        result = dict(variant)
+        try:
+            generated = await generate(variant)
+            result.update(status="completed", script=generated["script"], cached=generated.get("cached", False))
+            if key_features is not None:
+                result.update(score_script(generated["script"], key_features))
+        except HTTPException as e:
+            result.update(status="failed", error=str(e.detail))
+        except Exception as e:
+            result.update(status="failed", error=str(e))
+        result["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    tasks = [asyncio.create_task(run(variant)) for variant in variants]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def rank_variants(results: List[dict]) -> List[dict]:
+    """Completed variants best first, failures last"""
+    return sorted(results, key=lambda r: (r["status"] != "completed", -r.get("score", 0), r["index"]))
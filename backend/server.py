@@ -0,0 +1,69 @@
+# backend/server.py
+"""
+Production entry point: several uvicorn worker processes without auto-reload.
+
+    python server.py                 # WEB_CONCURRENCY workers, default one per core
+    WEB_CONCURRENCY=4 PORT=8080 python server.py
+
+On SIGTERM each worker stops accepting connections, lets in-flight requests
+(streams, campaigns) finish for up to GRACEFUL_TIMEOUT seconds, then drains
+queued video jobs in its lifespan shutdown before exiting.
+
+Workers only share state through SQLite. The job store is always a file in
+DATA_DIR unless STORAGE_DB says otherwise; with more than one worker the
+caches default to files there too.
+"""
+import os
+
+import uvicorn
+from dotenv import load_dotenv
+
+from instrumentation import configure_logging
+
+
+def worker_count() -> int:
+    configured = os.environ.get("WEB_CONCURRENCY")
+    return max(1, int(configured)) if configured else os.cpu_count() or 1
+
+
+def share_state_between_workers(workers: int):
+    """Point the per-process caches at shared SQLite files unless configured explicitly"""
+    if workers <= 1:
+        return
+    data_dir = os.environ.get("DATA_DIR", "data")
+    os.makedirs(data_dir, exist_ok=True)
+    for name, filename in (
+        ("PRODUCT_CACHE_DB", "product_cache.db"),
+        ("SCRIPT_CACHE_DB", "script_cache.db"),
+    ):
+        os.environ.setdefault(name, os.path.join(data_dir, filename))
+
+
+def main():
+    load_dotenv()
+    logger = configure_logging()
+    workers = worker_count()
+    share_state_between_workers(workers)
+    host = os.environ.get("HOST", "0.0.0.0")
+    port = int(os.environ.get("PORT", 8000))
+    logger.info("Starting production server", extra={"fields": {
+        "workers": workers,
+        "host": host,
+        "port": port,
+        "storage_db": os.environ.get("STORAGE_DB"),
+    }})
+    uvicorn.run(
+        "app:app",
+        host=host,
+        port=port,
+        workers=workers,
+        reload=False,
+        access_log=False,
+        proxy_headers=True,
+        timeout_keep_alive=int(os.environ.get("KEEPALIVE_TIMEOUT", 5)),
+        timeout_graceful_shutdown=int(os.environ.get("GRACEFUL_TIMEOUT", 30)),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# backend/sse.py
+import json
+from typing import Iterator, List, Optional
+
+
+class ServerSentEvent:
+    __slots__ = ("event", "data", "id", "retry")
+
+    def __init__(self, event: str = "message", data: str = "", id: Optional[str] = None, retry: Optional[int] = None):
+        self.event = event
+        self.data = data
+        self.id = id
+        self.retry = retry
+
+    def json(self):
+        return json.loads(self.data)
+
+    def __repr__(self):
+        return f"ServerSentEvent(event={self.event!r}, data={self.data!r})"
+
+
+class SSEParser:
+    """
+    Incremental text/event-stream parser.
+
+    Feed it decoded chunks exactly as they arrive off the socket; it yields each
+    event once its terminating blank line has been seen. Partial lines are kept
+    until the next chunk, and multi-line `data:` fields are joined with newlines
+    as the spec requires.
+    """
+
+    def __init__(self):
+        self._pending = ""
+        self._event = ""
+        self._data: List[str] = []
+        self._id: Optional[str] = None
+        self._retry: Optional[int] = None
+
+    def feed(self, chunk: str) -> Iterator[ServerSentEvent]:
+        if self._pending:
+            chunk = self._pending + chunk
+            self._pending = ""
+
+        start = 0
+        length = len(chunk)
+        while start < length:
+            end = chunk.find("\n", start)
+            cr = chunk.find("\r", start, end if end != -1 else length)
+            if cr != -1:
+                # A trailing \r may be the first half of a \r\n split across chunks
+                if cr == length - 1:
+                    break
+                end = cr
+            if end == -1:
+                break
+            event = self._process_line(chunk[start:end])
+            if event is not None:
+                yield event
+            start = end + 2 if chunk.startswith("\r\n", end) else end + 1
+
+        if start < length:
+            self._pending = chunk[start:]
+
+    def flush(self) -> Iterator[ServerSentEvent]:
+        """Dispatch whatever is buffered once the stream has ended"""
+        if self._pending:
+            event = self._process_line(self._pending)
+            self._pending = ""
+            if event is not None:
+                yield event
+        event = self._dispatch()
+        if event is not None:
+            yield event
+
+    def _process_line(self, line: str) -> Optional[ServerSentEvent]:
+        if not line:
+            return self._dispatch()
+        if line.startswith(":"):
+            return None
+
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+
+        if field == "data":
+            self._data.append(value)
+        elif field == "event":
+            self._event = value
+        elif field == "id":
+            self._id = value
+        elif field == "retry" and value.isdigit():
+            self._retry = int(value)
+        return None
+
+    def _dispatch(self) -> Optional[ServerSentEvent]:
+        if not self._data and not self._event:
+            return None
+        event = ServerSentEvent(
+            event=self._event or "message",
+            data="\n".join(self._data),
+            id=self._id,
+            retry=self._retry,
+        )
+        self._event = ""
+        self._data = []
+        self._retry = None
+        return event
+
+
+def format_sse(data, event: Optional[str] = None) -> str:
+    """Serialize a payload as a single server-sent event"""
+    if not isinstance(data, str):
+        data = json.dumps(data)
+    lines = [f"event: {event}"] if event else []
+    lines.extend(f"data: {line}" for line in data.split("\n"))
+    return "\n".join(lines) + "\n\n"
@@ -0,0 +1,322 @@
+# backend/storage.py
+import asyncio
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional, Tuple
+
+# STORAGE_DB value that opts into in-process storage
+MEMORY = ":memory:"
+
+
+def encode_cursor(created_at: float, record_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([created_at, record_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        created_at, record_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(created_at), str(record_id)
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+
+
+class Repository(ABC):
+    """
+    Records of one kind, stored as plain dicts.
+
+    Every record has an id, and may carry a video_id and a status; those and
+    its creation time are indexed for lookups, filtering and newest-first
+    pagination.
+    """
+
+    def __init__(self, id_field: str = "id", time_field: str = "created_at"):
+        self.id_field = id_field
+        self.time_field = time_field
+
+    def _created_at(self, record: dict) -> float:
+        value = record.get(self.time_field)
+        return float(value) if isinstance(value, (int, float)) else time.time()
+
+    @abstractmethod
+    async def put(self, record: dict):
+        ...
+
+    @abstractmethod
+    async def get(self, record_id: str) -> Optional[dict]:
+        ...
+
+    @abstractmethod
+    async def list(
+        self,
+        status: Optional[str] = None,
+        video_id: Optional[str] = None,
+        exclude_statuses: Iterable[str] = (),
+        limit: int = 50,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Newest first; returns (records, cursor for the next page or None)"""
+
+    @abstractmethod
+    async def purge(self, older_than: float, statuses: Optional[Iterable[str]] = None, max_records: Optional[int] = None) -> int:
+        """
+        Delete records created before `older_than` (a unix time), then all but
+        the newest `max_records`. With `statuses`, only records in those
+        statuses are eligible (and counted). Returns how many were deleted.
+        """
+
+    @abstractmethod
+    async def count(self) -> int:
+        ...
+
+    def close(self):
+        pass
+
+
+class InMemoryRepository(Repository):
+    def __init__(self, id_field: str = "id", time_field: str = "created_at"):
+        super().__init__(id_field, time_field)
+        self._records = {}
+        self._by_video_id = {}
+
+    async def put(self, record: dict):
+        record_id = record[self.id_field]
+        previous = self._records.get(record_id)
+        if previous is not None and previous[1].get("video_id") != record.get("video_id"):
+            self._by_video_id.get(previous[1].get("video_id"), set()).discard(record_id)
+        self._records[record_id] = (self._created_at(record), dict(record))
+        if record.get("video_id"):
+            self._by_video_id.setdefault(record["video_id"], set()).add(record_id)
+
+    async def get(self, record_id: str) -> Optional[dict]:
+        entry = self._records.get(record_id)
+        return dict(entry[1]) if entry else None
+
+    def _sorted(self, statuses: Optional[Iterable[str]] = None, video_id: Optional[str] = None) -> List[Tuple[float, str, dict]]:
+        statuses = set(statuses) if statuses is not None else None
+        ids = self._by_video_id.get(video_id, ()) if video_id is not None else self._records
+        entries = [
+            (self._records[record_id][0], record_id, self._records[record_id][1]) for record_id in ids
+            if statuses is None or self._records[record_id][1].get("status") in statuses
+        ]
+        entries.sort(key=lambda entry: (entry[0], entry[1]), reverse=True)
+        return entries
+
+    async def list(self, status=None, video_id=None, exclude_statuses=(), limit=50, cursor=None):
+        exclude = set(exclude_statuses)
+        after = decode_cursor(cursor) if cursor else None
+        page = []
+        for created_at, record_id, record in self._sorted(video_id=video_id):
+            if after is not None and (created_at, record_id) >= after:
+                continue
+            if status is not None and record.get("status") != status:
+                continue
+            if video_id is not None and record.get("video_id") != video_id:
+                continue
+            if record.get("status") in exclude:
+                continue
+            page.append((created_at, record_id, record))
+            if len(page) > limit:
+                break
+        next_cursor = encode_cursor(*page[limit - 1][:2]) if len(page) > limit else None
+        return [dict(record) for _, _, record in page[:limit]], next_cursor
+
+    async def purge(self, older_than, statuses=None, max_records=None):
+        eligible = self._sorted(statuses)
+        doomed = {record_id for created_at, record_id, _ in eligible if created_at < older_than}
+        if max_records is not None:
+            survivors = [record_id for _, record_id, _ in eligible if record_id not in doomed]
+            doomed.update(survivors[max_records:])
+        for record_id in doomed:
+            _, record = self._records.pop(record_id)
+            self._by_video_id.get(record.get("video_id"), set()).discard(record_id)
+        return len(doomed)
+
+    async def count(self) -> int:
+        return len(self._records)
+
+
+class SQLiteDatabase:
+    """
+    One SQLite file in WAL mode shared by several repositories.
+
+    Each thread gets its own connection, so reads run concurrently with each
+    other and with the single writer instead of queueing behind one lock.
+    """
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._lock = threading.Lock()
+        with self.connection() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=self.busy_timeout_ms / 1000)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections = []
+        self._local = threading.local()
+
+
+class SQLiteRepository(Repository):
+    def __init__(self, db: SQLiteDatabase, table: str, id_field: str = "id", time_field: str = "created_at"):
+        super().__init__(id_field, time_field)
+        self.db = db
+        self.table = table
+        with db.connection() as conn:
+            self._create(conn)
+
+    def _create(self, conn: sqlite3.Connection):
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            "id TEXT PRIMARY KEY, video_id TEXT, status TEXT, created_at REAL NOT NULL, "
+            "updated_at REAL NOT NULL, record TEXT NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_video_id ON {self.table} (video_id)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_status ON {self.table} (status, created_at)")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{self.table}_created_at ON {self.table} (created_at)")
+
+    def _put(self, record: dict):
+        with self.db.connection() as conn:
+            conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (id, video_id, status, created_at, updated_at, record) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    record[self.id_field],
+                    record.get("video_id"),
+                    record.get("status"),
+                    self._created_at(record),
+                    record.get("updated_at") or time.time(),
+                    json.dumps(record),
+                ),
+            )
+
+    def _get(self, record_id: str) -> Optional[dict]:
+        row = self.db.connection().execute(f"SELECT record FROM {self.table} WHERE id = ?", (record_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _list(self, status, video_id, exclude_statuses, limit, cursor):
+        clauses, params = [], []
+        if status is not None:
+            clauses.append("status = ?")
+            params.append(status)
+        if video_id is not None:
+            clauses.append("video_id = ?")
+            params.append(video_id)
+        exclude = list(exclude_statuses)
+        if exclude:
+            clauses.append(f"coalesce(status, '') NOT IN ({','.join('?' * len(exclude))})")
+            params.extend(exclude)
+        if cursor:
+            created_at, record_id = decode_cursor(cursor)
+            clauses.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params.extend([created_at, created_at, record_id])
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self.db.connection().execute(
+            f"SELECT created_at, id, record FROM {self.table} {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+            (*params, limit + 1),
+        ).fetchall()
+        next_cursor = encode_cursor(rows[limit - 1][0], rows[limit - 1][1]) if len(rows) > limit else None
+        return [json.loads(row[2]) for row in rows[:limit]], next_cursor
+
+    def _purge(self, older_than, statuses, max_records) -> int:
+        status_clause, params = "", []
+        if statuses is not None:
+            statuses = list(statuses)
+            status_clause = f" AND status IN ({','.join('?' * len(statuses))})"
+            params = statuses
+        with self.db.connection() as conn:
+            deleted = conn.execute(
+                f"DELETE FROM {self.table} WHERE created_at < ?{status_clause}", (older_than, *params)
+            ).rowcount
+            if max_records is not None:
+                deleted += conn.execute(
+                    f"DELETE FROM {self.table} WHERE id IN ("
+                    f"SELECT id FROM {self.table} WHERE 1 = 1{status_clause} "
+                    "ORDER BY created_at DESC, id DESC LIMIT -1 OFFSET ?)",
+                    (*params, max_records),
+                ).rowcount
+        return deleted
+
+    async def put(self, record: dict):
+        await asyncio.to_thread(self._put, record)
+
+    async def get(self, record_id: str) -> Optional[dict]:
+        return await asyncio.to_thread(self._get, record_id)
+
+    async def list(self, status=None, video_id=None, exclude_statuses=(), limit=50, cursor=None):
+        return await asyncio.to_thread(self._list, status, video_id, exclude_statuses, limit, cursor)
+
+    async def purge(self, older_than, statuses=None, max_records=None):
+        return await asyncio.to_thread(self._purge, older_than, statuses, max_records)
+
+    async def count(self) -> int:
+        return await asyncio.to_thread(
+            lambda: self.db.connection().execute(f"SELECT count(*) FROM {self.table}").fetchone()[0]
+        )
+
+
+class Storage:
+    """
+    Video jobs, generated scripts, product extractions and tracked product URLs.
+
+    Backed by one SQLite file, STORAGE_DB (or the older VIDEO_JOB_DB) and by
+    default DATA_DIR/video_api.db, so records survive restarts and are shared
+    between workers and refresh.py. STORAGE_DB=:memory: keeps them in process
+    memory instead.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.db = SQLiteDatabase(path) if path else None
+        self.videos = self._repository("video_jobs", id_field="job_id", time_field="submitted_at")
+        self.scripts = self._repository("scripts")
+        self.extractions = self._repository("extractions")
+        # Kept until removed; not subject to the retention purge
+        self.tracked = self._repository("tracked_urls", id_field="url")
+
+    @classmethod
+    def from_env(cls) -> "Storage":
+        path = os.environ.get("STORAGE_DB") or os.environ.get("VIDEO_JOB_DB")
+        if path == MEMORY:
+            return cls()
+        if not path:
+            data_dir = os.environ.get("DATA_DIR", "data")
+            os.makedirs(data_dir, exist_ok=True)
+            path = os.path.join(data_dir, "video_api.db")
+        return cls(path)
+
+    def _repository(self, table: str, id_field: str = "id", time_field: str = "created_at") -> Repository:
+        if self.db is None:
+            return InMemoryRepository(id_field, time_field)
+        return SQLiteRepository(self.db, table, id_field, time_field)
+
+    async def purge(self, retention: float, max_records: Optional[int] = None, video_statuses: Optional[Iterable[str]] = None) -> dict:
+        """Drop records older than `retention` seconds; only videos in `video_statuses` are eligible"""
+        older_than = time.time() - retention
+        return {
+            "videos": await self.videos.purge(older_than, video_statuses, max_records),
+            "scripts": await self.scripts.purge(older_than, max_records=max_records),
+            "extractions": await self.extractions.purge(older_than, max_records=max_records),
+        }
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
@@ -0,0 +1,206 @@
+# backend/structured_data.py
+import json
+import os
+from typing import Iterator, List, Optional, Tuple
+from urllib.parse import urljoin
+
+from html_extract import PageExtract
+
+# How much the structured data must cover before the LLM call is skipped
+MIN_DESCRIPTION_CHARS = int(os.environ.get("STRUCTURED_MIN_DESCRIPTION_CHARS", 40))
+MIN_FEATURES = int(os.environ.get("STRUCTURED_MIN_FEATURES", 3))
+
+PRODUCT_TYPES = {"Product", "ProductGroup", "IndividualProduct", "ProductModel"}
+
+
+def _iter_nodes(data) -> Iterator[dict]:
+    if isinstance(data, list):
+        for item in data:
+            yield from _iter_nodes(item)
+    elif isinstance(data, dict):
+        yield data
+        for key in ("@graph", "mainEntity", "itemListElement"):
+            if key in data:
+                yield from _iter_nodes(data[key])
+
+
+def _is_product(node: dict) -> bool:
+    types = node.get("@type")
+    types = types if isinstance(types, list) else [types]
+    return any(str(t).rsplit("/", 1)[-1] in PRODUCT_TYPES for t in types if t)
+
+
+def _text(value) -> str:
+    if isinstance(value, list):
+        value = value[0] if value else ""
+    if isinstance(value, dict):
+        value = value.get("name") or value.get("@value") or ""
+    return " ".join(str(value).split()) if value is not None else ""
+
+
+def _images(value) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [value]
+    if isinstance(value, dict):
+        url = value.get("url") or value.get("contentUrl")
+        return [url] if isinstance(url, str) else []
+    if isinstance(value, list):
+        return [url for item in value for url in _images(item)]
+    return []
+
+
+def _features(node: dict) -> Tuple[List[str], List[str]]:
+    """
+    (descriptive, supplementary) feature lines. Only descriptive ones say what
+    the product is; brand, price and rating are kept as supplementary lines
+    that go after whatever features the product has.
+    """
+    features = []
+    for key, label in (("color", "Color"), ("material", "Material"), ("size", "Size")):
+        value = _text(node.get(key))
+        if value:
+            features.append(f"{label}: {value}")
+
+    properties = node.get("additionalProperty") or []
+    for prop in properties if isinstance(properties, list) else [properties]:
+        if isinstance(prop, dict) and prop.get("name") and prop.get("value") not in (None, ""):
+            features.append(f"{_text(prop['name'])}: {_text(prop['value'])}")
+
+    supplementary = []
+    brand = _text(node.get("brand"))
+    if brand:
+        supplementary.append(f"Brand: {brand}")
+
+    offers = node.get("offers")
+    offer = offers[0] if isinstance(offers, list) and offers else offers
+    if isinstance(offer, dict):
+        price = offer.get("price") or offer.get("lowPrice")
+        if price not in (None, ""):
+            supplementary.append(f"Price: {price} {_text(offer.get('priceCurrency'))}".strip())
+
+    rating = node.get("aggregateRating")
+    if isinstance(rating, dict) and rating.get("ratingValue"):
+        best = rating.get("bestRating") or 5
+        count = rating.get("reviewCount") or rating.get("ratingCount")
+        summary = f"Rated {rating['ratingValue']} out of {best}"
+        supplementary.append(f"{summary} ({count} reviews)" if count else summary)
+    return features, supplementary
+
+
+def _from_json_ld(page: PageExtract) -> Optional[dict]:
+    for raw in page.json_ld:
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            continue
+        for node in _iter_nodes(data):
+            if _is_product(node):
+                return {
+                    "name": _text(node.get("name")),
+                    "description": _text(node.get("description")),
+                    "images": _images(node.get("image")),
+                    "features": _features(node),
+                }
+    return None
+
+
+def _from_microdata(page: PageExtract) -> Optional[dict]:
+    if not any(t.rstrip("/").rsplit("/", 1)[-1] in PRODUCT_TYPES for t in page.item_types):
+        return None
+    props = page.microdata
+    node = {key: values[0] for key, values in props.items() if values}
+    node["offers"] = {"price": node.get("price") or node.get("lowPrice"), "priceCurrency": node.get("priceCurrency")}
+    if node.get("ratingValue"):
+        node["aggregateRating"] = {
+            "ratingValue": node["ratingValue"],
+            "bestRating": node.get("bestRating"),
+            "reviewCount": node.get("reviewCount") or node.get("ratingCount"),
+        }
+    return {
+        "name": node.get("name", ""),
+        "description": node.get("description", ""),
+        "images": props.get("image", []),
+        "features": _features(node),
+    }
+
+
+def _from_opengraph(page: PageExtract) -> Optional[dict]:
+    meta = page.meta
+    if meta.get("og:type", "").lower() not in ("product", "og:product") and "product:price:amount" not in meta:
+        return None
+    node = {"offers": {"price": meta.get("product:price:amount"), "priceCurrency": meta.get("product:price:currency")}}
+    return {
+        "name": meta.get("og:title", ""),
+        "description": meta.get("og:description", ""),
+        "images": [meta["og:image"]] if meta.get("og:image") else [],
+        "features": _features(node),
+    }
+
+
+def extract_structured_product(page: PageExtract, base_url: str = "") -> Tuple[Optional[dict], List[str], List[str]]:
+    """
+    Build product details from JSON-LD, microdata and OpenGraph markup.
+
+    Returns (details, missing, supplementary) where details is shaped like
+    ProductDetailsResponse and missing lists the required fields the markup
+    could not fill well enough. Only descriptive features (color, material,
+    additionalProperty...) count toward MIN_FEATURES; brand, price and rating
+    lines are returned as supplementary and already appended to key_features
+    when nothing is missing. Details is None when the page has no product
+    markup at all. Relative image URLs are resolved against base_url.
+    """
+    sources = [source for source in (_from_json_ld(page), _from_microdata(page), _from_opengraph(page)) if source]
+    if not sources:
+        return None, ["product_description", "key_features"], []
+
+    # Earlier sources win; later ones only fill gaps
+    name = next((s["name"] for s in sources if s["name"]), "")
+    description = next((s["description"] for s in sources if s["description"]), "")
+    images = [urljoin(base_url, image) for image in next((s["images"] for s in sources if s["images"]), [])]
+    features, supplementary = [], []
+    for source in sources:
+        descriptive, extra = source["features"]
+        features.extend(feature for feature in descriptive if feature not in features)
+        supplementary.extend(line for line in extra if line not in supplementary)
+
+    if name and name.lower() not in description.lower():
+        description = f"{name}. {description}" if description else name
+
+    missing = []
+    if len(description) < MIN_DESCRIPTION_CHARS:
+        missing.append("product_description")
+    if len(features) < MIN_FEATURES:
+        missing.append("key_features")
+
+    details = {
+        "product_description": description,
+        "key_features": features if "key_features" in missing else features + supplementary,
+        "target_audience": "",
+        "product_images": images,
+        "status": "completed",
+    }
+    return details, missing, supplementary
+
+
+def merge_product_details(structured: dict, llm: dict, missing: List[str], supplementary: List[str]) -> dict:
+    """
+    Fill gaps in structured details from an LLM extraction; markup wins where
+    it was sufficient. Supplementary lines (brand, price, rating) go after the
+    LLM's features when key_features was missing.
+    """
+    merged = dict(structured)
+    if "product_description" in missing and llm.get("product_description"):
+        merged["product_description"] = llm["product_description"]
+    if "key_features" in missing:
+        features = list(structured["key_features"])
+        for feature in llm.get("key_features", []) + supplementary:
+            if feature not in features:
+                features.append(feature)
+        merged["key_features"] = features
+    if not merged.get("target_audience"):
+        merged["target_audience"] = llm.get("target_audience", "")
+    if not merged.get("product_images"):
+        merged["product_images"] = llm.get("product_images", [])
+    return merged
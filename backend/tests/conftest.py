@@ -0,0 +1,6 @@
+# backend/tests/conftest.py
+import sys
+from pathlib import Path
+
+# Modules import each other as siblings, as when run from backend/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
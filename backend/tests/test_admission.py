@@ -0,0 +1,180 @@
+# backend/tests/test_admission.py
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from admission import BATCH, INTERACTIVE, AdmissionController, AdmissionRejected, AimdLimit, set_request_class
+
+
+def single_slot(**kwargs) -> AdmissionController:
+    return AdmissionController("test", limit=AimdLimit(initial=1, minimum=1, maximum=1), **kwargs)
+
+
+async def call(controller: AdmissionController, name: str, order: list, tenant: str = "t", priority: str = INTERACTIVE, release: asyncio.Event = None):
+    set_request_class(tenant, priority)
+    async with controller.slot("op"):
+        order.append(name)
+        if release is not None:
+            await release.wait()
+
+
+async def queue_behind_holder(controller: AdmissionController, calls, order: list):
+    """Start one call holding the only slot, then queue `calls` ((name, tenant, priority)) in order"""
+    release = asyncio.Event()
+    holder = asyncio.create_task(call(controller, "holder", order, release=release))
+    await asyncio.sleep(0)
+    tasks = []
+    for name, tenant, priority in calls:
+        tasks.append(asyncio.create_task(call(controller, name, order, tenant, priority)))
+        await asyncio.sleep(0)
+    return holder, release, tasks
+
+
+def test_limit_grows_while_saturated_and_latency_holds():
+    limit = AimdLimit(initial=4, maximum=64)
+    for _ in range(10):
+        limit.on_success("op", 0.1, time.monotonic(), saturated=True)
+    assert 6 < limit.value < 7
+
+
+def test_limit_does_not_grow_without_waiting_calls():
+    limit = AimdLimit(initial=4)
+    for _ in range(10):
+        limit.on_success("op", 0.1, time.monotonic(), saturated=False)
+    assert limit.value == 4
+
+
+def test_limit_backs_off_when_latency_climbs():
+    limit = AimdLimit(initial=10, maximum=10, tolerance=1.5, backoff=0.5)
+    for _ in range(100):
+        limit.on_success("op", 0.1, time.monotonic(), saturated=True)
+    assert limit.value == 10
+    limit.on_success("op", 1.0, time.monotonic(), saturated=True)
+    assert limit.value == 5
+
+
+def test_one_overload_burst_cuts_once():
+    limit = AimdLimit(initial=16, minimum=2, backoff=0.5)
+    started = time.monotonic()
+    limit.on_overload(started)
+    limit.on_overload(started)
+    assert limit.value == 8
+    limit.on_overload(time.monotonic())
+    assert limit.value == 4
+    for _ in range(5):
+        limit.on_overload(time.monotonic())
+    assert limit.value == 2 and limit.capacity == 2
+
+
+def test_tenants_are_served_round_robin():
+    async def main():
+        controller, order = single_slot(), []
+        calls = [("a1", "a", INTERACTIVE), ("a2", "a", INTERACTIVE), ("a3", "a", INTERACTIVE),
+                 ("b1", "b", INTERACTIVE), ("c1", "c", INTERACTIVE)]
+        holder, release, tasks = await queue_behind_holder(controller, calls, order)
+        assert controller.stats()["queued_by_tenant"][INTERACTIVE] == {"a": 3, "b": 1, "c": 1}
+        release.set()
+        await asyncio.gather(holder, *tasks)
+        return order
+
+    assert asyncio.run(main()) == ["holder", "a1", "b1", "c1", "a2", "a3"]
+
+
+def test_batch_gets_a_turn_after_interactive_share():
+    async def main():
+        controller, order = single_slot(interactive_share=2), []
+        calls = [("b1", "t", BATCH), ("b2", "t", BATCH)] + [(f"i{n}", "t", INTERACTIVE) for n in range(1, 6)]
+        holder, release, tasks = await queue_behind_holder(controller, calls, order)
+        release.set()
+        await asyncio.gather(holder, *tasks)
+        return order
+
+    assert asyncio.run(main()) == ["holder", "i1", "i2", "b1", "i3", "i4", "b2", "i5"]
+
+
+def test_cancelled_while_queued_leaves_the_queue():
+    async def main():
+        controller, order = single_slot(), []
+        holder, release, [waiter] = await queue_behind_holder(controller, [("w", "t", INTERACTIVE)], order)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert controller.stats()["queued"] == {INTERACTIVE: 0, BATCH: 0}
+        release.set()
+        await holder
+        return controller, order
+
+    controller, order = asyncio.run(main())
+    assert order == ["holder"]
+    assert controller.in_flight == 0
+
+
+def test_granted_then_cancelled_releases_the_slot():
+    async def main():
+        controller, order = single_slot(), []
+        await controller._acquire("t", INTERACTIVE)
+        waiter = asyncio.create_task(call(controller, "granted", order))
+        await asyncio.sleep(0)
+        later = asyncio.create_task(call(controller, "later", order))
+        await asyncio.sleep(0)
+        # Hand the slot to the waiter, then cancel it before it resumes
+        controller._release(None)
+        assert controller.in_flight == 1
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await later
+        return controller, order
+
+    controller, order = asyncio.run(main())
+    assert order == ["later"]
+    assert controller.in_flight == 0
+
+
+def test_full_queue_answers_429_with_queue_position():
+    controller = single_slot(max_queue=2)
+    api = FastAPI()
+
+    @api.post("/call")
+    async def endpoint():
+        async with controller.slot("op"):
+            return {"ok": True}
+
+    async def main():
+        order = []
+        calls = [("q1", "a", INTERACTIVE), ("q2", "b", INTERACTIVE)]
+        holder, release, tasks = await queue_behind_holder(controller, calls, order)
+        transport = httpx.ASGITransport(app=api)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            response = await client.post("/call")
+        release.set()
+        await asyncio.gather(holder, *tasks)
+        return response
+
+    response = asyncio.run(main())
+    assert response.status_code == 429
+    assert response.headers["x-queue-position"] == "3"
+    assert int(response.headers["retry-after"]) >= 1
+    assert "queue_full" in response.json()["detail"]
+
+
+def test_tenant_share_of_the_queue_is_capped():
+    async def main():
+        controller, order = single_slot(max_queue_per_tenant=1), []
+        holder, release, tasks = await queue_behind_holder(controller, [("a1", "a", INTERACTIVE)], order)
+        with pytest.raises(AdmissionRejected) as rejected:
+            await call(controller, "a2", order, tenant="a")
+        # Other tenants still get in line
+        other = asyncio.create_task(call(controller, "b1", order, tenant="b"))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(holder, *tasks, other)
+        return rejected.value, order
+
+    rejected, order = asyncio.run(main())
+    assert order == ["holder", "a1", "b1"]
+    assert rejected.status_code == 429 and rejected.reason == "tenant_queue_full"
+    assert rejected.headers["X-Queue-Position"] == "2"
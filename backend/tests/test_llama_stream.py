@@ -0,0 +1,49 @@
+# backend/tests/test_llama_stream.py
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import httpx
+
+from storage import Storage
+
+
+def progress(text: str) -> str:
+    return "data: " + json.dumps({"event": {"event_type": "progress", "delta": {"text": text}}})
+
+
+class FakeStreamClient:
+    """Stands in for HttpClient, answering every stream with the same SSE body"""
+
+    def __init__(self, body: str):
+        self.body = body
+
+    @asynccontextmanager
+    async def stream(self, method, url, **kwargs):
+        yield httpx.Response(200, content=self.body.encode(), headers={"Content-Type": "text/event-stream"})
+
+
+def stream_tokens(monkeypatch, body: str):
+    monkeypatch.setenv("LLAMA_API_KEY", "test")
+    from app import LlamaService
+
+    service = LlamaService(Storage())
+    service.upstream._client = FakeStreamClient(body)
+
+    async def run():
+        payload = {"messages": [{"role": "user", "content": "Write a script"}]}
+        return [token async for token in service._stream_completion(payload)]
+
+    return asyncio.run(run())
+
+
+def test_last_event_without_blank_line_is_kept(monkeypatch):
+    # The upstream closes right after the last data: line
+    body = progress("Meet ") + "\n\n" + progress("the shoe.")
+    assert stream_tokens(monkeypatch, body) == ["Meet ", "the shoe."]
+
+
+def test_stream_stops_at_complete(monkeypatch):
+    complete = "data: " + json.dumps({"event": {"event_type": "complete"}})
+    body = "\n\n".join([progress("Meet "), complete, progress("ignored")]) + "\n\n"
+    assert stream_tokens(monkeypatch, body) == ["Meet "]
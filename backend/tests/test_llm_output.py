@@ -0,0 +1,117 @@
+# backend/tests/test_llm_output.py
+import json
+
+import pytest
+
+from llm_output import IncrementalJSONParser, loads_lenient, repair_json
+
+SCHEMA = {
+    "properties": {
+        "product_description": {"type": "string"},
+        "key_features": {"type": "array", "items": {"type": "string"}},
+        "sizes": {"type": "array", "items": {"type": "array"}},
+        "status": {"type": "string"},
+    },
+    "required": ["product_description", "key_features", "status"],
+}
+
+DOCUMENT = {
+    "product_description": 'The "Trail" runner \\ with a C:\\grip outsole, {braces} and [brackets]',
+    "key_features": ['Says \\"hi\\"', "Commas, colons: and \"quotes\"", "Unicode \u00e9\u2713"],
+    "sizes": [[38, 39], [], [40, [41, 42]]],
+    "status": "completed",
+}
+TEXT = "Here is the JSON:\n```json\n" + json.dumps(DOCUMENT, ensure_ascii=False) + "\n```\nDone."
+
+
+def stream(text: str, size: int, schema: dict = SCHEMA):
+    parser = IncrementalJSONParser(schema)
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(parser.feed(text[start:start + size]))
+    return parser, events
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5, 7, 16, 64, len(TEXT)])
+def test_same_document_at_every_split_size(size):
+    parser, events = stream(TEXT, size)
+    assert parser.done
+    assert parser.close() == DOCUMENT
+    assert not parser.repaired and parser.errors == []
+    assert [path for path, _ in events] == [
+        ("product_description",),
+        ("key_features", 0), ("key_features", 1), ("key_features", 2), ("key_features",),
+        ("sizes", 0), ("sizes", 1), ("sizes", 2), ("sizes",),
+        ("status",),
+    ]
+    assert dict((path[0], value) for path, value in events if len(path) == 1) == DOCUMENT
+
+
+def test_splits_inside_escapes():
+    text = json.dumps({"a": 'x\\"y', "b": ["\\\\", '"'], "c": "z"})
+    for cut in range(1, len(text)):
+        parser = IncrementalJSONParser()
+        parser.feed(text[:cut])
+        parser.feed(text[cut:])
+        assert parser.close() == json.loads(text), cut
+
+
+def test_many_tokens_are_merged_without_losing_text():
+    text = json.dumps(DOCUMENT)
+    parser, _ = stream(text, 1)
+    assert len(parser._chunks) < len(text)
+    assert parser.text() == text
+
+
+def test_item_schema_errors_are_reported_as_they_arrive():
+    parser, events = stream('{"product_description": "x", "key_features": ["ok", 3], "status": "completed"}', 4)
+    assert (("key_features", 1), 3) in events
+    parser.close()
+    assert parser.errors == ["$.key_features[1]: expected string, got int"]
+
+
+def test_truncated_stream_is_repaired_on_close():
+    text = '{"product_description": "A shoe", "key_features": ["Grippy", "Light'
+    parser, events = stream(text, 5)
+    assert not parser.done
+    assert [path for path, _ in events] == [("product_description",), ("key_features", 0)]
+    assert parser.close() == {"product_description": "A shoe", "key_features": ["Grippy", "Light"]}
+    assert parser.repaired
+
+
+def test_malformed_member_falls_back_to_whole_text_repair():
+    parser, _ = stream("{'product_description': 'A shoe', 'key_features': ['Grippy',], 'status': 'completed'}", 3)
+    assert parser.close() == {"product_description": "A shoe", "key_features": ["Grippy"], "status": "completed"}
+    assert parser.repaired and parser.errors == []
+
+
+@pytest.mark.parametrize("text, expected", [
+    # Code fences and prose around the object
+    ('Sure!\n```json\n{"a": 1}\n```\nHope that helps.', {"a": 1}),
+    # Single-quoted strings, with escaped and unescaped quotes inside
+    ("{'a': 'it\\'s', 'b': 'say \"hi\"'}", {"a": "it's", "b": 'say "hi"'}),
+    # Python literals, but not inside strings
+    ('{"a": True, "b": False, "c": None, "d": "True None"}', {"a": True, "b": False, "c": None, "d": "True None"}),
+    # Trailing commas in objects and arrays
+    ('{"a": [1, 2, ], "b": {"c": 3,},}', {"a": [1, 2], "b": {"c": 3}}),
+    # Truncated inside a string, an array, after a key and after a colon
+    ('{"a": "cut', {"a": "cut"}),
+    ('{"a": [1, [2, 3', {"a": [1, [2, 3]]}),
+    ('{"a": 1, "b"', {"a": 1, "b": None}),
+    ('{"a": 1, "b":', {"a": 1, "b": None}),
+    ('{"a": [1, 2,', {"a": [1, 2]}),
+    # A top-level array
+    ("[1, 2, 3,]", [1, 2, 3]),
+])
+def test_repair_json(text, expected):
+    assert json.loads(repair_json(text)) == expected
+    assert loads_lenient(text) == (expected, True)
+
+
+def test_valid_json_is_not_repaired():
+    assert loads_lenient('{"a": [1, 2]}') == ({"a": [1, 2]}, False)
+
+
+def test_unrepairable_output_raises():
+    with pytest.raises(ValueError):
+        loads_lenient("no json here")
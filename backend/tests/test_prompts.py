@@ -0,0 +1,23 @@
+# backend/tests/test_prompts.py
+from prompts import CompiledText, get_prompts
+from storage import Storage
+
+
+def test_none_renders_as_empty():
+    assert CompiledText("Style: {style}.").render({"style": None}) == "Style: ."
+
+
+def test_script_payload_with_null_style(monkeypatch):
+    monkeypatch.setenv("LLAMA_API_KEY", "test")
+    from app import LlamaService
+
+    payload = LlamaService(Storage())._build_script_payload("A trail shoe", ["Grippy"], None, None, None)
+    prompt = "".join(message["content"] for message in payload["messages"])
+    assert "Style: professional" in prompt
+    assert prompt.count("None") == 0
+
+
+def test_script_template_renders_every_field_as_none():
+    template = get_prompts().get("script")
+    messages = template.render(**{field: None for field in template.fields})
+    assert "None" not in messages[-1]["content"]
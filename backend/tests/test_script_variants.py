@@ -0,0 +1,16 @@
+# backend/tests/test_script_variants.py
+from script_variants import DEFAULT_TEMPERATURES, ScriptVariantsRequest, plan_variants
+
+
+def request(**fields) -> ScriptVariantsRequest:
+    return ScriptVariantsRequest(product_description="A trail shoe", key_features=["Grippy"], **fields)
+
+
+def test_empty_temperatures_fall_back_to_the_default_spread():
+    variants = plan_variants(request(count=3, temperatures=[]))
+    assert [variant["temperature"] for variant in variants] == list(DEFAULT_TEMPERATURES[:3])
+
+
+def test_temperatures_cycle_over_variants():
+    variants = plan_variants(request(count=3, temperatures=[0.5, 0.9]))
+    assert [variant["temperature"] for variant in variants] == [0.5, 0.9, 0.5]
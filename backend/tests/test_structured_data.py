@@ -0,0 +1,51 @@
+# backend/tests/test_structured_data.py
+import json
+
+from html_extract import extract_page
+from structured_data import extract_structured_product, merge_product_details
+
+DESCRIPTION = "A lightweight trail running shoe with a grippy Vibram outsole and waterproof upper."
+
+
+def product_page(**fields) -> str:
+    node = {"@context": "https://schema.org", "@type": "Product", "name": "Acme Trail Runner",
+            "description": DESCRIPTION, "brand": {"@type": "Brand", "name": "Acme"},
+            "offers": {"@type": "Offer", "price": "129.00", "priceCurrency": "USD"},
+            "aggregateRating": {"@type": "AggregateRating", "ratingValue": "4.6", "reviewCount": "212"},
+            **fields}
+    return f'<html><head><script type="application/ld+json">{json.dumps(node)}</script></head><body></body></html>'
+
+
+def properties(*pairs):
+    return [{"@type": "PropertyValue", "name": name, "value": value} for name, value in pairs]
+
+
+def test_brand_price_and_rating_do_not_count_as_features():
+    page = extract_page(product_page(additionalProperty=properties(("Weight", "240 g"))))
+    details, missing, supplementary = extract_structured_product(page)
+    assert missing == ["key_features"]
+    assert details["key_features"] == ["Weight: 240 g"]
+    assert supplementary == ["Brand: Acme", "Price: 129.00 USD", "Rated 4.6 out of 5 (212 reviews)"]
+
+
+def test_supplementary_lines_follow_llm_features():
+    page = extract_page(product_page(additionalProperty=properties(("Weight", "240 g"))))
+    details, missing, supplementary = extract_structured_product(page)
+    llm = {"product_description": "", "key_features": ["Vibram outsole", "Weight: 240 g"], "target_audience": "Trail runners"}
+    merged = merge_product_details(details, llm, missing, supplementary)
+    assert merged["key_features"] == [
+        "Weight: 240 g", "Vibram outsole", "Brand: Acme", "Price: 129.00 USD", "Rated 4.6 out of 5 (212 reviews)",
+    ]
+    assert merged["target_audience"] == "Trail runners"
+    assert merged["product_description"].endswith(DESCRIPTION)
+
+
+def test_descriptive_features_skip_the_llm():
+    page = extract_page(product_page(color="Slate", material="Recycled mesh",
+                                     additionalProperty=properties(("Weight", "240 g"))))
+    details, missing, _ = extract_structured_product(page)
+    assert missing == []
+    assert details["key_features"] == [
+        "Color: Slate", "Material: Recycled mesh", "Weight: 240 g",
+        "Brand: Acme", "Price: 129.00 USD", "Rated 4.6 out of 5 (212 reviews)",
+    ]
@@ -0,0 +1,28 @@
+# backend/tests/test_tokens.py
+from tokens import estimate_tokens, fit_items, truncate_to_tokens
+
+
+def test_truncate_leading_whitespace_beyond_window():
+    text = " " * 3000 + "be fun"
+    assert truncate_to_tokens(text, 40) == "be fun"
+
+
+def test_truncate_whitespace_only():
+    assert truncate_to_tokens(" " * 3000, 40) == ""
+
+
+def test_truncate_long_text_after_whitespace_fits_budget():
+    text = "\n" * 2000 + "word " * 500
+    truncated = truncate_to_tokens(text, 40)
+    assert truncated.startswith("word") and truncated.endswith("...")
+    assert estimate_tokens(truncated) <= 40
+
+
+def test_fit_items_skips_blank_items():
+    items = ["Waterproof", "", "Bluetooth 5.3", "   ", "20h battery"]
+    assert fit_items(items, 300, 40) == ["Waterproof", "Bluetooth 5.3", "20h battery"]
+
+
+def test_fit_items_stops_when_budget_is_spent():
+    kept = fit_items(["alpha beta"] * 10, 12, 40)
+    assert kept == ["alpha beta"] * 3
@@ -0,0 +1,59 @@
+# backend/tests/test_tracing.py
+import asyncio
+import logging
+
+import httpx
+from starlette.applications import Starlette
+from starlette.responses import StreamingResponse
+from starlette.routing import Route
+
+from app import TraceRequests
+from instrumentation import span
+
+STREAM_SECONDS = 0.2
+
+
+async def stream(request):
+    async def body():
+        yield b"data: start\n\n"
+        with span("llm_call", "test"):
+            await asyncio.sleep(STREAM_SECONDS)
+        yield b"data: done\n\n"
+    return StreamingResponse(body(), media_type="text/event-stream")
+
+
+class Records(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.fields = []
+
+    def emit(self, record):
+        if record.getMessage() == "request":
+            self.fields.append(record.fields)
+
+
+def test_streamed_response_is_timed_to_its_last_chunk():
+    app = TraceRequests(Starlette(routes=[Route("/stream", stream)]))
+    records = Records()
+    logger = logging.getLogger("video_api")
+    logger.addHandler(records)
+    level = logger.level
+    logger.setLevel(logging.INFO)
+
+    async def main():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            return await client.get("/stream")
+
+    try:
+        response = asyncio.run(main())
+    finally:
+        logger.removeHandler(records)
+        logger.setLevel(level)
+
+    assert response.status_code == 200
+    assert response.headers["x-request-id"]
+    [fields] = records.fields
+    assert fields["path"] == "/stream" and fields["status"] == 200
+    assert fields["ms"] >= STREAM_SECONDS * 1000
+    assert [s["stage"] for s in fields["spans"]] == ["llm_call"]
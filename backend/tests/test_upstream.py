@@ -0,0 +1,75 @@
+# backend/tests/test_upstream.py
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from upstream import CircuitBreaker, CircuitOpenError, Upstream
+
+
+class FakeClient:
+    """Stands in for HttpClient: raises or answers in order, one outcome per request"""
+
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+
+    async def request(self, method, url, **kwargs):
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        if outcome == "hang":
+            await asyncio.sleep(60)
+        return httpx.Response(outcome)
+
+
+def half_open_upstream(client) -> Upstream:
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    breaker.opened_at = time.monotonic() - 31
+    assert breaker.state == "half_open"
+    # Only connection errors are retried, as for Tavus
+    return Upstream("test", client=client, max_attempts=1, breaker=breaker,
+                    retry_exceptions=(httpx.ConnectError,))
+
+
+def test_non_retryable_exception_fails_the_trial():
+    upstream = half_open_upstream(FakeClient(httpx.ReadTimeout("slow"), 200))
+
+    async def run():
+        with pytest.raises(httpx.ReadTimeout):
+            await upstream.request("POST", "http://tavus/videos")
+        assert upstream.breaker.state == "open"
+        # Once the reset timeout passes again the next trial goes through and closes it
+        upstream.breaker.opened_at = time.monotonic() - 31
+        response = await upstream.request("POST", "http://tavus/videos")
+        assert response.status_code == 200
+        assert upstream.breaker.state == "closed"
+
+    asyncio.run(run())
+
+
+def test_cancelled_trial_releases_the_breaker():
+    upstream = half_open_upstream(FakeClient("hang", 200))
+
+    async def run():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(upstream.request("GET", "http://tavus/videos/1"), timeout=0.01)
+        assert upstream.breaker.state == "half_open"
+        response = await upstream.request("GET", "http://tavus/videos/1")
+        assert response.status_code == 200
+        assert upstream.breaker.state == "closed"
+
+    asyncio.run(run())
+
+
+def test_second_call_during_trial_fails_fast():
+    upstream = half_open_upstream(FakeClient("hang"))
+
+    async def run():
+        trial = asyncio.create_task(upstream.request("GET", "http://tavus/videos/1"))
+        await asyncio.sleep(0)
+        with pytest.raises(CircuitOpenError):
+            await upstream.request("GET", "http://tavus/videos/1")
+        trial.cancel()
+
+    asyncio.run(run())
@@ -0,0 +1,70 @@
+# backend/tokens.py
+import re
+from typing import List
+
+# Word pieces, short digit groups and single symbols roughly match how BPE
+# tokenizers split English product copy; long words cost one extra token per
+# six characters.
+TOKEN_PATTERN = re.compile(r"[A-Za-z]{1,6}|\d{1,3}|[^\sA-Za-z\d]")
+# Generous upper bound on characters per estimated token, whitespace included
+MAX_CHARS_PER_TOKEN = 8
+WORD_BOUNDARY = re.compile(r"\s+\S*$")
+WHITESPACE = re.compile(r"\s+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Fast local token count estimate; no tokenizer download needed"""
+    return len(TOKEN_PATTERN.findall(text))
+
+
+def truncate_to_tokens(text: str, budget: int, marker: str = "...") -> str:
+    """Cut text at a word boundary so its estimate fits within `budget` tokens"""
+    # Every token covers at least one character
+    if len(text) <= budget:
+        return text
+    if budget <= 0:
+        return ""
+    # Only look at a window the budget could plausibly fill, so trimming a
+    # huge page costs about the same as trimming one that is just over budget
+    window = text[:budget * MAX_CHARS_PER_TOKEN]
+    tokens = estimate_tokens(window)
+    if tokens == 0:
+        # The window is all whitespace, which the estimate does not count;
+        # squash the runs so the words behind them come into view
+        squashed = WHITESPACE.sub(" ", text).strip()
+        return truncate_to_tokens(squashed, budget, marker) if squashed != text else text[:budget]
+    if tokens <= budget and len(window) == len(text):
+        return text
+    marker_tokens = estimate_tokens(marker)
+    if marker_tokens >= budget:
+        marker, marker_tokens = "", 0
+    target = budget - marker_tokens
+    cut = len(window) * min(target, tokens) // tokens
+    while cut > 0:
+        candidate = WORD_BOUNDARY.sub("", text[:cut]) or text[:cut]
+        candidate = candidate.rstrip() + marker
+        used = estimate_tokens(candidate)
+        if used <= budget:
+            return candidate
+        # Shrink by the overshoot, and by at least a tenth
+        cut = min(cut * 9 // 10, cut * budget // used)
+    return ""
+
+
+def fit_items(items: List[str], budget: int, item_budget: int) -> List[str]:
+    """Keep items in order, each cut to `item_budget`, until `budget` tokens are spent"""
+    kept = []
+    remaining = budget
+    for item in items:
+        item = item.strip()
+        if not item:
+            continue
+        if remaining <= 0:
+            break
+        item = truncate_to_tokens(item, min(item_budget, remaining))
+        if not item:
+            break
+        kept.append(item)
+        # Count the "- " bullet and newline each item is rendered with
+        remaining -= estimate_tokens(item) + 2
+    return kept
@@ -0,0 +1,257 @@
+# backend/tracking.py
+import asyncio
+import hashlib
+import os
+import re
+import time
+from collections import Counter
+from typing import AsyncIterator, Awaitable, Callable, Iterable, List, Optional, Tuple
+
+from cache import content_hash, normalize_url
+from html_extract import DEFAULT_MAX_BYTES, PageExtract, extract_page
+from http_client import get_http_client
+from instrumentation import registry, span
+from storage import Repository
+
+TRACKED_REFRESHES = registry.counter(
+    "tracked_url_refreshes_total", "Tracked URL refreshes by outcome", ("outcome",))
+
+SHINGLE_WORDS = 4
+WORD = re.compile(r"\w+")
+# Sections a shopper would notice changing; any edit here forces a re-extraction
+KEY_SECTIONS = ("Title:", "Heading:", "Description:", "Price:", "Structured data:")
+
+# Outcomes that reuse the previous extraction
+SKIPPED = frozenset(["not_modified", "unchanged", "near_duplicate"])
+
+
+def simhash(text: str, shingle_words: int = SHINGLE_WORDS) -> int:
+    """
+    64-bit simhash over overlapping word shingles: pages that differ in a few
+    shingles land a few bits apart, unrelated pages about 32 bits apart.
+    """
+    words = WORD.findall(text.lower())
+    shingles = {" ".join(words[i:i + shingle_words]) for i in range(max(1, len(words) - shingle_words + 1))}
+    # Per-bit vote counts kept as bit-sliced binary counters: plane j holds
+    # bit j of every lane's count, so adding a hash is a short ripple-carry
+    # over whole 64-bit words instead of 64 separate additions
+    planes: List[int] = []
+    for shingle in shingles:
+        carry = int.from_bytes(hashlib.blake2b(shingle.encode(), digest_size=8).digest(), "big")
+        for j, plane in enumerate(planes):
+            planes[j] = plane ^ carry
+            carry &= plane
+            if not carry:
+                break
+        if carry:
+            planes.append(carry)
+
+    fingerprint = 0
+    for bit in range(64):
+        votes = 0
+        for j, plane in enumerate(planes):
+            votes |= ((plane >> bit) & 1) << j
+        if votes * 2 > len(shingles):
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def hamming(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def fingerprint_page(html: str) -> Tuple[PageExtract, dict]:
+    """Parse a page and fingerprint it; CPU bound, meant for a worker thread"""
+    page = extract_page(html)
+    sections = page.sections()
+    key_facts = "\n".join(section for section in sections if section.startswith(KEY_SECTIONS))
+    rendered = page.render()
+    return page, {
+        "content_hash": content_hash(rendered),
+        "key_hash": content_hash(key_facts),
+        "simhash": f"{simhash(rendered):016x}",
+    }
+
+
+async def fetch_conditional(url: str, etag: Optional[str] = None, last_modified: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES) -> Tuple[int, dict, Optional[str]]:
+    """GET a page with validators from the last fetch; returns (status, headers, html or None on 304)"""
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    with span("page_fetch", "refresh"):
+        async with get_http_client().stream("GET", url, headers=headers, timeout=10) as response:
+            if response.status_code == 304:
+                return 304, dict(response.headers), None
+            response.raise_for_status()
+            chunks = []
+            size = 0
+            async for chunk in response.aiter_bytes():
+                chunks.append(chunk)
+                size += len(chunk)
+                if size >= max_bytes:
+                    break
+            encoding = response.charset_encoding or "utf-8"
+    return response.status_code, dict(response.headers), b"".join(chunks)[:max_bytes].decode(encoding, errors="replace")
+
+
+class ProductTracker:
+    """
+    Tracked product URLs with the validators and fingerprints of their last fetch.
+
+    A refresh asks the server whether the page changed (ETag/Last-Modified).
+    If it did, the page is compared by content hash, then by the key facts
+    (title, description, price, structured data), then by simhash distance
+    over the whole cleaned text. Only pages that moved more than `threshold`
+    bits go back through extraction; the rest keep their previous details.
+    """
+
+    def __init__(
+        self,
+        repository: Repository,
+        extract: Callable[[str, PageExtract], Awaitable[dict]],
+        fetch: Callable[..., Awaitable[Tuple[int, dict, Optional[str]]]] = fetch_conditional,
+        threshold: int = 3,
+        concurrency: int = 32,
+    ):
+        self.repository = repository
+        self.extract = extract
+        self.fetch = fetch
+        self.threshold = threshold
+        self.concurrency = concurrency
+
+    @classmethod
+    def from_env(cls, repository: Repository, extract: Callable[[str, PageExtract], Awaitable[dict]]) -> "ProductTracker":
+        return cls(
+            repository=repository,
+            extract=extract,
+            threshold=int(os.environ.get("TRACKING_SIMHASH_THRESHOLD", 3)),
+            concurrency=int(os.environ.get("TRACKING_CONCURRENCY", 32)),
+        )
+
+    async def tracked_urls(self) -> AsyncIterator[str]:
+        cursor = None
+        while True:
+            records, cursor = await self.repository.list(limit=500, cursor=cursor)
+            for record in records:
+                yield record["source_url"]
+            if cursor is None:
+                return
+
+    async def refresh(self, url: str, force: bool = False) -> dict:
+        """Bring one URL's extraction up to date; returns the outcome and the details to use"""
+        key = normalize_url(url)
+        record = await self.repository.get(key)
+        now = time.time()
+        if record is None:
+            record = {"url": key, "source_url": url, "created_at": now, "checks": 0, "extractions": 0}
+        has_details = record.get("details") is not None
+        # Validators are only worth sending when there is an extraction to fall back on
+        conditional = has_details and not force
+        record["checks"] += 1
+        record["checked_at"] = now
+
+        try:
+            status, headers, html = await self.fetch(
+                url,
+                etag=record.get("etag") if conditional else None,
+                last_modified=record.get("last_modified") if conditional else None,
+            )
+            if status == 304:
+                outcome = "not_modified"
+            else:
+                page, fingerprints = await asyncio.to_thread(fingerprint_page, html)
+                if not has_details:
+                    outcome = "new"
+                elif force:
+                    outcome = "changed"
+                else:
+                    outcome = self._compare(record, fingerprints)
+                if outcome not in SKIPPED:
+                    details = await self.extract(url, page)
+                    if details.get("status") == "error":
+                        raise ValueError("Could not extract product details")
+                    path = details.get("extraction_path")
+                    record.update(details=details, extraction_path=path, extracted_at=now, changed_at=now)
+                    record["extractions"] += 1
+                    if path != "cache":
+                        record["needs_llm"] = path in ("llm", "structured+llm")
+                    record.update(key_hash=fingerprints["key_hash"], simhash=fingerprints["simhash"])
+                # The simhash stays that of the page the kept extraction came from, so
+                # small edits can't pile up over many refreshes without a re-extraction
+                record.update(
+                    content_hash=fingerprints["content_hash"],
+                    etag=headers.get("etag"),
+                    last_modified=headers.get("last-modified"),
+                )
+        except Exception as e:
+            outcome = "error"
+            record["error"] = str(e)
+        else:
+            record.pop("error", None)
+
+        record.update(status=outcome, updated_at=time.time())
+        await self.repository.put(record)
+        TRACKED_REFRESHES.inc(outcome=outcome)
+        return {
+            "url": url,
+            "outcome": outcome,
+            "extraction_path": record.get("extraction_path") if outcome not in SKIPPED else None,
+            "needs_llm": record.get("needs_llm", True),
+            "details": record.get("details"),
+            "error": record.get("error"),
+        }
+
+    def _compare(self, record: dict, fingerprints: dict) -> str:
+        if fingerprints["content_hash"] == record.get("content_hash"):
+            return "unchanged"
+        if fingerprints["key_hash"] != record.get("key_hash") or not record.get("simhash"):
+            return "changed"
+        distance = hamming(int(fingerprints["simhash"], 16), int(record["simhash"], 16))
+        return "near_duplicate" if distance <= self.threshold else "changed"
+
+    async def refresh_all(self, urls: Iterable[str], force: bool = False, concurrency: Optional[int] = None) -> AsyncIterator[dict]:
+        """Refresh many URLs with a fixed pool of workers; yields results as they finish"""
+        pending = iter(urls)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def worker():
+            for url in pending:
+                await results.put(await self.refresh(url, force))
+
+        async def run_workers():
+            try:
+                await asyncio.gather(*(worker() for _ in range(concurrency or self.concurrency)))
+            finally:
+                await results.put(None)
+
+        runner = asyncio.create_task(run_workers())
+        try:
+            while (result := await results.get()) is not None:
+                yield result
+            await runner
+        finally:
+            runner.cancel()
+
+
+def summarize(results: Iterable[dict], elapsed: float) -> dict:
+    """Totals for a refresh run: outcomes, extractions run and LLM calls made or avoided"""
+    outcomes = Counter()
+    llm_calls = skipped_llm_calls = 0
+    for result in results:
+        outcomes[result["outcome"]] += 1
+        if result["outcome"] in SKIPPED and result["needs_llm"]:
+            skipped_llm_calls += 1
+        elif result["extraction_path"] in ("llm", "structured+llm"):
+            llm_calls += 1
+    total = sum(outcomes.values())
+    return {
+        "urls": total,
+        "outcomes": dict(outcomes),
+        "extractions": outcomes["new"] + outcomes["changed"],
+        "llm_calls": llm_calls,
+        "llm_calls_skipped": skipped_llm_calls,
+        "elapsed_s": round(elapsed, 2),
+        "urls_per_s": round(total / elapsed, 1) if elapsed else None,
+    }
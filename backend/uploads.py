@@ -0,0 +1,151 @@
+# backend/uploads.py
+import asyncio
+import hashlib
+import os
+import uuid
+from pathlib import Path
+from typing import List, Optional
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+
+
+class UploadStore:
+    """
+    Content-addressed storage for uploaded images.
+
+    Files are streamed to disk in fixed-size chunks with the writes done in a
+    worker thread, hashed as they go, and stored under their SHA-256 so the same
+    image uploaded twice is kept once.
+
+    The per-file `max_bytes` is checked here, after Starlette has already
+    spooled the multipart body to a temporary file. Oversized requests as a
+    whole are turned away before their body is read by UploadSizeLimit.
+    """
+
+    def __init__(self, directory: str = "uploads", max_bytes: int = 25 * 1024 * 1024, chunk_size: int = 1024 * 1024, concurrency: int = 4):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.chunk_size = chunk_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @classmethod
+    def from_env(cls) -> "UploadStore":
+        return cls(
+            directory=os.environ.get("UPLOAD_DIR", "uploads"),
+            max_bytes=int(os.environ.get("UPLOAD_MAX_BYTES", 25 * 1024 * 1024)),
+            chunk_size=int(os.environ.get("UPLOAD_CHUNK_SIZE", 1024 * 1024)),
+            concurrency=int(os.environ.get("UPLOAD_CONCURRENCY", 4)),
+        )
+
+    async def save(self, file: UploadFile) -> dict:
+        async with self._semaphore:
+            return await self._save(file)
+
+    async def save_all(self, files: List[UploadFile]) -> List[dict]:
+        """Save every file in parallel; the first failure is raised once all have finished"""
+        results = await asyncio.gather(*(self.save(file) for file in files), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+
+    async def _save(self, file: UploadFile) -> dict:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        suffix = Path(file.filename or "").suffix.lower()
+        temp_path = self.directory / f".{uuid.uuid4().hex}.part"
+
+        digest = hashlib.sha256()
+        size = 0
+        handle = await asyncio.to_thread(open, temp_path, "wb")
+        try:
+            while True:
+                chunk = await file.read(self.chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > self.max_bytes:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"File {file.filename} is larger than {self.max_bytes} bytes"
+                    )
+                digest.update(chunk)
+                await asyncio.to_thread(handle.write, chunk)
+        except BaseException:
+            await asyncio.to_thread(handle.close)
+            await asyncio.to_thread(temp_path.unlink, True)
+            raise
+        await asyncio.to_thread(handle.close)
+
+        content_hash = digest.hexdigest()
+        final_path = self.directory / f"{content_hash}{suffix}"
+        deduplicated = final_path.exists()
+        if deduplicated:
+            await asyncio.to_thread(temp_path.unlink, True)
+        else:
+            await asyncio.to_thread(os.replace, temp_path, final_path)
+
+        return {
+            "id": content_hash,
+            "filename": file.filename,
+            "path": str(final_path),
+            "size": size,
+            "deduplicated": deduplicated,
+        }
+
+
+class UploadSizeLimit:
+    """
+    ASGI middleware answering 413 for request bodies over `max_bytes` on
+    `paths` before they are read: at once from Content-Length, or as soon as
+    a chunked body passes the limit, in which case the app sees a disconnect.
+    """
+
+    def __init__(self, app, paths: frozenset, max_bytes: Optional[int] = None):
+        self.app = app
+        self.paths = paths
+        self.max_bytes = max_bytes or int(os.environ.get("UPLOAD_MAX_REQUEST_BYTES", 100 * 1024 * 1024))
+
+    async def _reject(self, scope, receive, send):
+        response = JSONResponse(
+            status_code=413,
+            content={"detail": f"Upload is larger than {self.max_bytes} bytes"},
+            headers={"Connection": "close"},
+        )
+        await response(scope, receive, send)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+        length = dict(scope["headers"]).get(b"content-length", b"")
+        if length.isdigit() and int(length) > self.max_bytes:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        rejected = False
+
+        async def limited_receive():
+            nonlocal received, rejected
+            if rejected:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    rejected = True
+                    await self._reject(scope, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            if not rejected:
+                await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            # The app failing on the disconnect we fed it; the 413 is already sent
+            if not rejected:
+                raise
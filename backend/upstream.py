@@ -0,0 +1,303 @@
+# backend/upstream.py
+import asyncio
+import os
+import random
+import time
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Optional, Tuple, Type
+
+import httpx
+from fastapi import HTTPException
+
+from http_client import HttpClient, get_http_client
+from instrumentation import registry
+
+UPSTREAM_RETRIES = registry.counter(
+    "upstream_retries_total", "Upstream calls retried, by reason", ("upstream", "reason"))
+UPSTREAM_REJECTED = registry.counter(
+    "upstream_circuit_rejections_total", "Calls failed fast because the circuit was open", ("upstream",))
+UPSTREAM_CIRCUIT_STATE = registry.gauge(
+    "upstream_circuit_open", "1 while an upstream's circuit breaker is open", ("upstream",))
+UPSTREAM_THROTTLE_WAIT = registry.histogram(
+    "upstream_throttle_wait_seconds", "Time spent waiting for the client-side rate limiter", ("upstream",),
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0))
+
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+
+
+def _setting(upstream: str, key: str, default: float) -> float:
+    """Per-upstream override (LLAMA_MAX_ATTEMPTS) falling back to the shared UPSTREAM_MAX_ATTEMPTS"""
+    value = os.environ.get(f"{upstream.upper()}_{key}") or os.environ.get(f"UPSTREAM_{key}")
+    return float(value) if value else default
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header given as seconds or an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitOpenError(HTTPException):
+    def __init__(self, upstream: str, retry_after: float):
+        super().__init__(
+            status_code=503,
+            detail=f"{upstream} is unavailable, failing fast while its circuit is open",
+            headers={"Retry-After": str(max(1, int(retry_after)))},
+        )
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive failures and rejects calls for
+    `reset_timeout` seconds, then lets a single trial call through (half-open).
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_call(self) -> bool:
+        """Raise while the circuit is open; returns True when this call is the half-open trial"""
+        state = self.state
+        if state == "open" or (state == "half_open" and self._trial_in_flight):
+            UPSTREAM_REJECTED.inc(upstream=self.name)
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+            raise CircuitOpenError(self.name, remaining)
+        if state == "half_open":
+            self._trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        UPSTREAM_CIRCUIT_STATE.set(0, upstream=self.name)
+
+    def release_trial(self):
+        """Let another trial through after this one ended without an outcome (it was cancelled)"""
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._trial_in_flight or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            UPSTREAM_CIRCUIT_STATE.set(1, upstream=self.name)
+        self._trial_in_flight = False
+
+
+class TokenBucket:
+    """Client-side rate limiter: `rate` requests per second with bursts up to `burst`"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until one is available; returns the time waited"""
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+                waited += delay
+                await asyncio.sleep(delay)
+
+
+class Upstream:
+    """
+    One external API (Llama, Tavus) behind retries, a circuit breaker and a rate limiter.
+
+    Retries use full-jitter exponential backoff and honor Retry-After. Responses
+    that still fail after the last attempt are returned to the caller unchanged,
+    so existing status handling keeps working.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        client: Optional[HttpClient] = None,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        max_retry_after: float = 30.0,
+        timeout: Optional[float] = None,
+        breaker: Optional[CircuitBreaker] = None,
+        limiter: Optional[TokenBucket] = None,
+        retry_statuses: frozenset = RETRY_STATUSES,
+        retry_exceptions: Tuple[Type[Exception], ...] = (httpx.TransportError,),
+    ):
+        self.name = name
+        self._client = client
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker(name)
+        self.limiter = limiter
+        self.retry_statuses = retry_statuses
+        self.retry_exceptions = retry_exceptions
+
+    @classmethod
+    def from_env(cls, name: str, **overrides) -> "Upstream":
+        rate = _setting(name, "RATE_LIMIT", 0)
+        settings = dict(
+            max_attempts=int(_setting(name, "MAX_ATTEMPTS", 3)),
+            backoff_base=_setting(name, "BACKOFF_BASE", 0.5),
+            backoff_max=_setting(name, "BACKOFF_MAX", 8.0),
+            max_retry_after=_setting(name, "MAX_RETRY_AFTER", 30.0),
+            timeout=_setting(name, "TIMEOUT", 0) or None,
+            breaker=CircuitBreaker(
+                name,
+                failure_threshold=int(_setting(name, "BREAKER_THRESHOLD", 5)),
+                reset_timeout=_setting(name, "BREAKER_RESET", 30.0),
+            ),
+            limiter=TokenBucket(rate, _setting(name, "RATE_BURST", max(1.0, rate))) if rate else None,
+        )
+        settings.update(overrides)
+        return cls(name, **settings)
+
+    @property
+    def client(self) -> HttpClient:
+        return self._client or get_http_client()
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _retry_delay(self, attempt: int, response: Optional[httpx.Response]) -> Optional[float]:
+        """Seconds to wait before the next attempt, or None to give up"""
+        if attempt + 1 >= self.max_attempts:
+            return None
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            if retry_after is not None:
+                return retry_after if retry_after <= self.max_retry_after else None
+        return self._backoff(attempt)
+
+    async def _before_attempt(self) -> bool:
+        trial = self.breaker.before_call()
+        if self.limiter is not None:
+            try:
+                waited = await self.limiter.acquire()
+            except BaseException:
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            UPSTREAM_THROTTLE_WAIT.observe(waited, upstream=self.name)
+        return trial
+
+    def _record(self, response: httpx.Response):
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+
+    def _with_timeout(self, kwargs: dict) -> dict:
+        if self.timeout is not None:
+            kwargs.setdefault("timeout", self.timeout)
+        return kwargs
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        kwargs = self._with_timeout(kwargs)
+        attempt = 0
+        while True:
+            trial = await self._before_attempt()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except self.retry_exceptions as e:
+                self.breaker.record_failure()
+                delay = self._retry_delay(attempt, None)
+                if delay is None:
+                    raise
+                UPSTREAM_RETRIES.inc(upstream=self.name, reason=type(e).__name__)
+            except Exception:
+                # Not worth retrying (a read timeout on a non-idempotent call, a bad body), but still a failure
+                self.breaker.record_failure()
+                raise
+            except BaseException:
+                # Cancelled: there is no outcome, but the half-open trial must not stay taken
+                if trial:
+                    self.breaker.release_trial()
+                raise
+            else:
+                self._record(response)
+                if response.status_code not in self.retry_statuses:
+                    return response
+                delay = self._retry_delay(attempt, response)
+                if delay is None:
+                    return response
+                UPSTREAM_RETRIES.inc(upstream=self.name, reason=str(response.status_code))
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs):
+        """Streamed request; retried only until a non-retryable response starts streaming"""
+        kwargs = self._with_timeout(kwargs)
+        attempt = 0
+        yielded = False
+        while True:
+            trial = await self._before_attempt()
+            delay = None
+            try:
+                async with self.client.stream(method, url, **kwargs) as response:
+                    self._record(response)
+                    if response.status_code in self.retry_statuses:
+                        delay = self._retry_delay(attempt, response)
+                    if delay is None:
+                        yielded = True
+                        yield response
+                        return
+                    UPSTREAM_RETRIES.inc(upstream=self.name, reason=str(response.status_code))
+            except self.retry_exceptions as e:
+                # Once the body is being consumed a retry would replay the stream
+                if yielded:
+                    raise
+                self.breaker.record_failure()
+                delay = self._retry_delay(attempt, None)
+                if delay is None:
+                    raise
+                UPSTREAM_RETRIES.inc(upstream=self.name, reason=type(e).__name__)
+            except Exception:
+                # After the yield the outcome is already recorded and this is the caller's error
+                if not yielded:
+                    self.breaker.record_failure()
+                raise
+            except BaseException:
+                if trial and not yielded:
+                    self.breaker.release_trial()
+                raise
+            await asyncio.sleep(delay)
+            attempt += 1
@@ -0,0 +1,226 @@
+# backend/video_status.py
+import asyncio
+import contextvars
+import logging
+import os
+import time
+from contextlib import contextmanager
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+
+from fastapi import HTTPException
+
+from instrumentation import registry
+from jobs import TERMINAL_STATUSES, JobStore
+
+VIDEO_STATUS_UPDATES = registry.counter(
+    "video_status_updates_total", "Video status changes applied, by source", ("source",))
+VIDEO_STATUS_POLLS = registry.counter(
+    "video_status_polls_total", "Tavus status requests made by the reconciler", ("outcome",))
+VIDEO_STATUS_SUBSCRIBERS = registry.gauge(
+    "video_status_subscribers", "Clients currently subscribed to video status events")
+VIDEO_RECONCILER_FAILURES = registry.counter(
+    "video_reconciler_failures_total", "Reconciler passes that failed and were retried later")
+
+logger = logging.getLogger("video_api")
+
+# Fields a webhook or status poll may copy onto the stored record
+TAVUS_FIELDS = ("status", "hosted_url", "download_url", "stream_url", "status_details", "generation_progress")
+
+
+def is_terminal(job: dict) -> bool:
+    return job.get("status") in TERMINAL_STATUSES
+
+
+def tavus_fields(data: dict) -> dict:
+    return {key: data[key] for key in TAVUS_FIELDS if data.get(key) is not None}
+
+
+class StatusBroker:
+    """
+    In-process fan-out of video record changes to subscribers keyed by job id
+    or Tavus video id. Only the latest state matters, so a slow subscriber
+    drops stale updates instead of growing its queue.
+    """
+
+    def __init__(self, queue_size: int = 8):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    @contextmanager
+    def subscribe(self, key: str):
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(key, set()).add(queue)
+        VIDEO_STATUS_SUBSCRIBERS.inc()
+        try:
+            yield queue
+        finally:
+            VIDEO_STATUS_SUBSCRIBERS.dec()
+            queues = self._subscribers.get(key)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[key]
+
+    def publish(self, job: dict):
+        for key in {job.get("job_id"), job.get("video_id")}:
+            for queue in self._subscribers.get(key, ()):
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(job)
+
+
+async def apply_status_update(store: JobStore, broker: StatusBroker, video_id: str, fields: dict, source: str) -> Tuple[Optional[dict], bool]:
+    """
+    Write Tavus-reported fields onto the stored record and notify subscribers.
+
+    Returns (record, changed); record is None for a video we never created.
+    """
+    job = await store.get_by_video_id(video_id)
+    if job is None:
+        return None, False
+    changes = {key: value for key, value in fields.items() if job.get(key) != value}
+    if not changes:
+        return job, False
+    job = await store.update(job["job_id"], **changes)
+    VIDEO_STATUS_UPDATES.inc(source=source)
+    broker.publish(job)
+    return job, True
+
+
+class VideoStatusReconciler:
+    """
+    Fallback for missed webhooks: polls Tavus only for videos that are still
+    in progress, in batches of bounded concurrency.
+
+    Each video is polled on its own schedule. The interval starts at
+    `initial_delay` after the last change and doubles every time a poll
+    finds nothing new, up to `max_interval`; any change resets it.
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        broker: StatusBroker,
+        fetch_status: Callable[[str], Awaitable[dict]],
+        min_interval: float = 15.0,
+        max_interval: float = 300.0,
+        initial_delay: Optional[float] = None,
+        batch_size: int = 20,
+        concurrency: int = 4,
+    ):
+        self.store = store
+        self.broker = broker
+        self.fetch_status = fetch_status
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.initial_delay = min_interval if initial_delay is None else initial_delay
+        self.batch_size = batch_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+        # video_id -> (current interval, monotonic time of the next poll)
+        self._schedule: Dict[str, tuple] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._wake = asyncio.Event()
+
+    @classmethod
+    def from_env(cls, store: JobStore, broker: StatusBroker, fetch_status: Callable[[str], Awaitable[dict]], webhooks_enabled: bool = False) -> "VideoStatusReconciler":
+        min_interval = float(os.environ.get("VIDEO_RECONCILE_MIN_INTERVAL", 15))
+        max_interval = float(os.environ.get("VIDEO_RECONCILE_MAX_INTERVAL", 300))
+        return cls(
+            store=store,
+            broker=broker,
+            fetch_status=fetch_status,
+            min_interval=min_interval,
+            max_interval=max_interval,
+            # With webhooks configured polling is only a safety net, so start slow
+            initial_delay=max_interval if webhooks_enabled else min_interval,
+            batch_size=int(os.environ.get("VIDEO_RECONCILE_BATCH_SIZE", 20)),
+            concurrency=int(os.environ.get("VIDEO_RECONCILE_CONCURRENCY", 4)),
+        )
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._task = contextvars.Context().run(asyncio.create_task, self._run())
+
+    def notify(self):
+        """A new video reached Tavus; re-plan instead of sleeping through an idle interval"""
+        self._wake.set()
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def _due_at(self, job: dict) -> float:
+        scheduled = self._schedule.get(job["video_id"])
+        if scheduled is not None:
+            return scheduled[1]
+        # Wall-clock age of the last change, mapped onto the monotonic clock
+        changed = job.get("updated_at") or job.get("submitted_at") or time.time()
+        return time.monotonic() - (time.time() - changed) + self.initial_delay
+
+    async def _poll(self, job: dict):
+        video_id = job["video_id"]
+        interval = self._schedule.get(video_id, (self.initial_delay, 0))[0]
+        try:
+            async with self._semaphore:
+                data = await self.fetch_status(video_id)
+        except Exception as e:
+            VIDEO_STATUS_POLLS.inc(outcome="error")
+            if not (isinstance(e, HTTPException) and e.status_code == 404):
+                logger.warning("video status poll failed", extra={"fields": {
+                    "video_id": video_id,
+                    "error": e.detail if isinstance(e, HTTPException) else repr(e),
+                }})
+                self._schedule[video_id] = (interval, time.monotonic() + min(self.max_interval, interval * 2))
+                return
+            data = {"status": "deleted"}
+
+        updated, changed = await apply_status_update(self.store, self.broker, video_id, tavus_fields(data), source="poll")
+        if updated is None or is_terminal(updated):
+            VIDEO_STATUS_POLLS.inc(outcome="settled")
+            self._schedule.pop(video_id, None)
+            return
+        VIDEO_STATUS_POLLS.inc(outcome="changed" if changed else "unchanged")
+        interval = self.min_interval if changed else min(self.max_interval, max(self.min_interval, interval * 2))
+        self._schedule[video_id] = (interval, time.monotonic() + interval)
+
+    async def reconcile_once(self) -> float:
+        """Poll every video that is due and return how long to sleep before the next one"""
+        pending = await self.store.in_progress()
+        live = {job["video_id"] for job in pending}
+        for video_id in list(self._schedule):
+            if video_id not in live:
+                del self._schedule[video_id]
+
+        now = time.monotonic()
+        due = [job for job in pending if self._due_at(job) <= now]
+        due.sort(key=self._due_at)
+        for start in range(0, len(due), self.batch_size):
+            await asyncio.gather(*(self._poll(job) for job in due[start:start + self.batch_size]))
+
+        polled = {job["video_id"] for job in due}
+        next_due = [
+            self._due_at(job) for job in pending
+            if job["video_id"] not in polled or job["video_id"] in self._schedule
+        ]
+        if not next_due:
+            return self.max_interval
+        return min(self.max_interval, max(self.min_interval, min(next_due) - time.monotonic()))
+
+    async def _run(self):
+        while True:
+            self._wake.clear()
+            try:
+                delay = await self.reconcile_once()
+            except Exception:
+                # Keep polling: a store or schema error must not leave jobs stuck without a trace
+                VIDEO_RECONCILER_FAILURES.inc()
+                logger.exception("video status reconciliation failed")
+                delay = self.max_interval
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
@@ -25,6 +25,7 @@ export const VideoGenerator = () => {
   const [isGenerating, setIsGenerating] = useState(false);
   const [result, setResult] = useState(null);
   const [script, setScript] = useState(null);
+  const [scriptVariant, setScriptVariant] = useState(0);
   const [editedScript, setEditedScript] = useState("");
   const [additionalSuggestions, setAdditionalSuggestions] = useState("");
   const [isGeneratingScript, setIsGeneratingScript] = useState(false);
@@ -98,7 +99,21 @@ export const VideoGenerator = () => {
           customerInfo: result.target_audience || prev.customerInfo,
         }));
 
-        if (result.product_images && result.product_images.length > 0) {
+        const processedImages = (result.images || []).filter(
+          (image) => image.variants && image.variants.thumb
+        );
+        if (processedImages.length > 0) {
+          // Thumbnails served by the backend instead of full-size originals
+          const imageObjects = processedImages.map((image, index) => ({
+            file: null,
+            url: `http://localhost:8000${image.variants.thumb.url}`,
+            sourceUrl: image.source_url,
+            backgroundUrl: `http://localhost:8000${image.variants.background.url}`,
+            name: `Product Image ${index + 1}`,
+            isFromUrl: true,
+          }));
+          setImages((prev) => [...prev, ...imageObjects]);
+        } else if (result.product_images && result.product_images.length > 0) {
           const imageObjects = result.product_images.map((imageUrl, index) => ({
             file: null,
             url: imageUrl,
@@ -151,6 +166,7 @@ export const VideoGenerator = () => {
         const result = await response.json();
         setScript(result.script);
         setEditedScript(result.script);
+        setScriptVariant(result.variant ?? 0);
       } else {
         throw new Error("Failed to generate script");
       }
@@ -183,6 +199,8 @@ export const VideoGenerator = () => {
             customer_info: formData.customerInfo,
             style: formData.style,
             additional_suggestions: additionalSuggestions,
+            // Ask for the next stored alternative instead of the one on screen
+            variant: scriptVariant + 1,
           }),
         }
       );
@@ -191,6 +209,7 @@ export const VideoGenerator = () => {
         const result = await response.json();
         setScript(result.script);
         setEditedScript(result.script);
+        setScriptVariant(result.variant ?? 0);
       } else {
         throw new Error("Failed to regenerate script");
       }
@@ -243,8 +262,39 @@ export const VideoGenerator = () => {
       });
 
       if (response.ok) {
-        const result = await response.json();
-        setResult(result);
+        // The video is submitted to Tavus in the background; the server pushes
+        // every status change until the video is ready
+        const job = await response.json();
+        await new Promise((resolve, reject) => {
+          const events = new EventSource(
+            `http://localhost:8000/api/videos/${job.job_id}/events`
+          );
+          let submitted = false;
+          events.addEventListener("status", (event) => {
+            const video = JSON.parse(event.data);
+            if (video.status === "failed") {
+              events.close();
+              reject(new Error(video.error || "Failed to generate video"));
+              return;
+            }
+            if (video.status !== "pending" && video.status !== "submitting") {
+              setResult(video);
+              if (!submitted) {
+                submitted = true;
+                resolve();
+              }
+            }
+            if (["ready", "completed", "error", "deleted"].includes(video.status)) {
+              events.close();
+            }
+          });
+          events.onerror = () => {
+            events.close();
+            if (!submitted) {
+              reject(new Error("Lost connection to video status updates"));
+            }
+          };
+        });
       } else {
         throw new Error("Failed to generate video");
       }
@@ -466,6 +516,9 @@ export const VideoGenerator = () => {
                   <option value="minimal" className="bg-slate-800">
                     Minimal
                   </option>
+                  <option value="scene" className="bg-slate-800">
+                    Scene by Scene
+                  </option>
                 </select>
               </div>
 